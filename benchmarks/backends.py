@@ -0,0 +1,208 @@
+"""
+Backends Benchmark
+******************
+
+Description
+===========
+
+This module is used to measure the latency and throughput of each of the data manager's storage backends, using the
+real key set and the real access pattern - one thread writing the controller values, and one process (the connection)
+reading the safeguarded transmission data.
+
+Each backend is measured in two ways:
+
+    1. Isolated operations - single key `set`, 19-key `set_many`, single key `get` and `snapshot(transmit=True)`, each
+       measured right after a modification (so that the data manager's result cache doesn't hide the storage cost)
+    2. Concurrent access - a writer thread and a reader process running at the same time, either as fast as possible
+       (throughput) or paced with the controller's and the connection's delays (latency)
+
+.. note::
+
+    The memory backend isn't shared between the processes, so its reader runs in a thread instead.
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.backends
+"""
+
+from communication.cache import DiscCache, MemoryCache
+from communication.data_manager import DataManager
+from communication.schema import SCHEMA
+from communication.shared_memory import SharedMemoryCache
+from pathos import helpers
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter, sleep
+
+# Declare the controller's and the connection's delays (seconds), used in the paced scenario
+WRITER_DELAY = 0.025
+READER_DELAY = 0.01
+
+
+def _values(step):
+    """
+    Function used to build the controller values.
+
+    :param step: Iteration number, used to vary the values
+    :return: Dictionary of all controller keys
+    """
+
+    return {field.key: field.minimum + (step + field.id) % (field.maximum - field.minimum + 1) for field in SCHEMA}
+
+
+def _summary(durations):
+    """
+    Function used to summarise the measured durations.
+
+    :param durations: List of durations (seconds)
+    :return: Tuple of the operations per second, and the mean, median and 99th percentile latencies (microseconds)
+    """
+
+    if not durations:
+        return 0, 0, 0, 0
+
+    durations = sorted(durations)
+    mean = sum(durations) / len(durations)
+
+    return 1 / mean, mean * 1e6, durations[len(durations) // 2] * 1e6, durations[int(len(durations) * 0.99)] * 1e6
+
+
+def measure_isolated(manager, iterations):
+    """
+    Function used to measure the isolated operations.
+
+    :param manager: Data manager to measure
+    :param iterations: Number of iterations of each operation
+    :return: Dictionary mapping the operations to their summaries
+    """
+
+    results = {"set": list(), "set_many": list(), "get": list(), "snapshot": list()}
+
+    for step in range(iterations):
+        values = _values(step)
+
+        start = perf_counter()
+        manager.set(Mot_G=values["Mot_G"])
+        results["set"].append(perf_counter() - start)
+
+        start = perf_counter()
+        manager.set_many(values)
+        results["set_many"].append(perf_counter() - start)
+
+        start = perf_counter()
+        manager.get("Mot_G")
+        results["get"].append(perf_counter() - start)
+
+        manager.set(Mot_G=values["Mot_R"])
+
+        start = perf_counter()
+        manager.snapshot(transmit=True)
+        results["snapshot"].append(perf_counter() - start)
+
+    return {operation: _summary(durations) for operation, durations in results.items()}
+
+
+def _write(manager, duration, delay, results):
+    """
+    Function used to keep writing the controller values.
+
+    :param manager: Data manager to write to
+    :param duration: Time to keep writing for (seconds)
+    :param delay: Delay between the writes (seconds)
+    :param results: List to store the write durations in
+    """
+
+    step, end = 0, perf_counter() + duration
+    while perf_counter() < end:
+        values = _values(step)
+        start = perf_counter()
+        manager.set_many(values)
+        results.append(perf_counter() - start)
+        step += 1
+        if delay:
+            sleep(delay)
+
+
+def _read(manager, duration, delay, results):
+    """
+    Function used to keep reading the transmission data.
+
+    :param manager: Data manager to read from
+    :param duration: Time to keep reading for (seconds)
+    :param delay: Delay between the reads (seconds)
+    :param results: List (or queue) to store the read durations in
+    """
+
+    durations, end = list(), perf_counter() + duration
+    while perf_counter() < end:
+        start = perf_counter()
+        manager.snapshot(transmit=True)
+        durations.append(perf_counter() - start)
+        if delay:
+            sleep(delay)
+
+    # Support both the list (thread) and the queue (process)
+    if isinstance(results, list):
+        results.extend(durations)
+    else:
+        results.put(durations)
+
+
+def measure_concurrent(manager, duration, paced, process=True):
+    """
+    Function used to measure the concurrent access of a writer thread and a reader process.
+
+    :param manager: Data manager to measure
+    :param duration: Time to run for (seconds)
+    :param paced: Boolean to specify if the real delays should be applied
+    :param process: Boolean to specify if the reader should run in a separate process (a thread otherwise)
+    :return: Tuple of the writer's and the reader's summaries
+    """
+
+    writes, reads = list(), helpers.mp.Queue() if process else list()
+    writer_delay, reader_delay = (WRITER_DELAY, READER_DELAY) if paced else (0, 0)
+
+    # Start the reader and the writer
+    reader = (helpers.mp.Process if process else Thread)(target=_read, args=(manager, duration, reader_delay, reads))
+    writer = Thread(target=_write, args=(manager, duration, writer_delay, writes))
+    reader.start()
+    writer.start()
+
+    # Collect the results
+    writer.join()
+    reads = reads.get() if process else reads
+    reader.join()
+
+    return _summary(writes), _summary(reads)
+
+
+if __name__ == "__main__":
+
+    with TemporaryDirectory() as directory:
+
+        # Build a manager for each backend
+        managers = {
+            "memory": DataManager(MemoryCache()),
+            "disc": DataManager(DiscCache(directory, shards=8)),
+            "shared_memory": DataManager(SharedMemoryCache())
+        }
+
+        print("{:14} {:10} {:>12} {:>10} {:>10} {:>10}".format("backend", "operation", "ops/s", "mean us", "p50 us",
+                                                             "p99 us"))
+
+        for name, manager in managers.items():
+
+            # Measure the isolated operations
+            for operation, summary in measure_isolated(manager, 200 if name == "disc" else 5000).items():
+                print("{:14} {:10} {:12.0f} {:10.1f} {:10.1f} {:10.1f}".format(name, operation, *summary))
+
+            # Measure the concurrent access
+            for scenario, paced in (("saturated", False), ("paced", True)):
+                writer, reader = measure_concurrent(manager, 2, paced, process=name != "memory")
+                print("{:14} {:10} {:12.0f} {:10.1f} {:10.1f} {:10.1f}".format(name, scenario + " w", *writer))
+                print("{:14} {:10} {:12.0f} {:10.1f} {:10.1f} {:10.1f}".format(name, scenario + " r", *reader))
+
+            manager._data.close()
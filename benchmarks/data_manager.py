@@ -0,0 +1,87 @@
+"""
+Data Manager Benchmark
+**********************
+
+Description
+===========
+
+This module is used to measure the cost of a single control tick against each of the data manager's storage backends.
+
+A tick consists of the controller writing every key of its data manager map (either one key at a time, or in a single
+batch), followed by the connection fetching the safeguarded transmission data.
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.data_manager
+"""
+
+from communication.cache import DiscCache
+from communication.data_manager import DataManager
+from communication.schema import SCHEMA
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+
+def _tick(manager, step, batch):
+    """
+    Function used to simulate a single control tick.
+
+    :param manager: Data manager to use
+    :param step: Tick number, used to vary the values
+    :param batch: Boolean to specify if the keys should be written in a single transaction
+    """
+
+    # Build the controller values
+    data = {field.key: field.minimum + (step + field.id) % (field.maximum - field.minimum + 1) for field in SCHEMA}
+
+    # Write the controller keys
+    if batch:
+        manager.set_many(data)
+    else:
+        for key, value in data.items():
+            manager.set(**{key: value})
+
+    # Fetch the transmission data
+    manager.snapshot(transmit=True)
+
+
+def measure(manager, ticks, batch=True):
+    """
+    Function used to measure the average duration of a tick.
+
+    :param manager: Data manager to use
+    :param ticks: Number of ticks to run
+    :param batch: Boolean to specify if the keys should be written in a single transaction
+    :return: Average tick duration (seconds)
+    """
+
+    start = perf_counter()
+    for step in range(ticks):
+        _tick(manager, step, batch)
+    return (perf_counter() - start) / ticks
+
+
+if __name__ == "__main__":
+
+    with TemporaryDirectory() as directory:
+
+        # Build a manager for each backend
+        disc, shared = DataManager(DiscCache(directory, shards=8)), DataManager("shared_memory")
+
+        # Measure the per-key and batched ticks on both backends
+        results = {
+            "disc, per key": measure(disc, 200, batch=False),
+            "disc, batched": measure(disc, 200),
+            "shared memory, per key": measure(shared, 2000, batch=False),
+            "shared memory, batched": measure(shared, 2000),
+        }
+
+        # Compare the results against the original, per-key disc access
+        for name, duration in results.items():
+            print("{:24} {:10.1f} us per tick ({:6.1f}x)".format(
+                name, duration * 1e6, results["disc, per key"] / duration))
+
+        disc._data.close()
@@ -0,0 +1,191 @@
+"""
+Datagram Benchmark
+******************
+
+Description
+===========
+
+This module is used to test the UDP transport of the :class:`Connection` against a local stand-in for the Raspberry Pi,
+on a lossy link simulated by a :class:`LossInjector`.
+
+The stand-in receives the setpoints (the datagrams, or the framed messages of the TCP transport), discards the stale
+datagrams, echoes the heartbeats, and keeps sending the telemetry over the TCP side channel. While each scenario runs,
+the benchmark keeps modifying a transmission value, and measures:
+
+    1. Latency between modifying the value and the stand-in applying it
+    2. Whether the stand-in ends up with the last value
+    3. Number of datagrams applied, dropped by the injector, discarded as stale and skipped
+    4. Number of telemetry messages stored in the data manager
+    5. Round-trip time of the heartbeats
+
+The TCP transport is only measured on the loss-free link, as its retransmissions can't be simulated above the socket.
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.datagram
+"""
+
+import communication.data_manager as dm
+import socket
+from communication.connection import Connection
+from communication.datagram import MAX_DATAGRAM_SIZE, DatagramReceiver, LossInjector
+from communication.engine import Engine
+from communication.protocol import BINARY, HEARTBEAT, Decoder, decode_data, encode, encode_data
+from threading import Lock, Thread
+from time import perf_counter, sleep
+
+# Declare the first port (each scenario uses the next one), and the telemetry rate (messages per second)
+PORT = 50200
+TELEMETRY_RATE = 50
+
+# Declare the duration of each scenario, and the delay between the modifications (seconds)
+DURATION = 5
+MODIFICATION_DELAY = 0.02
+
+# Declare the scenarios - transport, probability of a loss and probability of a reordering
+SCENARIOS = (
+    ("tcp", 0, 0),
+    ("udp", 0, 0),
+    ("udp", 0.1, 0.05),
+    ("udp", 0.3, 0.05)
+)
+
+
+class StandIn:
+
+    def __init__(self, port, loss, reorder):
+        """
+        Constructor function used to start the stand-in's threads.
+
+        :param port: Port of both the TCP and the UDP servers
+        :param loss: Probability of dropping a datagram
+        :param reorder: Probability of delivering a datagram after the next one
+        """
+
+        # Initialise the receiving side of the datagrams, and the arrivals of the new values
+        self.receiver, self.injector = DatagramReceiver(), LossInjector(loss, reorder, seed=0)
+        self.arrivals, self.value = dict(), None
+
+        # Bind both servers to the same port number
+        self._tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._tcp.bind(("localhost", port))
+        self._tcp.listen(1)
+        self._udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._udp.bind(("localhost", port))
+
+        Thread(target=self._serve_datagrams, daemon=True).start()
+        Thread(target=self._serve_connection, daemon=True).start()
+
+    def _apply(self, data):
+        """
+        Function used to apply the received setpoints, and record the arrival of a new value.
+
+        :param data: Dictionary of the received values
+        """
+
+        if data["Mot_G"] != self.value:
+            self.value = data["Mot_G"]
+            self.arrivals.setdefault(self.value, perf_counter())
+
+    def _serve_datagrams(self):
+        """
+        Function used to keep receiving the datagrams through the simulated link.
+        """
+
+        while True:
+            for datagram in self.injector(self._udp.recv(MAX_DATAGRAM_SIZE)):
+                data = self.receiver.receive(datagram)
+                if data is not None:
+                    self._apply(data)
+
+    def _serve_connection(self):
+        """
+        Function used to keep sending the telemetry over the TCP connection, to receive the setpoints sent over it, and
+        to echo the heartbeats.
+        """
+
+        client, _ = self._tcp.accept()
+        lock = Lock()
+
+        # Inner function to keep receiving the framed setpoints and the heartbeats
+        def _receive():
+            decoder = Decoder()
+            while True:
+                for message_type, payload in decoder.feed(client.recv(4096)):
+                    if message_type == HEARTBEAT:
+                        with lock:
+                            client.sendall(encode(HEARTBEAT, payload))
+                    else:
+                        self._apply(decode_data(message_type, payload))
+
+        Thread(target=_receive, daemon=True).start()
+
+        # Keep sending the telemetry
+        count = 0
+        while True:
+            count += 1
+            with lock:
+                client.sendall(encode_data({"telemetry": count}, BINARY))
+            sleep(1 / TELEMETRY_RATE)
+
+
+def measure(port, transport, loss, reorder):
+    """
+    Function used to run a scenario, and summarise the measurements.
+
+    :param port: Port of the stand-in
+    :param transport: Transport of the setpoints
+    :param loss: Probability of dropping a datagram
+    :param reorder: Probability of delivering a datagram after the next one
+    :return: Tuple of the stand-in, the median and the 99th percentile latencies, whether the last value was applied,
+        and the link statistics
+    """
+
+    # Start the stand-in and the connection
+    stand_in = StandIn(port, loss, reorder)
+    engine = Engine()
+    connection = Connection(ip="localhost", port=port, protocol="binary", duplex=True, transport=transport,
+                            engine=engine)
+    connection.connect()
+    sleep(1)
+
+    # Keep modifying the value
+    modifications, start, value = dict(), perf_counter(), 1501
+    while perf_counter() - start < DURATION:
+        value = value + 1 if value < 1899 else 1501
+        modifications[value] = perf_counter()
+        dm.set_data(Mot_G=value)
+        sleep(MODIFICATION_DELAY)
+
+    # Let the last value arrive, and stop the connection
+    sleep(0.2)
+    statistics = connection.statistics()
+    engine.stop()
+
+    # Match the modifications with their arrivals
+    latencies = sorted(stand_in.arrivals[value] - modified for value, modified in modifications.items()
+                       if value in stand_in.arrivals and stand_in.arrivals[value] >= modified)
+
+    return (stand_in, latencies[len(latencies) // 2] * 1e3, latencies[int(len(latencies) * 0.99)] * 1e3,
+            stand_in.value == value, statistics)
+
+
+if __name__ == "__main__":
+
+    dm.clear()
+    dm.set_data(Mot_G=1500)
+
+    print("{} s per scenario, a modification every {:.0f} ms".format(DURATION, MODIFICATION_DELAY * 1e3))
+    for port, (transport, loss, reorder) in enumerate(SCENARIOS, PORT):
+        stand_in, median, tail, last, statistics = measure(port, transport, loss, reorder)
+        receiver, injector = stand_in.receiver, stand_in.injector
+        print("    {} {:3.0%} lost {:3.0%} reordered: latency median {:5.2f} ms, 99% {:6.2f} ms, last value {}, "
+              "{:4} applied {:4} dropped {:3} stale {:4} skipped, {} telemetry messages, heartbeat RTT median "
+              "{:4.2f} ms, 99% {:4.2f} ms".format(
+                transport, loss, reorder, median, tail, "applied" if last else "MISSING", receiver.received,
+                injector.dropped, receiver.stale, receiver.skipped, dm.get_data("telemetry")["telemetry"],
+                statistics["rtt_p50"] * 1e3, statistics["rtt_p99"] * 1e3))
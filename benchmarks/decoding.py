@@ -0,0 +1,113 @@
+"""
+Decoding Benchmark
+******************
+
+Description
+===========
+
+This module is used to compare decoding the frames within the :class:`VideoStream` threads against decoding them in a
+:class:`DecoderPool`, with three cameras streaming JPEG frames as fast as possible from a :class:`Simulator`.
+
+The benchmark is only meaningful on a machine with several cores - with a single core, the pool only adds the cost of
+passing the frames between the processes.
+
+Meanwhile, a thread stands in for the control loop - it repeatedly runs a short piece of Python code, and reports how
+many times it managed to, as the decoding competes with it for the GIL. Each run reports:
+
+    1. Number of the frames received per second, by all cameras
+    2. Number of the control loop's iterations per second
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.decoding
+"""
+
+from communication.decoding import DecoderPool
+from communication.video_stream import VideoStream
+from simulator.pi import Simulator
+from threading import Event, Thread
+from time import monotonic, sleep
+
+# Declare the ports, the number of cameras and the frame's shape
+CONTROL_PORT = 50900
+CAMERA_PORT = 50910
+CAMERAS_COUNT = 3
+FRAME_SHAPE = (480, 640, 3)
+
+# Declare the time given to connect, and the duration of each run (seconds)
+WARMUP = 3
+DURATION = 5
+
+# Declare the numbers of the decoding processes compared (0 to decode within the streams)
+WORKERS = (0, 1, 2, 3)
+
+
+def _control_loop(stopped, counter):
+    """
+    Function used to keep running a short piece of Python code, counting the iterations.
+
+    :param stopped: Event set once the run is finished
+    :param counter: List holding the number of the iterations
+    """
+
+    while not stopped.is_set():
+        sum(range(1000))
+        counter[0] += 1
+
+
+def measure(simulator, workers, port) -> tuple:
+    """
+    Function used to receive the frames with the given number of decoding processes.
+
+    :param simulator: Running :class:`Simulator`, stopped once the run is finished
+    :param workers: Number of the decoding processes, 0 to decode within the streams
+    :param port: Port of the first camera (each run connects to its own simulator's ports)
+    :return: Tuple of the frames received per second, and the control loop's iterations per second
+    """
+
+    decoder = DecoderPool(workers=workers) if workers else None
+    streams = [VideoStream(port=p, protocol="framed", decoder=decoder) for p in range(port, port + CAMERAS_COUNT)]
+    for stream in streams:
+        stream.stream()
+    sleep(WARMUP)
+
+    # Run the control loop alongside the streams
+    stopped, counter = Event(), [0]
+    thread = Thread(target=_control_loop, args=(stopped, counter))
+    frames, start = sum(simulator.frames), monotonic()
+    thread.start()
+    sleep(DURATION)
+    stopped.set()
+    thread.join()
+    duration = monotonic() - start
+    frames = sum(simulator.frames) - frames
+
+    # Stop the streams first, so that no frame is submitted to the stopped decoding processes
+    for stream in streams:
+        stream.stop()
+    simulator.stop()
+    if decoder is not None:
+        decoder.close()
+
+    return frames / duration, counter[0] / duration
+
+
+if __name__ == "__main__":
+
+    print("{} s per run, {} cameras of {}x{} JPEG frames".format(DURATION, CAMERAS_COUNT, FRAME_SHAPE[1],
+                                                                FRAME_SHAPE[0]))
+
+    for index, workers in enumerate(WORKERS):
+
+        # Start a separate simulator for each run, so that the previous run's streams don't share its cameras
+        port = CAMERA_PORT + index * CAMERAS_COUNT
+        simulator = Simulator(port=CONTROL_PORT + index, camera_port=port, cameras=CAMERAS_COUNT,
+                              frame_shape=FRAME_SHAPE, frame_rate=0, frame_encoding="jpeg")
+        simulator.start()
+
+        frames, iterations = measure(simulator, workers, port)
+        print("    {} decoding processes: {:6.1f} frames/s, {:7.0f} control iterations/s".format(workers, frames,
+                                                                                                 iterations))
@@ -0,0 +1,109 @@
+"""
+Delta Benchmark
+***************
+
+Description
+===========
+
+This module is used to compare the full control messages against the delta-encoded messages of the
+:class:`DeltaEncoder`, on a simulated dive - the pilot is idle most of the time, and moves a few thrusters at once
+otherwise.
+
+Every message is decoded by the reference :class:`DeltaDecoder` and compared against the transmitted values, while some
+replies are dropped (so that some messages are never acknowledged), to verify that the receiver always reconstructs the
+exact values.
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.delta
+"""
+
+from communication.data_manager import DataManager
+from communication.protocol import BINARY, JSON, Decoder, DeltaDecoder, DeltaEncoder, encode_data
+from communication.schema import SCHEMA
+from random import Random
+from time import perf_counter
+
+# Declare the number of ticks, the fraction of ticks during which the pilot is active, and the fraction of lost replies
+TICKS = 20000
+ACTIVE = 0.3
+LOST = 0.01
+
+
+def _trace(generator):
+    """
+    Function used to build the transmission data of each tick.
+
+    :param generator: Random generator
+    :return: List of the transmission dictionaries
+    """
+
+    manager, trace = DataManager("memory"), list()
+    manager.set_many({key: 1500 for key in manager._transmission_keys})
+    keys = sorted(manager._transmission_keys)
+
+    # Alternate between the idle and the active periods of 100 ticks
+    for tick in range(TICKS):
+        if tick % 100 == 0:
+            active = generator.random() < ACTIVE
+
+        # Move a few thrusters while active
+        if active:
+            manager.set_many({key: generator.randint(SCHEMA[key].minimum, SCHEMA[key].maximum)
+                              for key in generator.sample(keys, generator.randint(2, 4))})
+
+        trace.append(manager.get(transmit=True))
+
+    return trace
+
+
+def measure(trace, message_type, delta, generator):
+    """
+    Function used to encode the trace and decode it with the reference decoder.
+
+    :param trace: List of the transmission dictionaries
+    :param message_type: Type of the messages
+    :param delta: Whether the delta encoding should be used
+    :param generator: Random generator, used to drop the replies
+    :return: Tuple of the total number of bytes, and the mean encoding time (microseconds)
+    """
+
+    encoder = DeltaEncoder(message_type) if delta else None
+    stream_decoder, decoder = Decoder(), DeltaDecoder()
+    size, duration = 0, 0
+
+    for data in trace:
+
+        # Encode the message
+        start = perf_counter()
+        message = encoder.encode(data) if delta else encode_data(data, message_type)
+        duration += perf_counter() - start
+        size += len(message)
+
+        # Decode it the way the Raspberry Pi would, and verify the values (rounded if packed)
+        (received_type, payload), = stream_decoder.feed(message)
+        received = decoder.decode(received_type, payload)
+        expected = data if message_type == JSON else {key: round(value) for key, value in data.items()}
+        assert received == expected, (received, expected)
+
+        # Acknowledge the message, unless the reply was lost
+        if delta and generator.random() >= LOST:
+            encoder.acknowledge()
+
+    return size, duration / len(trace) * 1e6
+
+
+if __name__ == "__main__":
+
+    trace = _trace(Random(0))
+
+    # Measure the full and the delta messages of both types
+    print("{} ticks ({:.0%} active, {:.0%} replies lost)".format(TICKS, ACTIVE, LOST))
+    for name, message_type in (("json", JSON), ("binary", BINARY)):
+        full_size, full_duration = measure(trace, message_type, False, Random(1))
+        delta_size, delta_duration = measure(trace, message_type, True, Random(1))
+        print("    {:6} full {:5.1f} bytes {:5.2f} us, delta {:5.1f} bytes {:5.2f} us ({:.1f}x fewer bytes)".format(
+            name, full_size / TICKS, full_duration, delta_size / TICKS, delta_duration, full_size / delta_size))
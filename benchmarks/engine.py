@@ -0,0 +1,253 @@
+"""
+Engine Benchmark
+****************
+
+Description
+===========
+
+This module is used to compare the original networking model (a process for the :class:`Connection` and a thread for
+each :class:`VideoStream`) against running all of them as coroutines on a shared :class:`Engine`.
+
+A local server process stands in for the Raspberry Pi - it replies to each control message with a telemetry message, and
+streams pickled frames on each camera port, waiting for the acknowledgement after each frame. The frames are sent either
+at the cameras' frame rate, or as fast as possible. While each model runs, the benchmark keeps modifying a transmission
+value, and measures:
+
+    1. CPU time used by the surface processes (including the connection process, if any)
+    2. Latency between modifying the value and the server receiving it
+    3. Number of control messages and frames exchanged
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.engine
+"""
+
+import communication.data_manager as dm
+import numpy as np
+import os
+import socket
+from communication.connection import Connection
+from communication.engine import Engine
+from communication.protocol import Decoder, decode_data, encode_data
+from communication.video_stream import VideoStream
+from dill import dumps
+from pathos import helpers
+from threading import Thread
+from time import perf_counter, process_time, sleep
+
+# Declare the ports, the number of cameras, the frame's shape and the cameras' frame rate
+CONTROL_PORT = 50100
+CAMERA_PORT = 50110
+CAMERAS_COUNT = 3
+FRAME_SHAPE = (240, 320, 3)
+FRAME_RATE = 30
+
+# Declare the duration of each run, and the delay between the modifications (seconds)
+DURATION = 5
+MODIFICATION_DELAY = 0.02
+
+
+def _serve_control(server, arrivals, counters):
+    """
+    Function used to reply to the control messages, and report when each new value arrives.
+
+    :param server: Listening socket
+    :param arrivals: Queue of the (value, arrival time) tuples
+    :param counters: Shared array of the message count, the frame count and the pacing flag
+    """
+
+    while True:
+        client, _ = server.accept()
+        decoder, last = Decoder(), None
+
+        while True:
+            try:
+                data = client.recv(4096)
+            except OSError:
+                break
+            if not data:
+                break
+
+            # Report each new value, and reply with the telemetry
+            for message_type, payload in decoder.feed(data):
+                value = decode_data(message_type, payload).get("Mot_G")
+                if value != last:
+                    arrivals.put((value, perf_counter()))
+                    last = value
+                counters[0] += 1
+                client.sendall(encode_data({"depth": 10.5, "temperature": 12.25}))
+
+        client.close()
+
+
+def _serve_camera(server, counters):
+    """
+    Function used to keep sending the frames, waiting for the acknowledgement after each one.
+
+    :param server: Listening socket
+    :param counters: Shared array of the message count, the frame count and the pacing flag
+    """
+
+    payload = dumps(np.random.randint(0, 255, FRAME_SHAPE, dtype=np.uint8)) + b"Frame was successfully sent"
+
+    while True:
+        client, _ = server.accept()
+        try:
+            while True:
+                start = perf_counter()
+                client.sendall(payload)
+                if not client.recv(3):
+                    break
+                counters[1] += 1
+
+                # Wait for the next frame if paced
+                if counters[2]:
+                    sleep(max(0, 1 / FRAME_RATE - (perf_counter() - start)))
+        except OSError:
+            pass
+        client.close()
+
+
+def serve(arrivals, counters):
+    """
+    Function used to run the stand-in for the Raspberry Pi.
+
+    :param arrivals: Queue of the (value, arrival time) tuples
+    :param counters: Shared array of the message count, the frame count and the pacing flag
+    """
+
+    threads = list()
+    for port in [CONTROL_PORT] + list(range(CAMERA_PORT, CAMERA_PORT + CAMERAS_COUNT)):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("localhost", port))
+        server.listen(1)
+        if port == CONTROL_PORT:
+            threads.append(Thread(target=_serve_control, args=(server, arrivals, counters)))
+        else:
+            threads.append(Thread(target=_serve_camera, args=(server, counters)))
+
+    for thread in threads:
+        thread.start()
+
+
+def _cpu_time(pid):
+    """
+    Function used to read the CPU time used by another process (Linux only).
+
+    :param pid: Process id
+    :return: User and system time (seconds)
+    """
+
+    with open("/proc/{}/stat".format(pid)) as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def run(use_engine, results):
+    """
+    Function used to run the surface side with the selected model, and report the measurements.
+
+    :param use_engine: Whether the shared engine should be used
+    :param results: Queue to put the (CPU time, modification times) tuple into
+    """
+
+    # Fork the connection process (as on the surface station), so that it shares the data manager's notifications
+    helpers.mp.set_start_method("fork", force=True)
+
+    dm.clear()
+    dm.set_data(Mot_G=1501)
+
+    # Start the connection and the streams
+    engine = Engine() if use_engine else None
+    connection = Connection(ip="localhost", port=CONTROL_PORT, protocol="json", engine=engine)
+    streams = [VideoStream(ip="localhost", port=port, engine=engine)
+               for port in range(CAMERA_PORT, CAMERA_PORT + CAMERAS_COUNT)]
+    connection.connect()
+    for stream in streams:
+        stream.stream()
+
+    # Let the connections establish
+    sleep(1)
+    child = connection._connection_process.pid if connection._connection_process else None
+    cpu = process_time() + (_cpu_time(child) if child else 0)
+
+    # Keep modifying the value
+    modifications, start, value = dict(), perf_counter(), 1501
+    while perf_counter() - start < DURATION:
+        value = value % 1899 + 1 if value < 1899 else 1501
+        modifications[value] = perf_counter()
+        dm.set_data(Mot_G=value)
+        sleep(MODIFICATION_DELAY)
+
+    cpu = process_time() + (_cpu_time(child) if child else 0) - cpu
+
+    # Stop the connection process, if any
+    if connection._connection_process:
+        connection._connection_process.terminate()
+
+    results.put((cpu, modifications))
+
+
+def measure(use_engine, arrivals, counters):
+    """
+    Function used to run a model in a separate process and summarise the measurements.
+
+    :param use_engine: Whether the shared engine should be used
+    :param arrivals: Queue of the (value, arrival time) tuples
+    :param counters: Shared array of the message count, the frame count and the pacing flag
+    :return: Tuple of the CPU usage, the median and the 99th percentile latencies, and the message and frame rates
+    """
+
+    # Spawn a fresh interpreter, so that the terminated processes of a model don't affect the data manager of the others
+    context = helpers.mp.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=run, args=(use_engine, results))
+    process.start()
+
+    # Reset the counters once the connections were established
+    sleep(1)
+    counters[0] = counters[1] = 0
+
+    cpu, modifications = results.get()
+    messages, frames = counters[0], counters[1]
+    process.terminate()
+
+    # Match the modifications with their arrivals
+    latencies = list()
+    while not arrivals.empty():
+        value, arrival = arrivals.get()
+        if value in modifications:
+            latencies.append(arrival - modifications.pop(value))
+    latencies.sort()
+
+    return (cpu / DURATION, latencies[len(latencies) // 2] * 1e3, latencies[int(len(latencies) * 0.99)] * 1e3,
+            messages / DURATION, frames / DURATION)
+
+
+if __name__ == "__main__":
+
+    arrivals, counters = helpers.mp.Queue(), helpers.mp.Array("q", 3)
+    server = helpers.mp.Process(target=serve, args=(arrivals, counters), daemon=True)
+    server.start()
+    sleep(0.5)
+
+    for paced in (True, False):
+        print("{} cameras, {}".format(CAMERAS_COUNT, "{} fps".format(FRAME_RATE) if paced else "saturated"))
+        counters[2] = paced
+
+        for name, use_engine in (("threads", False), ("engine", True)):
+            cpu, median, tail, messages, frames = measure(use_engine, arrivals, counters)
+            print("    {:8} CPU {:5.1%}, latency median {:5.2f} ms, 99% {:5.2f} ms, {:4.0f} messages/s, "
+                  "{:5.0f} frames/s".format(name, cpu, median, tail, messages, frames))
+
+            # Let the server notice the closed connections
+            sleep(1)
+            while not arrivals.empty():
+                arrivals.get()
+
+    server.terminate()
@@ -0,0 +1,64 @@
+"""
+Frames Benchmark
+****************
+
+Description
+===========
+
+This module is used to compare the pickled frames against the framed raw and JPEG frames of the
+:mod:`communication.frames` module.
+
+Each encoding is measured by:
+
+    1. Size of a 640x480 colour frame on the wire
+    2. Time to decode the frame once fully received (un-pickling it, or decoding its header and payload)
+
+The frames are smooth gradients with some noise rather than pure noise, so that the JPEG sizes resemble the camera's.
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.frames
+"""
+
+import numpy as np
+from communication.frames import JPEG, RAW, decode_frame, encode_frame
+from dill import dumps, loads
+from timeit import timeit
+
+# Declare the frame's shape, and the number of the decodes measured
+FRAME_SHAPE = (480, 640, 3)
+DECODES = 200
+
+
+def _image():
+    """
+    Function used to build a camera-like image.
+
+    :return: NumPy array of the image
+    """
+
+    generator = np.random.default_rng(0)
+    rows, columns = np.mgrid[0:FRAME_SHAPE[0], 0:FRAME_SHAPE[1]]
+    image = np.stack([rows * 255 // FRAME_SHAPE[0], columns * 255 // FRAME_SHAPE[1], (rows + columns) % 256], axis=2)
+
+    return np.clip(image + generator.integers(-8, 8, FRAME_SHAPE), 0, 255).astype(np.uint8)
+
+
+if __name__ == "__main__":
+
+    image = _image()
+    print("{} decodes of a {}x{} frame".format(DECODES, FRAME_SHAPE[1], FRAME_SHAPE[0]))
+
+    # Measure the pickled frame
+    pickled = bytearray(dumps(image))
+    duration = timeit(lambda: loads(pickled), number=DECODES) / DECODES
+    print("    {:6}: {:7} bytes, {:7.1f} us per decode".format("dill", len(pickled), duration * 1e6))
+
+    # Measure the framed frames
+    for name, encoding in (("raw", RAW), ("jpeg", JPEG)):
+        framed = bytearray(encode_frame(image, 0, 0, encoding))
+        duration = timeit(lambda: decode_frame(framed), number=DECODES) / DECODES
+        print("    {:6}: {:7} bytes, {:7.1f} us per decode".format(name, len(framed), duration * 1e6))
@@ -0,0 +1,161 @@
+"""
+Protocol Benchmark
+******************
+
+Description
+===========
+
+This module is used to compare the original, unframed JSON messages against the framed JSON and binary messages of the
+:mod:`communication.protocol` module.
+
+Each protocol is measured in two ways:
+
+    1. Round trip - encoding a transmission message and decoding it from a single chunk
+    2. Stream - decoding a stream of messages which was split into random chunks (the way TCP may deliver it), which
+       also reports how many messages the original approach (one message per `recv`) fails to decode
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.protocol
+"""
+
+from communication.data_manager import DataManager
+from communication.protocol import BINARY, JSON, Decoder, decode_data, encode_data
+from communication.schema import SCHEMA
+from json import JSONDecodeError, dumps, loads
+from random import Random
+from time import perf_counter
+from timeit import timeit
+
+# Declare the number of messages in the stream, and the maximum size of a received chunk (bytes)
+MESSAGES = 20000
+CHUNK_SIZE = 4096
+
+
+def _transmission():
+    """
+    Function used to build a realistic transmission message - full thrust, so that the values are safeguarded.
+
+    :return: Dictionary of the transmission values
+    """
+
+    manager = DataManager("memory")
+    manager.set_many({field.key: field.maximum for field in SCHEMA})
+
+    return manager.get(transmit=True)
+
+
+def _chunks(stream, generator):
+    """
+    Function used to split the stream into random chunks.
+
+    :param stream: Bytes to split
+    :param generator: Random generator
+    :return: List of chunks
+    """
+
+    chunks, offset = list(), 0
+    while offset < len(stream):
+        size = generator.randint(1, CHUNK_SIZE)
+        chunks.append(stream[offset:offset + size])
+        offset += size
+
+    return chunks
+
+
+def original_round_trip(data):
+    """
+    Function used to send and receive the message the way the connection originally did.
+
+    :param data: Dictionary of values
+    :return: Decoded dictionary
+    """
+
+    return loads(bytes(dumps(data), encoding="utf-8").decode("utf-8").strip())
+
+
+def framed_round_trip(data, message_type):
+    """
+    Function used to send and receive a framed message.
+
+    :param data: Dictionary of values
+    :param message_type: Type of the message
+    :return: Decoded dictionary
+    """
+
+    (received_type, payload), = Decoder().feed(encode_data(data, message_type))
+
+    return decode_data(received_type, payload)
+
+
+def original_stream(chunks):
+    """
+    Function used to decode the chunks the way the connection originally did.
+
+    :param chunks: List of received chunks
+    :return: Number of decoded messages
+    """
+
+    decoded = 0
+    for chunk in chunks:
+        try:
+            loads(chunk.decode("utf-8").strip())
+            decoded += 1
+        except (JSONDecodeError, UnicodeDecodeError):
+            pass
+
+    return decoded
+
+
+def framed_stream(chunks):
+    """
+    Function used to decode the chunks of a framed stream.
+
+    :param chunks: List of received chunks
+    :return: Number of decoded messages
+    """
+
+    decoder, decoded = Decoder(), 0
+    for chunk in chunks:
+        for message_type, payload in decoder.feed(chunk):
+            decode_data(message_type, payload)
+            decoded += 1
+
+    return decoded
+
+
+if __name__ == "__main__":
+
+    data = _transmission()
+    generator = Random(0)
+
+    # Measure the size and the round trip of a single message
+    print("round trip ({} keys)".format(len(data)))
+    results = (
+        ("original", len(dumps(data)), lambda: original_round_trip(data)),
+        ("json", len(encode_data(data, JSON)), lambda: framed_round_trip(data, JSON)),
+        ("binary", len(encode_data(data, BINARY)), lambda: framed_round_trip(data, BINARY))
+    )
+    baseline = None
+    for name, size, function in results:
+        duration = timeit(function, number=100000) * 10
+        baseline = baseline or duration
+        print("    {:8} {:4} bytes, {:6.2f} us ({:.1f}x)".format(name, size, duration, baseline / duration))
+
+    # Measure the stream of messages split into random chunks
+    print("stream ({} messages, chunks of up to {} bytes)".format(MESSAGES, CHUNK_SIZE))
+    streams = (
+        ("original", original_stream, b''.join(bytes(dumps(data), encoding="utf-8") for _ in range(MESSAGES))),
+        ("json", framed_stream, b''.join(encode_data(data, JSON) for _ in range(MESSAGES))),
+        ("binary", framed_stream, b''.join(encode_data(data, BINARY) for _ in range(MESSAGES)))
+    )
+    for name, function, stream in streams:
+        chunks = _chunks(stream, generator)
+        start = perf_counter()
+        decoded = function(chunks)
+        duration = perf_counter() - start
+        print("    {:8} {:6.1f} MB/s, {:8.0f} messages/s, {}/{} messages decoded".format(
+            name, len(stream) / duration / 1e6, MESSAGES / duration, decoded, MESSAGES))
@@ -0,0 +1,96 @@
+"""
+Recording Benchmark
+*******************
+
+Description
+===========
+
+This module is used to measure the sustained throughput of the :class:`Recorder`, with three cameras streaming raw
+frames as fast as possible from a :class:`Simulator`.
+
+Each format is measured by:
+
+    1. Number of the frames received per second, by all cameras
+    2. Number of the frames recorded per second, and the recorded megabytes per second (including the time taken to
+       write the frames still queued once the recording is stopped)
+    3. Number of the frames dropped per second, because the disc fell behind
+
+The frames are written to a temporary directory, so the results depend on the disc holding it.
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.recording
+"""
+
+import os
+from communication.recorder import FORMATS, Recorder
+from communication.video_stream import VideoStream
+from simulator.pi import Simulator
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+
+# Declare the first port (each run uses its own ports), the number of cameras and the frame's shape
+PORT = 51600
+CAMERAS_COUNT = 3
+FRAME_SHAPE = (480, 640, 3)
+
+# Declare the window of each stream
+WINDOW = 4
+
+# Declare the time given to connect, and the duration of each run (seconds)
+WARMUP = 2
+DURATION = 5
+
+
+def measure(form, port, directory) -> tuple:
+    """
+    Function used to record the cameras in the given format.
+
+    :param form: Format of the recording, one of `FORMATS`
+    :param port: Control port of the run's simulator (the cameras use the next ports)
+    :param directory: Path to the directory to record into
+    :return: Tuple of the frames received, recorded and dropped per second, and the recorded bytes per second
+    """
+
+    simulator = Simulator(port=port, camera_port=port + 1, cameras=CAMERAS_COUNT, frame_shape=FRAME_SHAPE, frame_rate=0,
+                          frame_encoding="raw")
+    simulator.start()
+
+    streams = [VideoStream(port=p, protocol="framed", window=WINDOW) for p in range(port + 1, port + 1 + CAMERAS_COUNT)]
+    for stream in streams:
+        stream.stream()
+    sleep(WARMUP)
+
+    # Record the cameras for the run's duration
+    recorder = Recorder(directory, streams, form=form)
+    received, start = sum(simulator.frames), monotonic()
+    recorder.start()
+    sleep(DURATION)
+    received, dropped = (sum(simulator.frames) - received) / (monotonic() - start), recorder.dropped
+
+    # Stop the recording, including the time taken to write the queued frames
+    recorder.stop()
+    duration = monotonic() - start
+
+    simulator.stop()
+
+    return received, recorder.recorded / duration, dropped / DURATION, recorder.recorded_bytes / duration
+
+
+if __name__ == "__main__":
+
+    print("{} s per run, {} cameras, {}x{} raw frames".format(DURATION, CAMERAS_COUNT, FRAME_SHAPE[1], FRAME_SHAPE[0]))
+
+    port = PORT
+    for form in FORMATS:
+        with TemporaryDirectory() as directory:
+            received, recorded, dropped, size = measure(form, port, directory)
+        print("    {:5}: received {:6.1f} frames/s, recorded {:6.1f} frames/s ({:6.1f} MB/s), dropped {:6.1f} "
+              "frames/s".format(form, received, recorded, size / 1e6, dropped))
+        port += CAMERAS_COUNT + 1
+
+    # Exit without waiting for the streams' threads (they keep reconnecting to the stopped simulators)
+    os._exit(0)
@@ -0,0 +1,70 @@
+"""
+Safeguard Benchmark
+*******************
+
+Description
+===========
+
+This module is used to compare the :class:`Safeguard` engine against the original, formula-based safeguarding of the
+transmission data.
+
+The original implementation is reproduced in :func:`reference`. The benchmark only measures the timings - the
+equivalence of both implementations is verified by the `tests.test_safeguard` module.
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.safeguard
+"""
+
+from communication.data_manager import DataManager
+from math import sqrt
+from timeit import timeit
+
+
+def reference(manager, data):
+    """
+    Function used to safeguard the data the way the data manager originally did.
+
+    :param manager: Data manager to read the safeguard constants from
+    :param data: Transmission data
+    :return: Safeguarded data
+    """
+
+    # Initialise the quadratic function and the scaling function
+    a, b, c = 0.00009537964, -0.2864872, 214.9513
+    amp = lambda x: a * (x ** 2) + b * x + c
+    scale = lambda v: ((-b + sqrt(b**2 - 4*a*(c - v))) / (2*a), (-b - sqrt(b**2 - 4*a*(c - v))) / (2*a))
+
+    # Calculate the current of each value
+    safeguard_data = {key: data[key] for key in manager._SAFEGUARD_KEYS if key in data}
+    amps = {key: amp(value) for key, value in safeguard_data.items()}
+    current = sum(amps.values())
+
+    # Scale the values if the limit was passed
+    if current > manager._AMP_LIMIT:
+        ratio = manager._AMP_LIMIT / current
+        for key in safeguard_data:
+            values = scale(amps[key]*ratio)
+            if safeguard_data[key] not in manager._IDLE_VALUES:
+                if abs(safeguard_data[key] - values[0]) <= abs(safeguard_data[key] - values[1]):
+                    safeguard_data[key] = values[0]
+                else:
+                    safeguard_data[key] = values[1]
+
+    return safeguard_data
+
+
+if __name__ == "__main__":
+
+    manager = DataManager()
+
+    # Measure both implementations on full thrust (over the limit) and on a light load (under the limit)
+    for name, value in (("full thrust", 1900), ("light load", 1600)):
+        data = {key: value for key in manager._SAFEGUARD_KEYS}
+        original = timeit(lambda: reference(manager, data), number=100000) * 10
+        engine = timeit(lambda: manager._safeguard_transmission_data(data), number=100000) * 10
+        print("{:12} original {:6.2f} us, engine {:6.2f} us ({:.1f}x)".format(name, original, engine,
+                                                                            original / engine))
@@ -0,0 +1,182 @@
+"""
+Send Rate Benchmark
+*******************
+
+Description
+===========
+
+This module is used to compare the original, fixed send rate of the :class:`Connection` (the data was sent at least
+every 10 ms) against the adaptive schedule (the changes are sent immediately and coalesced within a short window, and a
+keep-alive message is sent while nothing changes).
+
+A local server stands in for the Raspberry Pi - it replies to each control message with a telemetry message (in
+lockstep), and echoes the heartbeats. Each schedule is measured in both exchange modes, in the following scenarios:
+
+    1. Idle - nothing changes
+    2. Active - a single value changes at the controller's rate
+    3. Burst - several values change at the controller's rate, each one written separately, a millisecond apart (for
+       example by the controller and the GUI), the measured value last
+
+The benchmark reports the number of control messages received per second, and the latency between modifying the
+measured value and the server receiving it.
+
+.. note::
+
+    The connection runs in a thread (rather than a separate process), so that each run can be abandoned without
+    affecting the data manager's notifications of the other runs.
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.send_rate
+"""
+
+import communication.data_manager as dm
+import socket
+from communication.connection import Connection
+from communication.protocol import HEARTBEAT, Decoder, decode_data, encode, encode_data
+from threading import Thread
+from time import perf_counter, sleep
+
+# Declare the first port (each run uses the next one), and the duration of each run (seconds)
+PORT = 50400
+DURATION = 3
+
+# Declare the delay between the changes (the controller's update delay), the number of writes in a burst, and the delay
+# between them
+CHANGE_DELAY = 0.025
+BURST_SIZE = 3
+BURST_DELAY = 0.001
+
+# Declare the schedules - name, coalescing window and keep-alive delay (the fixed rate sends on each change too)
+SCHEDULES = (
+    ("fixed", 0, 0.01),
+    ("adaptive", None, None)
+)
+
+
+class Server:
+
+    def __init__(self, port):
+        """
+        Constructor function used to start the server's thread.
+
+        :param port: Port of the server
+        """
+
+        # Initialise the number of control messages, and the arrivals of the new values
+        self.messages, self.arrivals, self._value = 0, dict(), None
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(("localhost", port))
+        self._server.listen(1)
+
+        Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        """
+        Function used to reply to the control messages, and echo the heartbeats.
+        """
+
+        self._client, _ = self._server.accept()
+        decoder = Decoder()
+
+        while True:
+            try:
+                data = self._client.recv(4096)
+            except OSError:
+                break
+            if not data:
+                break
+
+            for message_type, payload in decoder.feed(data):
+                if message_type == HEARTBEAT:
+                    reply = encode(HEARTBEAT, payload)
+
+                # Count the message, record a new value, and reply with the telemetry
+                else:
+                    self.messages += 1
+                    value = decode_data(message_type, payload)["Mot_G"]
+                    if value != self._value:
+                        self.arrivals.setdefault(value, perf_counter())
+                        self._value = value
+                    reply = encode_data({"depth": 10.5})
+
+                # Stop once closed
+                try:
+                    self._client.sendall(reply)
+                except OSError:
+                    return
+
+    def close(self):
+        """
+        Function used to close the connection and stop listening (the abandoned connection keeps reconnecting).
+        """
+
+        self._server.close()
+        self._client.close()
+
+
+def measure(port, scenario, duplex, window, keepalive):
+    """
+    Function used to run a scenario with the given schedule.
+
+    :param port: Port of the server
+    :param scenario: Name of the scenario
+    :param duplex: Whether the full-duplex exchange should be used
+    :param window: Coalescing window (seconds), the connection's default if None
+    :param keepalive: Keep-alive delay (seconds), the connection's default if None
+    :return: Tuple of the messages per second, and the median and the 99th percentile latencies (None if idle)
+    """
+
+    # Start the server, and the connection in a thread
+    server = Server(port)
+    connection = Connection(ip="localhost", port=port, protocol="json", duplex=duplex)
+    if window is not None:
+        connection._COALESCE_WINDOW, connection._KEEPALIVE_DELAY = window, keepalive
+    Thread(target=connection._connect, daemon=True).start()
+    sleep(0.5)
+
+    # Keep changing the values
+    modifications, start, count, value = dict(), perf_counter(), server.messages, 1501
+    while perf_counter() - start < DURATION:
+        if scenario != "idle":
+            value = value + 1 if value < 1899 else 1501
+            for key in ("Mot_R", "Mot_F", "Thr_AP", "Thr_AS")[:BURST_SIZE - 1] if scenario == "burst" else ():
+                dm.set_data(**{key: value})
+                sleep(BURST_DELAY)
+            modifications[value] = perf_counter()
+            dm.set_data(Mot_G=value)
+        sleep(CHANGE_DELAY)
+
+    rate = (server.messages - count) / (perf_counter() - start)
+    server.close()
+
+    # Match the modifications with their arrivals
+    latencies = sorted(server.arrivals[value] - modified for value, modified in modifications.items()
+                       if value in server.arrivals)
+    if not latencies:
+        return rate, None, None
+
+    return rate, latencies[len(latencies) // 2] * 1e3, latencies[int(len(latencies) * 0.99)] * 1e3
+
+
+if __name__ == "__main__":
+
+    dm.clear()
+    dm.set_data(Mot_G=1500, Mot_R=1500, Mot_F=1500, Thr_AP=1500, Thr_AS=1500)
+
+    port = PORT
+    for duplex in (False, True):
+        print("{}, {} s per run, a change every {:.0f} ms".format(
+            "full-duplex" if duplex else "lockstep", DURATION, CHANGE_DELAY * 1e3))
+
+        for scenario in ("idle", "active", "burst"):
+            for name, window, keepalive in SCHEDULES:
+                rate, median, tail = measure(port, scenario, duplex, window, keepalive)
+                port += 1
+                print("    {:6} {:8} {:6.1f} messages/s".format(scenario, name, rate) + (
+                    ", latency median {:5.2f} ms, 99% {:5.2f} ms".format(median, tail) if median is not None else ""))
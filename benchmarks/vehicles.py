@@ -0,0 +1,210 @@
+"""
+Vehicles Benchmark
+******************
+
+Description
+===========
+
+This module is used to compare the cost of controlling 1 to 8 vehicles (each one simulated by a :class:`Simulator` with
+its own control port and cameras) with:
+
+    1. Separate components - a :class:`Connection` process and a :class:`VideoStream` thread for each camera of each
+       vehicle, each vehicle keeping its data in its own namespace of the data manager
+    2. A shared engine - a single :class:`VehicleManager`, running all vehicles on one event loop and one worker pool
+
+Each run keeps modifying a setpoint of every vehicle, and reports:
+
+    1. CPU time used by the surface station (all of its processes), as a percentage of the run's duration
+    2. Number of the station's processes and threads
+    3. Latency between modifying a setpoint and the vehicle receiving it
+    4. Number of frames received per second, by all cameras of all vehicles
+
+.. note::
+
+    Each run is started in a new process (and the simulators run in the benchmark's process), so that its CPU time and
+    threads can be counted separately - they're read from `/proc`, so the benchmark only runs on Linux.
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.vehicles
+"""
+
+import communication.data_manager as dm
+import os
+from communication.connection import Connection
+from communication.vehicles import VehicleManager
+from communication.video_stream import VideoStream
+from multiprocessing import get_context
+from simulator.pi import Simulator
+from time import monotonic, sleep
+
+# Declare the first port (each vehicle uses the next `PORTS_PER_VEHICLE` ports), and the numbers of vehicles
+PORT = 50700
+PORTS_PER_VEHICLE = 20
+VEHICLES = (1, 2, 4, 8)
+
+# Declare the cameras of each vehicle, the shape of their frames and their frame rate
+CAMERAS = 2
+FRAME_SHAPE = (240, 320, 3)
+FRAME_RATE = 30
+
+# Declare the time given to connect, the duration of each run, and the delay between the modifications (seconds)
+WARMUP = 2
+DURATION = 5
+MODIFICATION_DELAY = 0.05
+
+# Declare the connection's options used by both models
+OPTIONS = {"protocol": "binary", "duplex": True}
+
+
+def _process_statistics(pid) -> tuple:
+    """
+    Function used to read the CPU time and the number of threads of a process.
+
+    :param pid: Identifier of the process
+    :return: Tuple of the CPU time (seconds) and the number of threads
+    """
+
+    with open("/proc/{}/stat".format(pid)) as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK"), int(fields[17])
+
+
+def _station_statistics() -> tuple:
+    """
+    Function used to read the CPU time and the number of threads of the current process and its children.
+
+    :return: Tuple of the CPU time (seconds), the number of processes and the number of threads
+    """
+
+    # Find the children of the current process
+    pids = [os.getpid()]
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open("/proc/{}/stat".format(pid)) as file:
+                if int(file.read().rsplit(")", 1)[1].split()[1]) == os.getpid():
+                    pids.append(int(pid))
+        except OSError:
+            continue
+
+    # Sum the statistics of all processes
+    statistics = [_process_statistics(pid) for pid in pids]
+
+    return sum(cpu for cpu, _ in statistics), len(pids), sum(threads for _, threads in statistics)
+
+
+def run_station(model, count, results):
+    """
+    Function used to run the surface station controlling the given number of vehicles, and report the measurements.
+
+    :param model: Either "separate" or "shared"
+    :param count: Number of the vehicles
+    :param results: Queue to put the measurements in
+    """
+
+    dm.clear()
+    names = ["rov{}".format(index) for index in range(count)]
+    for name in names:
+        dm.set_many({"Mot_G": 1500}, namespace=name)
+
+    # Start a connection process and the stream threads for each vehicle
+    if model == "separate":
+        connections, streams = list(), list()
+        for index, name in enumerate(names):
+            port = PORT + index * PORTS_PER_VEHICLE
+            connections.append(Connection(ip="localhost", port=port, namespace=name, **OPTIONS))
+            streams.extend(VideoStream(ip="localhost", port=p) for p in range(port + 10, port + 10 + CAMERAS))
+        for component in connections:
+            component.connect()
+        for stream in streams:
+            stream.stream()
+
+    # Start all vehicles on the shared engine
+    else:
+        manager = VehicleManager()
+        for index, name in enumerate(names):
+            manager.add(name, port=PORT + index * PORTS_PER_VEHICLE, cameras=CAMERAS, **OPTIONS)
+        manager.start()
+
+    sleep(WARMUP)
+    cpu = _station_statistics()[0]
+
+    # Keep modifying the setpoint of each vehicle
+    modifications, start, value = dict(), monotonic(), 1501
+    while monotonic() - start < DURATION:
+        value = value + 1 if value < 1899 else 1501
+        for name in names:
+            modifications[name, value] = monotonic()
+            dm.set_many({"Mot_G": value}, namespace=name)
+        sleep(MODIFICATION_DELAY)
+
+    # Measure the CPU time used during the run
+    duration = monotonic() - start
+    total, processes, threads = _station_statistics()
+    results.put((modifications, (total - cpu) / duration, processes, threads))
+
+    # Stop the connection processes, and exit without waiting for the streams' threads
+    if model == "separate":
+        for connection in connections:
+            connection._connection_process.terminate()
+    os._exit(0)
+
+
+def measure(model, count) -> tuple:
+    """
+    Function used to run the station against the given number of simulated vehicles.
+
+    :param model: Either "separate" or "shared"
+    :param count: Number of the vehicles
+    :return: Tuple of the CPU usage, the numbers of processes and threads, the median and the 99th percentile latencies,
+        and the frames received per second
+    """
+
+    # Start the simulators, recording the first arrival of each setpoint
+    arrivals, simulators = dict(), list()
+    for index in range(count):
+        port = PORT + index * PORTS_PER_VEHICLE
+        simulators.append(Simulator(
+            port=port, camera_port=port + 10, cameras=CAMERAS, frame_shape=FRAME_SHAPE, frame_rate=FRAME_RATE,
+            telemetry={"depth": 10.5},
+            on_setpoints=lambda setpoints, name="rov{}".format(index):
+                arrivals.setdefault((name, setpoints.get("Mot_G")), monotonic())))
+    for simulator in simulators:
+        simulator.start()
+
+    # Run the station in a new process, counting the frames sent during the run only
+    context = get_context("spawn")
+    results = context.Queue()
+    station = context.Process(target=run_station, args=(model, count, results))
+    station.start()
+    sleep(WARMUP)
+    frames, start = sum(sum(simulator.frames) for simulator in simulators), monotonic()
+    modifications, cpu, processes, threads = results.get()
+    frames = (sum(sum(simulator.frames) for simulator in simulators) - frames) / (monotonic() - start)
+    station.join()
+
+    for simulator in simulators:
+        simulator.stop()
+
+    # Match the modifications with their arrivals
+    latencies = sorted(arrivals[key] - modified for key, modified in modifications.items() if key in arrivals)
+
+    return (cpu, processes, threads, latencies[len(latencies) // 2] * 1e3, latencies[int(len(latencies) * 0.99)] * 1e3,
+            frames)
+
+
+if __name__ == "__main__":
+
+    print("{} s per run, {} cameras of {}x{} at {} fps per vehicle, a modification every {:.0f} ms".format(
+        DURATION, CAMERAS, FRAME_SHAPE[1], FRAME_SHAPE[0], FRAME_RATE, MODIFICATION_DELAY * 1e3))
+
+    for count in VEHICLES:
+        for model in ("separate", "shared"):
+            cpu, processes, threads, median, tail, frames = measure(model, count)
+            print("    {} vehicles, {:8}: CPU {:5.1%}, {} processes, {:3} threads, latency median {:5.2f} ms, "
+                  "99% {:6.2f} ms, {:5.1f} frames/s".format(count, model, cpu, processes, threads, median, tail,
+                                                            frames))
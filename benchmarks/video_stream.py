@@ -0,0 +1,163 @@
+"""
+Video Stream Benchmark
+**********************
+
+Description
+===========
+
+This module is used to compare the original receive path of the :class:`VideoStream` (concatenating each received chunk
+to the partial frame, and checking its end for the terminator) against the reusable buffer filled with `recv_into`.
+
+A local socket pair stands in for the Raspberry Pi - a thread keeps sending the pickled 640x480 frames, waiting for the
+acknowledgement after each one, while the benchmark reassembles them (the frames aren't decoded, so that only the
+receive path is measured). Each run reports:
+
+    1. Throughput of the reassembly (MB/s)
+    2. Number of the `recv` calls per frame
+    3. Number of the buffers allocated by the receive path per frame - each received chunk and each concatenation in the
+       original path, and each growth of the buffer and the frame's copy in the reusable buffer path
+    4. Number of the bytes copied by the receive path per frame
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.video_stream
+"""
+
+import numpy as np
+import socket
+from communication.video_stream import VideoStream
+from dill import dumps
+from threading import Thread
+from time import perf_counter
+
+# Declare the number of frames received in each run, and the frame's shape
+FRAMES = 200
+FRAME_SHAPE = (480, 640, 3)
+
+# Declare the frame's terminator and the acknowledgement
+FRAME_END = bytes("Frame was successfully sent", encoding="ASCII")
+FRAME_ACK = bytes("ACK", encoding="ASCII")
+
+
+def _serve(client, payload):
+    """
+    Function used to keep sending the frame, waiting for the acknowledgement after each one.
+
+    :param client: Socket of the sending side
+    :param payload: Pickled frame followed by the terminator
+    """
+
+    for _ in range(FRAMES):
+        client.sendall(payload)
+        if not client.recv(len(FRAME_ACK)):
+            break
+    client.close()
+
+
+def original_receive(receiver, end_payload, buffer_size) -> tuple:
+    """
+    Function used to receive the frames the way the video stream originally did.
+
+    :param receiver: Socket of the receiving side
+    :param end_payload: Frame's terminator
+    :param buffer_size: Maximum number of bytes received at once
+    :return: Tuple of the numbers of the `recv` calls, the allocated buffers and the copied bytes
+    """
+
+    calls, allocations, copied, frames, partial = 0, 0, 0, 0, b''
+
+    while frames < FRAMES:
+
+        # Receive a chunk (a new bytes object), and concatenate it (another one, copying the whole partial frame)
+        partial += receiver.recv(buffer_size)
+        calls += 1
+        allocations += 2
+        copied += len(partial)
+
+        # Slice the frame off the terminator once it was fully received
+        if partial[-len(end_payload):] == end_payload:
+            payload, partial = partial[:-len(end_payload)], b''
+            allocations += 1
+            copied += len(payload)
+            frames += 1
+            receiver.sendall(FRAME_ACK)
+
+    return calls, allocations, copied
+
+
+def buffer_receive(receiver, stream) -> tuple:
+    """
+    Function used to receive the frames into the video stream's reusable buffer.
+
+    :param receiver: Socket of the receiving side
+    :param stream: :class:`VideoStream` to receive the frames with
+    :return: Tuple of the numbers of the `recv` calls, the allocated buffers and the copied bytes
+    """
+
+    stream._socket = receiver
+    calls, allocations, copied, frames, size = 0, 0, 0, 0, len(stream._buffer)
+
+    while frames < FRAMES:
+
+        # Receive a chunk straight into the buffer (copied once, by the kernel)
+        count = stream._receive()
+        calls += 1
+        copied += count
+
+        # Count the growths of the buffer
+        if len(stream._buffer) != size:
+            allocations += 1
+            copied += size
+            size = len(stream._buffer)
+
+        # Copy the frame out of the buffer once it was fully received
+        payload = stream._take_frame()
+        if payload is not None:
+            allocations += 1
+            copied += len(payload)
+            frames += 1
+            receiver.sendall(FRAME_ACK)
+
+    return calls, allocations, copied
+
+
+def measure(use_buffer, payload) -> tuple:
+    """
+    Function used to receive the frames with the selected path, and summarise the measurements.
+
+    :param use_buffer: Whether the reusable buffer should be used
+    :param payload: Pickled frame followed by the terminator
+    :return: Tuple of the throughput (MB/s), and the numbers of the `recv` calls, the allocations and the copied bytes
+        per frame
+    """
+
+    sender, receiver = socket.socketpair()
+    stream = VideoStream()
+    thread = Thread(target=_serve, args=(sender, payload))
+
+    start = perf_counter()
+    thread.start()
+    if use_buffer:
+        calls, allocations, copied = buffer_receive(receiver, stream)
+    else:
+        calls, allocations, copied = original_receive(receiver, stream._end_payload, stream._BUFFER_SIZE)
+    duration = perf_counter() - start
+
+    thread.join()
+    receiver.close()
+
+    return len(payload) * FRAMES / duration / 1e6, calls / FRAMES, allocations / FRAMES, copied / FRAMES
+
+
+if __name__ == "__main__":
+
+    frame = dumps(np.random.randint(0, 255, FRAME_SHAPE, dtype=np.uint8)) + FRAME_END
+    print("{} frames of {} bytes".format(FRAMES, len(frame)))
+
+    for name, use_buffer in (("original", False), ("buffer", True)):
+        throughput, calls, allocations, copied = measure(use_buffer, frame)
+        print("    {:8}: {:7.1f} MB/s, {:5.1f} recv calls, {:5.1f} allocations and {:8.2f} MB copied per frame".format(
+            name, throughput, calls, allocations, copied / 1e6))
@@ -0,0 +1,82 @@
+"""
+Window Benchmark
+****************
+
+Description
+===========
+
+This module is used to compare the stop-and-wait acknowledgements of the :class:`VideoStream` against the windowed
+acknowledgements, over a link with the latency injected by a :class:`Simulator`.
+
+A single camera sends the raw frames as fast as the acknowledgements allow. Each run reports:
+
+    1. Number of the frames received per second
+    2. Size of the stream's receive buffer at the end of the run, which stays bounded by the window's frames
+
+Execution
+---------
+
+To run the benchmark, execute the following command from the project's root directory::
+
+    python -m benchmarks.window
+"""
+
+import os
+from communication.video_stream import VideoStream
+from simulator.pi import Simulator
+from time import monotonic, sleep
+
+# Declare the first port (each run uses its own ports), and the frame's shape
+PORT = 51500
+FRAME_SHAPE = (240, 320, 3)
+
+# Declare the injected latencies (seconds), and the windows compared
+LATENCIES = (0.01, 0.05)
+WINDOWS = (1, 2, 4, 8)
+
+# Declare the time given to connect, and the duration of each run (seconds)
+WARMUP = 1
+DURATION = 3
+
+
+def measure(latency, window, port) -> tuple:
+    """
+    Function used to receive the frames with the given window, over a link with the given latency.
+
+    :param latency: Delay of everything the simulator sends (seconds)
+    :param window: Maximum number of the unacknowledged frames
+    :param port: Control port of the run's simulator (the camera uses the next port)
+    :return: Tuple of the frames received per second, and the size of the receive buffer (bytes)
+    """
+
+    simulator = Simulator(port=port, camera_port=port + 1, cameras=1, frame_shape=FRAME_SHAPE, frame_rate=0,
+                          frame_encoding="raw", latency=latency)
+    simulator.start()
+
+    stream = VideoStream(port=port + 1, protocol="framed", window=window)
+    stream.stream()
+    sleep(WARMUP)
+
+    frames, start = simulator.frames[0], monotonic()
+    sleep(DURATION)
+    frames = (simulator.frames[0] - frames) / (monotonic() - start)
+
+    simulator.stop()
+
+    return frames, len(stream._buffer)
+
+
+if __name__ == "__main__":
+
+    print("{} s per run, {}x{} raw frames".format(DURATION, FRAME_SHAPE[1], FRAME_SHAPE[0]))
+
+    port = PORT
+    for latency in LATENCIES:
+        for window in WINDOWS:
+            frames, size = measure(latency, window, port)
+            print("    latency {:3.0f} ms, window {}: {:6.1f} frames/s, receive buffer {:5.2f} MB".format(
+                latency * 1e3, window, frames, size / 1e6))
+            port += 2
+
+    # Exit without waiting for the streams' threads (they keep reconnecting to the stopped simulators)
+    os._exit(0)
@@ -0,0 +1,271 @@
+"""
+Cache
+*****
+
+Description
+===========
+
+This module is used to provide the storage backends of the data manager.
+
+Functionality
+=============
+
+Cache
+-----
+
+The :class:`Cache` class describes the interface each backend must provide - a versioned, transactional key-value
+storage. The version must increase on every modification (including clearing), and must be cheap to read, as it's used
+to validate the data manager's cached results.
+
+MemoryCache
+-----------
+
+The :class:`MemoryCache` class keeps the data in a dictionary. It's the fastest backend, but the data is only visible
+within a single process - forked processes receive a copy, which is no longer synchronised.
+
+DiscCache
+---------
+
+The :class:`DiscCache` class extends the :class:`FanoutCache` with the transactional operations, and keeps the data on
+disc, so it's visible across any processes.
+
+The shared memory backend is provided by the :class:`SharedMemoryCache` class, in its own module.
+
+Execution
+---------
+
+The backends are created by the :class:`DataManager`, and shouldn't be used directly.
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`Cache` class:
+
+    1. :func:`version` is a getter for the version of the data
+    2. :func:`snapshot` reads all values in a single transaction
+    3. :func:`update` writes several values in a single transaction
+    4. :func:`clear` removes all values
+    5. :func:`close` releases the resources
+    6. :func:`__getitem__`, :func:`__setitem__`, :func:`__contains__` and :func:`__iter__` provide the dictionary-like
+       access, built on top of the functions above
+
+Modifications
+=============
+
+To add a new backend, you should extend the :class:`Cache` class and implement the functions 1-4 (and 5, if needed).
+"""
+
+from diskcache import FanoutCache
+from threading import Lock
+
+# Declare the separator between a namespace and a key (the keys of a namespace are stored with the namespace's prefix)
+NAMESPACE_SEPARATOR = "/"
+
+
+class Cache:
+
+    @property
+    def version(self) -> int:
+        """
+        Getter for the version of the data, increased on every modification.
+
+        :return: Current version
+        """
+
+        raise NotImplementedError
+
+    def snapshot(self) -> tuple:
+        """
+        Function used to read all values in a single transaction.
+
+        :return: Tuple of the version and the dictionary of all present values
+        """
+
+        raise NotImplementedError
+
+    def update(self, data: dict) -> int:
+        """
+        Function used to write several values in a single transaction.
+
+        :param data: Dictionary of values to write
+        :return: Version of the data after the write
+        """
+
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Function used to remove all values, while still increasing the version.
+        """
+
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Function used to release the resources.
+        """
+
+        pass
+
+    def __getitem__(self, key):
+        """
+        Function used to read a single value.
+
+        :param key: Key to read
+        :return: Stored value
+        """
+
+        return self.snapshot()[1][key]
+
+    def __setitem__(self, key, value):
+        """
+        Function used to write a single value.
+
+        :param key: Key to modify
+        :param value: New value
+        """
+
+        self.update({key: value})
+
+    def __contains__(self, key):
+        """
+        Function used to check if a value is stored under the key.
+
+        :param key: Key to check
+        :return: True if the value is present, False otherwise
+        """
+
+        return key in self.snapshot()[1]
+
+    def __iter__(self):
+        """
+        Function used to iterate over the stored keys.
+
+        :return: Iterator over a copy of the keys
+        """
+
+        return iter(list(self.snapshot()[1]))
+
+
+class MemoryCache(Cache):
+
+    def __init__(self):
+        """
+        Constructor function used to initialise the dictionary storage.
+        """
+
+        # Initialise the data, its version and the lock synchronising the threads
+        self._data = dict()
+        self._version = 0
+        self._lock = Lock()
+
+    @property
+    def version(self):
+        """
+        Getter for the version of the data, increased on every modification.
+
+        :return: Current version
+        """
+
+        return self._version
+
+    def snapshot(self) -> tuple:
+        """
+        Function used to read all values in a single transaction.
+
+        :return: Tuple of the version and the dictionary of all present values
+        """
+
+        with self._lock:
+            return self._version, dict(self._data)
+
+    def update(self, data: dict) -> int:
+        """
+        Function used to write several values in a single transaction.
+
+        :param data: Dictionary of values to write
+        :return: Version of the data after the write
+        """
+
+        with self._lock:
+            self._data.update(data)
+            self._version += 1
+            return self._version
+
+    def clear(self):
+        """
+        Function used to remove all values, while still increasing the version.
+        """
+
+        with self._lock:
+            self._data.clear()
+            self._version += 1
+
+
+class DiscCache(FanoutCache, Cache):
+
+    # Key used to store the version of the data
+    _VERSION_KEY = "__version__"
+
+    @property
+    def version(self):
+        """
+        Getter for the version of the data, increased on every modification.
+
+        :return: Current version
+        """
+
+        return self.get(self._VERSION_KEY, 0)
+
+    def __iter__(self):
+        """
+        Function used to iterate over the stored keys, excluding the version.
+
+        :return: Iterator over the keys
+        """
+
+        return (key for key in super().__iter__() if key != self._VERSION_KEY)
+
+    def snapshot(self) -> tuple:
+        """
+        Function used to read all values in a single transaction.
+
+        :return: Tuple of the version and the dictionary of all present values
+        """
+
+        with self.transact():
+            data = {key: self[key] for key in super().__iter__()}
+
+        return data.pop(self._VERSION_KEY, 0), data
+
+    def update(self, data: dict) -> int:
+        """
+        Function used to write several values in a single transaction.
+
+        :param data: Dictionary of values to write
+        :return: Version of the data after the write
+        """
+
+        with self.transact():
+            for key, value in data.items():
+                self[key] = value
+            return self.incr(self._VERSION_KEY)
+
+    def clear(self, retry=False):
+        """
+        Function used to remove all values, while still increasing the version.
+
+        :param retry: Boolean passed to :func:`FanoutCache.clear`
+        :return: Number of removed entries
+        """
+
+        with self.transact():
+            version = self.version
+            count = super().clear(retry=retry)
+            self[self._VERSION_KEY] = version + 1
+
+        return count
@@ -14,16 +14,88 @@ Functionality
 Connection
 ----------
 
-The :class:`Connection` class provides a TCP-based data exchange with the Raspberry Pi.
+The :class:`Connection` class provides a TCP-based data exchange with the Raspberry Pi. The messages are framed with a
+length header and a message type (see the :mod:`communication.protocol` module), so that they are decoded correctly no
+matter how the stream is split by TCP. The following protocols are supported:
+
+    1. `json` - framed JSON messages
+    2. `binary` - framed, struct-packed messages, much smaller and cheaper to encode
+    3. `legacy` - unframed JSON messages, for the Raspberry Pi builds which don't support the framing (default)
+
+The protocol isn't negotiated, so the legacy protocol stays the default - select a framed protocol only if the Raspberry
+Pi's build supports it.
+
+With either framed protocol, the connection can send the deltas instead of the full messages (see the
+:class:`DeltaEncoder` class) - each reply received from the Raspberry Pi acknowledges the last message sent, and a
+keyframe is sent after each reconnection.
+
+The connection runs in a separate process by default. If an :class:`Engine` is given, it runs as a coroutine on the
+engine's event loop instead (within the current process). The connection process adopts the data manager's objects
+shared once the connection is created (see :func:`share`), so that it observes the modifications even when spawned.
+
+Each connection exchanges the data of a single namespace of the data manager - the global keys by default, or the keys
+prefixed with the given namespace (for example the data of one of several vehicles, see the
+:mod:`communication.vehicles` module).
+
+The transmission data is sent on the data manager's changes, rather than at a fixed rate:
+
+    1. Once the transmission data changes, it's sent immediately - unless it was sent less than `self._COALESCE_WINDOW`
+       ago, in which case it's sent once the window passes, together with any other changes made within the window (so
+       a burst of changes is sent as a single message)
+    2. While nothing changes, the data is sent again every `self._KEEPALIVE_DELAY`, to keep the link (and, in
+       lockstep, the telemetry replies) alive
+
+By default, the connection exchanges the data in lockstep - it sends the transmission data and waits for the reply. With
+either framed protocol, the connection can also run in the full-duplex mode, where sending and receiving are decoupled:
+
+    1. The sender sends the transmission data as scheduled above, regardless of the replies. The changes are queued in
+       a :class:`DroppingQueue` of `self._SEND_QUEUE_SIZE` setpoints - if the link can't keep up, the oldest setpoints
+       are discarded, as they're superseded by the newer ones. With the delta encoding, each message is acknowledged
+       once it's sent (TCP delivers it, or the connection is reset, which forces a keyframe)
+    2. The receiver decodes the messages as soon as they arrive, and queues them in a bounded queue of
+       `self._RECEIVE_QUEUE_SIZE` messages, stored in the data manager by the connection's main thread. The received
+       messages are never discarded - if the queue is full, the receiver stops reading the socket, which in turn stops
+       the Raspberry Pi's sending (backpressure)
+
+On the engine, the sender takes the snapshot right before sending (so the stale setpoints are never queued), and the
+stream's buffer bounds the received data.
+
+With the `udp` transport, the full-duplex sender sends the setpoints as sequence-numbered UDP datagrams (see the
+:mod:`communication.datagram` module) to the same port number, so that a lost packet doesn't delay the later setpoints.
+The Raspberry Pi discards the datagrams older than the newest one it received, and the keep-alive messages cover the
+lost ones. The TCP connection stays open as a reliable side channel - the configuration and the telemetry are still
+exchanged over it, and losing it restarts the exchange (and the datagrams' session).
+
+Link statistics
+---------------
+
+The health of the link is measured by a :class:`LinkStatistics` object, which can be queried from any process with
+:func:`statistics`:
+
+    1. In lockstep, the round-trip time of each exchange (from sending the data to receiving the reply) is recorded
+    2. In the full-duplex mode, a timestamped heartbeat is sent over the TCP connection every
+       `self._HEARTBEAT_INTERVAL`, and the Raspberry Pi echoes it back unchanged - the round-trip time is recorded once
+       the echo is received
+
+If nothing is received from the Raspberry Pi within `self._LINK_DEADLINE` (a reply in lockstep, any message in the
+full-duplex mode), the link is considered dead, and the connection is re-established.
 
 Execution
 ---------
 
 To start the communication, you should create an instance of :class:`Connection` and call :func:`connect`, for example::
 
-    connection = Connection(port=50000)
+    connection = Connection(port=50000, protocol="binary", delta=True, duplex=True)
     connection.connect()
 
+To send the setpoints over UDP instead (the full-duplex exchange is implied)::
+
+    connection = Connection(port=50000, protocol="binary", transport="udp")
+
+To query the link's statistics (from any process)::
+
+    connection.statistics()  # returns {"alive": True, "rtt_p50": 0.0004, "rtt_p95": 0.0007, ...}
+
 Functions & classes
 -------------------
 
@@ -36,14 +108,39 @@ The following list shortly summarises the functionality of each code component w
     1. :class:`DataError` is a support class to handle custom exceptions
     2. :func:`__init__` builds the connection
     7. :func:`_handle_data` receives and sends the data to the Raspberry Pi
-    8. :func:`_connect` runs an infinite loop to keep exchanging the data with the Pi
-    9. :func:`run` starts the connection process
+    8. :func:`_handle_data_async` receives and sends the data to the Raspberry Pi, as a coroutine
+    9. :func:`_exchange_duplex` runs the full-duplex exchange until the connection is lost
+    10. :func:`_exchange_duplex_async` runs the full-duplex exchange until the connection is lost, as a coroutine
+    11. :func:`_send` runs an infinite loop to keep sending the queued data
+    12. :func:`_receive` runs an infinite loop to keep receiving and queueing the messages
+    13. :func:`_transmit` sends the given data over the selected transport
+    14. :func:`_heartbeat_due` checks whether the next heartbeat should be sent
+    15. :func:`_keepalive_timeout` calculates the time left until the keep-alive message is due
+    16. :func:`_coalesce_delay` calculates the time left until the coalescing window passes
+    17. :func:`_wait_for_change` waits until the transmission data should be sent again
+    18. :func:`_wait_for_change_async` waits until the transmission data should be sent again, as a coroutine
+    19. :func:`_encode_heartbeat` encodes the next heartbeat
+    20. :func:`_encode_transmission` encodes the transmission data
+    21. :func:`_encode` encodes the given data
+    22. :func:`_handle_reply` handles the received data
+    23. :func:`_handle_messages` decodes the received framed messages
+    24. :func:`_store_message` decodes and stores a single message (or records the heartbeat's round trip)
+    25. :func:`_expire` informs that the link stopped responding
+    26. :func:`_close` closes the socket
+    27. :func:`_reset` resets the state of the exchange
+    28. :func:`_connect` runs an infinite loop to keep exchanging the data with the Pi
+    29. :func:`_connect_async` runs an infinite loop to keep exchanging the data with the Pi, as a coroutine
+    30. :func:`connect` starts the connection process
+    31. :func:`statistics` returns the link's statistics
+    32. :func:`link_statistics` is a getter for the :class:`LinkStatistics` object
 
 Modifications
 =============
 
 The only functions that could require modification is :func:`_handle_data`, as the module expands. You should also
-consider modifying the `self._RECONNECT_DELAY` and `self._COMMUNICATION_DELAY` values within :func:`__init__`.
+consider modifying the `self._RECONNECT_DELAY`, `self._COMMUNICATION_DELAY`, `self._COALESCE_WINDOW`,
+`self._KEEPALIVE_DELAY`, `self._SEND_QUEUE_SIZE`, `self._RECEIVE_QUEUE_SIZE`, `self._HEARTBEAT_INTERVAL` and
+`self._LINK_DEADLINE` values within :func:`__init__`.
 
 Authorship
 ==========
@@ -51,15 +148,33 @@ Authorship
 Kacper Florianski
 """
 
+import asyncio
 import socket
 import communication.data_manager as dm
-from json import loads, dumps, JSONDecodeError
-from time import sleep
+from communication.datagram import DatagramSender
+from communication.protocol import BINARY, HEARTBEAT, JSON, Decoder, DeltaEncoder, ProtocolError, decode_data, \
+    decode_heartbeat, encode_data, encode_heartbeat
+from communication.queues import DroppingQueue
+from communication.statistics import LinkStatistics
+from json import loads, dumps
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from time import monotonic, sleep
 from pathos import helpers
 
 # Fetch the Process class
 Process = helpers.mp.Process
 
+# Declare the message type used by each protocol (None for the unframed messages)
+PROTOCOLS = {
+    "json": JSON,
+    "binary": BINARY,
+    "legacy": None
+}
+
+# Declare the transports of the setpoints (the TCP connection is used by both)
+TRANSPORTS = ("tcp", "udp")
+
 
 class Connection:
 
@@ -67,25 +182,51 @@ class Connection:
     class DataError(Exception):
         pass
 
-    def __init__(self, *, ip="localhost", port=50000):
+    def __init__(self, *, ip="localhost", port=50000, protocol="legacy", delta=False, duplex=False, transport="tcp",
+                 engine=None, namespace=""):
         """
         Constructor function used to initialise the communication with Raspberry Pi.
 
         You should modify:
 
             1. `self._RECONNECT_DELAY` constant to specify the delay value (seconds) on connection loss.
-            2. `self._COMMUNICATION_DELAY` constant to specify the delay value (seconds) on communication.
+            2. `self._COMMUNICATION_DELAY` constant to specify the delay value (seconds) between the checks whether the
+               full-duplex exchange should stop.
+            3. `self._COALESCE_WINDOW` constant to specify the minimum delay value (seconds) between the messages sent
+               on the changes.
+            4. `self._KEEPALIVE_DELAY` constant to specify the delay value (seconds) between the messages sent while
+               nothing changes.
+            5. `self._SEND_QUEUE_SIZE` constant to specify how many setpoints can wait to be sent in the full-duplex
+               mode.
+            6. `self._RECEIVE_QUEUE_SIZE` constant to specify how many messages can wait to be stored in the full-duplex
+               mode.
+            7. `self._HEARTBEAT_INTERVAL` constant to specify the delay value (seconds) between the heartbeats in the
+               full-duplex mode.
+            8. `self._LINK_DEADLINE` constant to specify the maximum time (seconds) without receiving anything, after
+               which the link is considered dead.
 
         :param ip: Raspberry Pi's IP address
         :param port: Raspberry Pi's port
+        :param protocol: Name of the protocol, one of `PROTOCOLS`
+        :param delta: Whether only the changed values should be sent (not supported by the legacy protocol)
+        :param duplex: Whether sending and receiving should be decoupled (not supported by the legacy protocol)
+        :param transport: Transport of the setpoints, one of `TRANSPORTS` (`udp` implies the full-duplex exchange, and
+            isn't supported by the legacy protocol or the delta messages)
+        :param engine: :class:`Engine` to run the connection on, instead of a separate process
+        :param namespace: Namespace of the data manager's keys sent and received by the connection
         """
 
-        # Initialise the connection process
-        self._connection_process = Process(target=self._connect)
+        # Initialise the connection process, or remember the engine
+        self._connection_process = Process(target=self._connect) if engine is None else None
+        self._engine = engine
 
-        # Save the host and port information
+        # Remember the data manager's objects to share with the connection process (adopted once it's started)
+        self._shared = dm.share() if engine is None else None
+
+        # Save the host and port information, and the namespace of the exchanged data
         self._ip = ip
         self._port = port
+        self._namespace = namespace
 
         # Initialise the socket field
         self._socket = None
@@ -93,9 +234,55 @@ class Connection:
         # Initialise the delay constant to offload some computing power when reconnecting
         self._RECONNECT_DELAY = 1
 
-        # Initialise the communication delay
+        # Initialise the communication delay (maximum time to wait for the queues of the full-duplex exchange)
         self._COMMUNICATION_DELAY = 0.01
 
+        # Initialise the minimum delay between the changes sent, and the delay between the messages sent while idle
+        self._COALESCE_WINDOW = 0.005
+        self._KEEPALIVE_DELAY = 0.1
+
+        # Initialise the time the transmission data was last sent
+        self._sent_time = 0
+
+        # Initialise the sizes of the full-duplex queues (latest setpoint only, and the received messages)
+        self._SEND_QUEUE_SIZE = 1
+        self._RECEIVE_QUEUE_SIZE = 64
+
+        # Initialise the heartbeat delay, and the deadline of a link which stopped responding
+        self._HEARTBEAT_INTERVAL = 0.1
+        self._LINK_DEADLINE = 1
+
+        # Initialise the link statistics (shared with the connection process), and the last heartbeat sent
+        self._statistics = LinkStatistics(window=1000)
+        self._heartbeat = 0
+        self._heartbeat_time = 0
+
+        # Initialise the last transmitted data
+        self._transmitted = None
+
+        # Fetch the message type, and initialise the decoder of the framed messages
+        self._message_type = PROTOCOLS[protocol]
+        self._decoder = Decoder()
+
+        # Initialise the encoder of the changed values if needed
+        if delta and self._message_type is None:
+            raise ValueError("The legacy protocol doesn't support the delta messages")
+        self._delta = DeltaEncoder(self._message_type) if delta else None
+
+        # Remember the exchange mode
+        if duplex and self._message_type is None:
+            raise ValueError("The legacy protocol doesn't support the full-duplex exchange")
+        self._duplex = duplex
+
+        # Remember the transport, and initialise the datagrams' sender (created for each connection)
+        if transport not in TRANSPORTS:
+            raise ValueError("Unknown transport: {}".format(transport))
+        if transport == "udp" and (self._message_type is None or delta):
+            raise ValueError("The UDP transport doesn't support the legacy protocol or the delta messages")
+        self._udp = transport == "udp"
+        self._duplex |= self._udp
+        self._datagrams = None
+
     def _handle_data(self):
         """
         Function used to receive and send the processed data.
@@ -105,10 +292,11 @@ class Connection:
 
         # Once connected, keep receiving and sending the data, raise exception in case of errors
         try:
-            # Send current state of the data manager
-            self._socket.sendall(bytes(dumps(dm.get_data(transmit=True)), encoding="utf-8"))
+            # Send the transmission data
+            start = self._sent_time = monotonic()
+            self._socket.sendall(self._encode_transmission())
 
-            # Receive the data
+            # Receive the data (the socket times out once the link deadline passes)
             data = self._socket.recv(4096)
 
             # If 0-byte was received, raise exception
@@ -116,10 +304,376 @@ class Connection:
                 sleep(self._RECONNECT_DELAY)
                 raise self.DataError
 
+        except socket.timeout:
+            self._expire()
+            sleep(self._RECONNECT_DELAY)
+            raise self.DataError
+
         except (ConnectionResetError, ConnectionAbortedError):
             sleep(self._RECONNECT_DELAY)
             raise self.DataError
 
+        # Record the round trip of the exchange
+        self._statistics.record(monotonic() - start)
+
+        self._handle_reply(data)
+
+    async def _handle_data_async(self, reader, writer):
+        """
+        Function used to receive and send the processed data, without blocking the event loop.
+
+        Same as :func:`_handle_data`.
+
+        :param reader: :class:`asyncio.StreamReader` of the connection
+        :param writer: :class:`asyncio.StreamWriter` of the connection
+        """
+
+        # Once connected, keep receiving and sending the data, raise exception in case of errors
+        try:
+            # Send the transmission data
+            start = self._sent_time = monotonic()
+            writer.write(self._encode_transmission())
+            await writer.drain()
+
+            # Receive the data, until the link deadline passes
+            data = await asyncio.wait_for(reader.read(4096), self._LINK_DEADLINE)
+
+            # If 0-byte was received, raise exception
+            if not data:
+                await asyncio.sleep(self._RECONNECT_DELAY)
+                raise self.DataError
+
+        except asyncio.TimeoutError:
+            self._expire()
+            await asyncio.sleep(self._RECONNECT_DELAY)
+            raise self.DataError
+
+        except (ConnectionResetError, ConnectionAbortedError):
+            await asyncio.sleep(self._RECONNECT_DELAY)
+            raise self.DataError
+
+        # Record the round trip of the exchange
+        self._statistics.record(monotonic() - start)
+
+        self._handle_reply(data)
+
+    def _exchange_duplex(self):
+        """
+        Function used to run the full-duplex exchange, until the connection is lost.
+
+        The sending and the receiving threads are started, while the current thread stores the received messages.
+        """
+
+        # Initialise the queues, and the event set once either pipeline stops
+        outbox, inbox, stopped = DroppingQueue(self._SEND_QUEUE_SIZE), Queue(self._RECEIVE_QUEUE_SIZE), Event()
+
+        # Start a new session of the datagrams if needed
+        if self._udp:
+            self._datagrams = DatagramSender((self._ip, self._port), self._message_type)
+
+        # Queue the current transmission data, and each change of it
+        outbox.put(dm.get_data(transmit=True, namespace=self._namespace))
+        unsubscribe = dm.subscribe(lambda _, data: outbox.put(data), transmit=True, namespace=self._namespace)
+
+        # Start the pipelines
+        threads = [Thread(target=self._send, args=(outbox, stopped)),
+                   Thread(target=self._receive, args=(inbox, stopped))]
+        for thread in threads:
+            thread.start()
+
+        # Store the received messages until either pipeline stops, or the link stops responding
+        while not stopped.is_set():
+            try:
+                self._store_message(*inbox.get(timeout=self._COMMUNICATION_DELAY))
+            except Empty:
+                if self._statistics.expired(self._LINK_DEADLINE):
+                    self._expire()
+                    stopped.set()
+
+        # Stop the notifications, and unblock the receiver to let both pipelines finish
+        unsubscribe()
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        for thread in threads:
+            thread.join()
+
+        # End the session of the datagrams
+        if self._datagrams is not None:
+            self._datagrams.close()
+            self._datagrams = None
+
+        # Offload some computing power before reconnecting
+        sleep(self._RECONNECT_DELAY)
+
+    async def _exchange_duplex_async(self, reader, writer, changed):
+        """
+        Function used to run the full-duplex exchange as a coroutine, until the connection is lost.
+
+        Same as :func:`_exchange_duplex`, but the setpoints are taken right before they're sent (so the stale ones are
+        never queued), and the stream's buffer bounds the received data.
+
+        :param reader: :class:`asyncio.StreamReader` of the connection
+        :param writer: :class:`asyncio.StreamWriter` of the connection
+        :param changed: :class:`asyncio.Event` set whenever the transmission data changes
+        """
+
+        # Inner function to keep sending the transmission data
+        async def _send():
+            while True:
+                changed.clear()
+
+                # Send the heartbeat if due
+                if self._heartbeat_due():
+                    writer.write(self._encode_heartbeat())
+
+                # Send the datagram (never blocks), or write the message into the stream
+                self._sent_time = monotonic()
+                if self._datagrams is not None:
+                    _, self._transmitted = dm.snapshot(transmit=True, namespace=self._namespace)
+                    self._datagrams.send(self._transmitted)
+                else:
+                    writer.write(self._encode_transmission())
+                    if self._delta is not None:
+                        self._delta.acknowledge()
+                    await writer.drain()
+
+                # Send again once the transmission data changes, or the keep-alive is due
+                await self._wait_for_change_async(changed)
+
+        # Inner function to keep receiving and storing the messages, until the link stops responding
+        async def _receive():
+            while True:
+                try:
+                    data = await asyncio.wait_for(reader.read(4096), self._LINK_DEADLINE)
+                except asyncio.TimeoutError:
+                    self._expire()
+                    return
+                if not data:
+                    return
+                self._statistics.heard()
+                self._handle_messages(data)
+
+        # Start a new session of the datagrams if needed
+        if self._udp:
+            self._datagrams = DatagramSender((self._ip, self._port), self._message_type)
+
+        # Run both pipelines until either stops (the errors are ignored, as the connection is re-established anyway)
+        tasks = [asyncio.ensure_future(_send()), asyncio.ensure_future(_receive())]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # End the session of the datagrams
+        if self._datagrams is not None:
+            self._datagrams.close()
+            self._datagrams = None
+
+        # Offload some computing power before reconnecting
+        await asyncio.sleep(self._RECONNECT_DELAY)
+
+    def _send(self, outbox, stopped):
+        """
+        Function used to keep sending the queued transmission data, until stopped.
+
+        The queued changes are coalesced within `self._COALESCE_WINDOW`, and the last data is sent again if nothing was
+        queued within `self._KEEPALIVE_DELAY`.
+
+        :param outbox: :class:`DroppingQueue` of the transmission data
+        :param stopped: Event set once either pipeline stops
+        """
+
+        # Initialise the last sent data
+        data = None
+
+        while not stopped.is_set():
+
+            # Wait for the next data until the keep-alive is due, keep the last one if nothing was queued
+            try:
+                data = outbox.get(timeout=self._keepalive_timeout())
+            except Empty:
+                if data is None:
+                    continue
+
+            # Wait for the coalescing window to pass, and take the latest data queued meanwhile
+            if stopped.wait(self._coalesce_delay()):
+                break
+            while not outbox.empty():
+                data = outbox.get_nowait()
+
+            # Send the heartbeat if due, and the data, stop in case of errors
+            try:
+                if self._heartbeat_due():
+                    self._socket.sendall(self._encode_heartbeat())
+                self._sent_time = monotonic()
+                self._transmit(data)
+            except OSError:
+                stopped.set()
+
+    def _receive(self, inbox, stopped):
+        """
+        Function used to keep receiving and queueing the messages, until stopped.
+
+        :param inbox: Bounded :class:`Queue` of the (message type, payload) tuples
+        :param stopped: Event set once either pipeline stops
+        """
+
+        while not stopped.is_set():
+
+            # Receive the data, stop in case of errors or once the connection is closed
+            try:
+                data = self._socket.recv(4096)
+            except OSError:
+                data = b''
+            if not data:
+                stopped.set()
+                break
+            self._statistics.heard()
+
+            # Extract the completed messages, stop if the stream is malformed (as the message boundaries are lost)
+            try:
+                messages = self._decoder.feed(data)
+            except ProtocolError as error:
+                print("Received invalid data: {}".format(error))
+                stopped.set()
+                break
+
+            # Queue each message, waiting for a free space if needed (which stops reading the socket)
+            for message in messages:
+                while not stopped.is_set():
+                    try:
+                        inbox.put(message, timeout=self._COMMUNICATION_DELAY)
+                        break
+                    except Full:
+                        continue
+
+    def _transmit(self, data):
+        """
+        Function used to send the given transmission data in the full-duplex mode, as a datagram or over the TCP
+        connection (acknowledging the delta once sent).
+
+        :param data: Dictionary of the transmission data
+        """
+
+        if self._datagrams is not None:
+            self._datagrams.send(data)
+            return
+
+        self._socket.sendall(self._encode(data))
+        if self._delta is not None:
+            self._delta.acknowledge()
+
+    def _heartbeat_due(self) -> bool:
+        """
+        Function used to check whether the next heartbeat should be sent.
+
+        :return: True if `self._HEARTBEAT_INTERVAL` passed since the last heartbeat, False otherwise
+        """
+
+        return monotonic() - self._heartbeat_time >= self._HEARTBEAT_INTERVAL
+
+    def _keepalive_timeout(self) -> float:
+        """
+        Function used to calculate the time left until the keep-alive message is due.
+
+        :return: Time until `self._KEEPALIVE_DELAY` passes since the data was last sent (seconds)
+        """
+
+        return max(0, self._sent_time + self._KEEPALIVE_DELAY - monotonic())
+
+    def _coalesce_delay(self) -> float:
+        """
+        Function used to calculate the time left until the changes can be sent.
+
+        :return: Time until `self._COALESCE_WINDOW` passes since the data was last sent (seconds), 0 if passed already
+        """
+
+        return max(0, self._sent_time + self._COALESCE_WINDOW - monotonic())
+
+    def _wait_for_change(self):
+        """
+        Function used to wait until the transmission data changes (and the coalescing window passes), or the keep-alive
+        message is due.
+        """
+
+        if dm.wait_for_change(transmit=True, namespace=self._namespace, last=self._transmitted,
+                              timeout=self._keepalive_timeout()) is not None:
+            sleep(self._coalesce_delay())
+
+    async def _wait_for_change_async(self, changed):
+        """
+        Function used to wait until the transmission data changes (and the coalescing window passes), or the keep-alive
+        message is due, without blocking the event loop.
+
+        :param changed: :class:`asyncio.Event` set whenever the transmission data changes
+        """
+
+        try:
+            await asyncio.wait_for(changed.wait(), self._keepalive_timeout())
+        except asyncio.TimeoutError:
+            return
+
+        await asyncio.sleep(self._coalesce_delay())
+
+    def _encode_heartbeat(self) -> bytes:
+        """
+        Function used to encode the next heartbeat, timestamped with the current time.
+
+        :return: Bytes to send
+        """
+
+        self._heartbeat += 1
+        self._heartbeat_time = monotonic()
+        self._statistics.sent_heartbeat()
+
+        return encode_heartbeat(self._heartbeat, self._heartbeat_time)
+
+    def _encode_transmission(self) -> bytes:
+        """
+        Function used to encode the transmission data according to the protocol.
+
+        :return: Bytes to send
+        """
+
+        # Fetch a consistent snapshot of the data manager, and remember it to detect further changes
+        _, self._transmitted = dm.snapshot(transmit=True, namespace=self._namespace)
+
+        return self._encode(self._transmitted)
+
+    def _encode(self, data) -> bytes:
+        """
+        Function used to encode the given transmission data according to the protocol.
+
+        :param data: Dictionary of the transmission data
+        :return: Bytes to send
+        """
+
+        # Encode the data, framed unless the legacy protocol is used
+        if self._message_type is None:
+            return bytes(dumps(data), encoding="utf-8")
+        elif self._delta is not None:
+            return self._delta.encode(data)
+        else:
+            return encode_data(data, self._message_type)
+
+    def _handle_reply(self, data):
+        """
+        Function used to handle the data received in reply to the transmission data.
+
+        :param data: Received bytes
+        """
+
+        # Treat the reply as an acknowledgement of the sent values
+        if self._delta is not None:
+            self._delta.acknowledge()
+
+        # Handle the framed messages
+        if self._message_type is not None:
+            self._handle_messages(data)
+            return
+
         # Convert bytes to string, remove white spaces, ignore invalid data
         try:
             data = data.decode("utf-8").strip()
@@ -129,20 +683,93 @@ class Connection:
         # Handle valid data
         if data:
 
-            # Attempt to decode from JSON, inform about invalid data received
+            # Attempt to decode from JSON and store it in a single transaction, inform about invalid data received
+            # (malformed JSON, a value other than an object, or values rejected by the schema)
             try:
-                dm.set_data(**loads(data))
-            except JSONDecodeError:
-                print("Received invalid data: {}".format(data))
+                values = loads(data)
+                if not isinstance(values, dict):
+                    raise ValueError("expected an object, received {}".format(type(values).__name__))
+                dm.set_many(values, namespace=self._namespace)
+            except ValueError as error:
+                print("Received invalid data: {} ({})".format(data, error))
+
+    def _handle_messages(self, data):
+        """
+        Function used to decode the received framed messages, and store the data of each one.
+
+        :param data: Received bytes, which may contain any number of (partial) messages
+        """
+
+        # Extract the completed messages, reconnect if the stream is malformed (as the message boundaries are lost)
+        try:
+            messages = self._decoder.feed(data)
+        except ProtocolError as error:
+            print("Received invalid data: {}".format(error))
+            raise self.DataError
+
+        for message_type, payload in messages:
+            self._store_message(message_type, payload)
+
+    def _store_message(self, message_type, payload):
+        """
+        Function used to decode a single message, and store its data.
+
+        :param message_type: Type of the message
+        :param payload: Received payload
+        """
+
+        # Decode the message and store it in a single transaction (or record the heartbeat's round trip), inform about
+        # invalid data received
+        try:
+            if message_type == HEARTBEAT:
+                self._statistics.record(monotonic() - decode_heartbeat(payload)[1])
+            else:
+                dm.set_many(decode_data(message_type, payload), namespace=self._namespace)
+        except (ProtocolError, UnicodeDecodeError, ValueError) as error:
+            print("Received invalid data: {}".format(error))
+
+    def _expire(self):
+        """
+        Function used to inform that the link stopped responding (the connection is re-established afterwards).
+        """
+
+        print("Connection to {}:{} stopped responding for {} seconds".format(self._ip, self._port, self._LINK_DEADLINE))
+
+    def _close(self):
+        """
+        Function used to close the socket and reset the state of the exchange.
+        """
+
+        # Cleanup
+        self._socket.close()
+        self._socket = None
+        self._reset()
+
+    def _reset(self):
+        """
+        Function used to reset the state of the exchange once the connection is closed.
+        """
+
+        # Count the lost link, discard the partially received message and the acknowledged values
+        self._statistics.lost()
+        self._decoder.reset()
+        if self._delta is not None:
+            self._delta.reset()
+
+        # Inform that the connection is closed
+        print("Connection to {}:{} closed successfully".format(self._ip, self._port))
 
     def _connect(self):
         """
         Function used to run a continuous connection with Raspberry Pi.
 
         Runs an infinite loop that performs re-connection to the given address as well as exchanges data with it, via
-        blocking send and receive functions. The data exchanged is JSON-encoded.
+        blocking send and receive functions. The data exchanged is encoded according to the protocol.
         """
 
+        # Use the data manager's objects shared by the parent process (a spawned process creates its own on import)
+        dm.adopt(self._shared)
+
         # Never stop the connection once it was started
         while True:
 
@@ -156,12 +783,18 @@ class Connection:
                     # Set the socket for IPv4 addresses (hence AF_INET) and TCP (hence SOCK_STREAM)
                     self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
-                # Connect to the server
+                # Connect to the server, the replies in lockstep should arrive within the link deadline
                 self._socket.connect((self._ip, self._port))
+                self._socket.settimeout(None if self._duplex else self._LINK_DEADLINE)
+                self._statistics.connected()
                 print("Connected to {}:{}, starting data exchange".format(self._ip, self._port))
 
-                # Keep exchanging data
-                while True:
+                # Keep exchanging data in the full-duplex mode, until the connection is lost
+                if self._duplex:
+                    self._exchange_duplex()
+
+                # Keep exchanging data in lockstep
+                while not self._duplex:
 
                     # Attempt to handle the data, break in case of errors
                     try:
@@ -169,24 +802,94 @@ class Connection:
                     except self.DataError:
                         break
 
-                    # Delay the communication
-                    sleep(self._COMMUNICATION_DELAY)
-
-                # Cleanup
-                self._socket.close()
-                self._socket = None
+                    # Delay the communication until the transmission data changes, or the keep-alive is due
+                    self._wait_for_change()
 
-                # Inform that the connection is closed
-                print("Connection to {}:{} closed successfully".format(self._ip, self._port))
+                self._close()
 
             except (ConnectionRefusedError, OSError):
                 sleep(self._RECONNECT_DELAY)
                 continue
 
+    async def _connect_async(self):
+        """
+        Function used to run a continuous connection with Raspberry Pi as a coroutine.
+
+        Same as :func:`_connect`, but the socket operations and the delays never block the event loop. The connection
+        is handled by the asyncio streams, and the changes of the transmission data are delivered by the engine's
+        watcher.
+        """
+
+        # Initialise the event set whenever the transmission data changes
+        changed = asyncio.Event()
+        self._engine.subscribe(lambda *_: changed.set(), transmit=True, namespace=self._namespace)
+
+        # Never stop the connection once it was started
+        while True:
+
+            try:
+                # Inform that client is attempting to connect to the server
+                print("Connecting to {}:{}...".format(self._ip, self._port))
+
+                # Connect to the server
+                reader, writer = await asyncio.open_connection(self._ip, self._port)
+                self._statistics.connected()
+                print("Connected to {}:{}, starting data exchange".format(self._ip, self._port))
+
+                # Keep exchanging data in the full-duplex mode, until the connection is lost
+                if self._duplex:
+                    await self._exchange_duplex_async(reader, writer, changed)
+
+                # Keep exchanging data in lockstep
+                while not self._duplex:
+
+                    # Attempt to handle the data, break in case of errors
+                    try:
+                        changed.clear()
+                        await self._handle_data_async(reader, writer)
+                    except self.DataError:
+                        break
+
+                    # Delay the communication until the transmission data changes, or the keep-alive is due
+                    await self._wait_for_change_async(changed)
+
+                # Cleanup
+                writer.close()
+                self._reset()
+
+            except (ConnectionRefusedError, OSError):
+                await asyncio.sleep(self._RECONNECT_DELAY)
+                continue
+
     def connect(self):
         """
-        Function used to start the connection process.
+        Function used to start the connection process, or the connection's coroutine if an engine was given.
         """
 
+        # Run the coroutine on the engine
+        if self._engine is not None:
+            self._engine.submit(self._connect_async())
+
         # Start the process (to not block the main execution)
-        self._connection_process.start()
+        else:
+            self._connection_process.start()
+
+    def statistics(self) -> dict:
+        """
+        Function used to return the link's statistics (can be called from any process).
+
+        :return: Dictionary of the round-trip times' percentiles (seconds), whether the link is alive, the time since
+            the Pi was last heard from, and the numbers of round trips recorded, heartbeats sent and links lost
+        """
+
+        return self._statistics.summary(self._LINK_DEADLINE)
+
+    @property
+    def link_statistics(self) -> LinkStatistics:
+        """
+        Getter for the link statistics, to query the percentiles or the histogram of the round-trip times directly.
+
+        :return: :class:`LinkStatistics` object
+        """
+
+        return self._statistics
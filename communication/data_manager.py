@@ -13,15 +13,33 @@ Functionality
 DataManager
 -----------
 
-The :class:`DataManager` class features disc caching functionality to provide accessibility and modifiability across
-different modules and processes, as well as additionally safeguards the networked values against too high current.
-
-The :func:`get_data`, :func:`set_data` and :func:`clear` globally accessible functions provide ways of interacting with
-the manager.
+The :class:`DataManager` class features shared memory (or disc) caching functionality to provide accessibility and
+modifiability across different modules and processes, as well as additionally safeguards the networked values against
+too high current. The storage is provided by one of the :class:`Cache` backends, selected at startup.
+
+The :func:`get_data`, :func:`set_data`, :func:`snapshot`, :func:`set_many`, :func:`wait_for_change`, :func:`subscribe`,
+:func:`enable_history`, :func:`enable_journal`, :func:`history`, :func:`downsample`, :func:`share`, :func:`adopt` and
+:func:`clear` globally accessible functions provide ways of interacting with the manager. The :func:`snapshot` and
+:func:`set_many` functions read or modify a group of keys as a single, versioned transaction, and should be preferred
+when handling several keys at once. The :func:`wait_for_change` and :func:`subscribe` functions notify about modified
+data (also across processes), and should be preferred to polling the manager. Once :func:`enable_history` is called,
+every modification of a numeric value is additionally recorded in a :class:`History`, which can be queried with the
+:func:`history` and :func:`downsample` functions. Once :func:`enable_journal` is called, every modification is also
+persisted in a :class:`Journal`, which can be replayed with a :class:`JournalReader`.
+
+The modifications made in one process are observed by the others as long as they share the manager's objects (the cache
+with its writers' lock, the condition notified on every modification, the history and the journal). The forked
+processes inherit them, but the spawned processes (for example on Windows) create their own on import - they should
+call :func:`adopt` with the result of :func:`share`, passed to them by the process which started them.
+
+The :func:`get_data`, :func:`snapshot`, :func:`set_many`, :func:`wait_for_change` and :func:`subscribe` functions accept
+a `namespace`, which selects a separate keyspace (for example of one of several vehicles) - the keys are stored with the
+namespace's prefix, but passed to and returned from the functions without it, and the transmission data is selected and
+safeguarded within the namespace. The default, empty namespace accesses all keys (including the prefixed ones).
 
 .. warning::
 
-    You should never create an instance of :class:`DataManager` yourself, and instead use the 3 functions mentioned.
+    You should never create an instance of :class:`DataManager` yourself, and instead use the 13 functions mentioned.
 
 Execution
 ---------
@@ -30,6 +48,16 @@ You should simply import the module::
 
     import communication.data_manager as dm
 
+To access the keyspace of a namespace::
+
+    dm.set_many({"Mot_G": 1600}, namespace="rov2")  # stored as "rov2/Mot_G"
+    dm.get_data(transmit=True, namespace="rov2")  # returns the safeguarded transmission data of "rov2"
+
+To share the manager with a process started afterwards::
+
+    shared = dm.share()  # in the parent process, passed to the started process
+    dm.adopt(shared)  # at the start of the started process
+
 .. note::
 
     Remember to always `clear` the manager at the start of your program.
@@ -45,10 +73,21 @@ The following list shortly summarises the functionality of each code component w
 
     1. :func:`__init__` builds the manager
     2. :func:`get` accesses the data
-    3. :func:`set` modifies the data
-    4. :func:`clear` clears the disc cache
-    5. :func:`_init_safeguards` initialises the safeguard-related fields
-    6. :func:`_safeguard_transmission_data` safeguards the data before networking it
+    3. :func:`snapshot` accesses the data together with its version
+    4. :func:`set` modifies the data
+    5. :func:`set_many` modifies several values in a single transaction
+    6. :func:`wait_for_change` blocks until the data is modified
+    7. :func:`subscribe` calls a function whenever the data is modified
+    8. :func:`enable_history` starts recording the modifications
+    9. :func:`enable_journal` starts persisting the modifications
+    10. :func:`history` returns the recorded values of a key
+    11. :func:`downsample` returns the recorded values of a key, reduced to a number of time buckets
+    12. :func:`share` returns the objects shared with the other processes
+    13. :func:`adopt` replaces the objects with the ones shared by the parent process
+    14. :func:`clear` clears the cache
+    15. :func:`_init_safeguards` initialises the safeguard-related fields
+    16. :func:`_safeguard_transmission_data` safeguards the data before networking it
+    17. :func:`_notify` wakes up the functions waiting for a modification
 
 Additionally, the :func:`_init_manager` function is used to initialise and enclose the manager on import statement,
 as well as provide the functions to interact with it indirectly.
@@ -56,13 +95,17 @@ as well as provide the functions to interact with it indirectly.
 Modifications
 =============
 
-It is recommended that you adjust the `CACHE_PATH` constant to store your cache in the proper place.
+The `BACKEND` constant (or the `SURFACE_DATA_MANAGER_BACKEND` environment variable) selects where the data is stored -
+`"shared_memory"` keeps it in a :class:`SharedMemoryCache` block, `"disc"` uses a :class:`DiscCache` at the
+`CACHE_PATH`, and `"memory"` uses a :class:`MemoryCache` (only suitable if all modules run in a single process).
 
 .. warning::
 
-    You should be using a SSD drive for cache storage to avoid the delay.
+    If you are using the disc backend, you should be using a SSD drive for cache storage to avoid the delay.
 
-Additionally, you should modify the :func:`__init__` function, especially the `self._transmission_keys` mapping.
+Additionally, you should modify the :func:`__init__` function, especially the `self._transmission_keys` mapping, and
+declare the type and range of any new key in the `SCHEMA` registry (values of the declared keys are validated on
+modification).
 
 Authorship
 ==========
@@ -70,27 +113,47 @@ Authorship
 Kacper Florianski
 """
 
-from diskcache import FanoutCache
-from math import sqrt
-from os import path
+from communication.cache import NAMESPACE_SEPARATOR, DiscCache, MemoryCache
+from communication.history import History
+from communication.journal import Journal
+from communication.safeguard import Safeguard
+from communication.schema import SCHEMA
+from communication.shared_memory import SharedMemoryCache
+from os import environ, path
+from pathos import helpers
+from threading import Event, Thread
+from time import time
 
 # Build the cache PATH
 CACHE_PATH = path.join("C:", "Coding", "Python", "ROV", "cache")
 
+# Declare the storage backends
+BACKENDS = {
+    "shared_memory": SharedMemoryCache,
+    "disc": lambda: DiscCache(CACHE_PATH, shards=8),
+    "memory": MemoryCache
+}
+
+# Select the storage backend, can be overridden with the environment variable
+BACKEND = environ.get("SURFACE_DATA_MANAGER_BACKEND", "shared_memory")
+
 
 class DataManager:
 
-    def __init__(self):
+    def __init__(self, backend=None):
         """
         Constructor function used to initialise the data manager.
 
-        Adjust the `shards` amount in the cache constructor to increase or decrease the amount of parallelism in
-        data-related computations, as well as modify the `self._transmission_keys` set to specify which data should be
-        networked to the middle-level software.
+        Adjust the `shards` amount in the disc cache constructor (within `BACKENDS`) to increase or decrease the amount
+        of parallelism in data-related computations, as well as modify the `self._transmission_keys` set to specify
+        which data should be networked to the middle-level software.
+
+        :param backend: Name of the backend (one of `BACKENDS`) or an instance of :class:`Cache`, defaults to `BACKEND`
         """
 
         # Initialise the data cache
-        self._data = FanoutCache(CACHE_PATH, shards=8)
+        backend = BACKEND if backend is None else backend
+        self._data = BACKENDS[backend]() if isinstance(backend, str) else backend
 
         # Create a set of keys matching data which should be sent over the network
         self._transmission_keys = {
@@ -98,10 +161,21 @@ class DataManager:
             "Mot_F"
         }
 
+        # Initialise the process-local cache of computed results, mapping the arguments to (version, result) pairs
+        self._results = dict()
+
+        # Initialise the condition notified on every modification (inherited by the forked processes, and passed to the
+        # spawned ones with the other shared objects)
+        self._changed = helpers.mp.Condition()
+
+        # Initialise the history and the journal of the modifications (disabled by default)
+        self._history = None
+        self._journal = None
+
         # Initialise safeguard-related fields
         self._init_safeguards()
 
-    def get(self, *args, transmit=False) -> dict:
+    def get(self, *args, transmit=False, namespace="") -> dict:
         """
         Function used to access the cached values. Guards against over-current on networked data.
 
@@ -113,18 +187,59 @@ class DataManager:
 
         :param args: Keys to retrieve (returns all keys if no args are passed)
         :param transmit: Boolean to specify if only the transmission data should be retrieved
+        :param namespace: Namespace of the keys (the keys are returned without its prefix)
         :return: Dictionary of the data
         """
 
+        return self.snapshot(*args, transmit=transmit, namespace=namespace)[1]
+
+    def snapshot(self, *args, transmit=False, namespace="") -> tuple:
+        """
+        Function used to access the cached values in a single transaction, together with their version.
+
+        The results are cached in the current process - as long as the version of the data doesn't change, the last
+        result is returned without reading the data again or recomputing the safeguards.
+
+        Example of usage::
+
+            version, data = snapshot(transmit=True)  # returns a consistent state of the networked values
+
+        :param args: Keys to retrieve (returns all keys if no args are passed)
+        :param transmit: Boolean to specify if only the transmission data should be retrieved
+        :param namespace: Namespace of the keys (the keys are returned without its prefix)
+        :return: Tuple of the version (increased on every modification) and the dictionary of the data
+        """
+
+        # Return a copy of the last computed result if the data wasn't modified since
+        if (args, transmit, namespace) in self._results:
+            version, result = self._results[args, transmit, namespace]
+            if version == self._data.version:
+                return version, dict(result)
+
+        # Read the whole state of the cache at once
+        version, data = self._data.snapshot()
+
+        # Select the keys of the namespace, without the prefix
+        if namespace:
+            prefix = namespace + NAMESPACE_SEPARATOR
+            data = {key[len(prefix):]: value for key, value in data.items() if key.startswith(prefix)}
+
         # If the data retrieved is meant to be sent over the network
         if transmit:
 
-            # Return selected data or transmission-specific dictionary if no args passed
-            return self._safeguard_transmission_data(*args)
+            # Select data or transmission-specific dictionary if no args passed, and safeguard it
+            result = self._safeguard_transmission_data(
+                {key: data[key] for key in (args or self._transmission_keys)
+                 if key in self._transmission_keys and key in data})
 
-        # Return selected data or whole dictionary if no args passed
-        return {key: self._data[key] for key in args if key in self._data} if args \
-            else {key: self._data[key] for key in self._data}
+        # Select data or whole dictionary if no args passed
+        else:
+            result = {key: data[key] for key in args if key in data} if args else data
+
+        # Remember the result for as long as the version doesn't change
+        self._results[args, transmit, namespace] = version, result
+
+        return version, dict(result)
 
     def set(self, **kwargs):
         """
@@ -138,8 +253,218 @@ class DataManager:
         """
 
         # Update the data with the given keyword arguments
-        for key, value in kwargs.items():
-            self._data[key] = value
+        self.set_many(kwargs)
+
+    def set_many(self, data: dict, namespace="") -> int:
+        """
+        Function used to modify several values of the cache in a single transaction.
+
+        Example of usage::
+
+            set_many({"Mot_G": 1500, "Mot_R": 1600})  # Readers observe either both or none of the values changed
+
+        :param data: Dictionary of data to modify
+        :param namespace: Namespace of the keys (the keys are stored with its prefix)
+        :return: Version of the data after the modification
+        """
+
+        # Check the values of the keys declared in the schema, raises ValueError if any is invalid
+        SCHEMA.validate(data)
+
+        # Prefix the keys with the namespace
+        if namespace:
+            data = {namespace + NAMESPACE_SEPARATOR + key: value for key, value in data.items()}
+
+        # Modify the data and notify the waiting processes
+        version = self._data.update(data)
+        self._notify()
+
+        # Record the modification if the history or the journal is enabled
+        if self._history is not None or self._journal is not None:
+            timestamp = time()
+
+            if self._history is not None:
+                self._history.append(data, timestamp)
+
+            if self._journal is not None:
+                self._journal.record(data, timestamp)
+
+        return version
+
+    def wait_for_change(self, *args, transmit=False, last=None, timeout=None, namespace=""):
+        """
+        Function used to block until the selected data is modified. Works across the processes.
+
+        Example of usage::
+
+            version, data = wait_for_change("Mot_G", timeout=1)  # returns None if Mot_G wasn't modified in 1 second
+            version, data = wait_for_change(transmit=True, last=data)  # returns once data differs from the given one
+
+        :param args: Keys to observe (observes all keys if no args are passed)
+        :param transmit: Boolean to specify if only the transmission data should be observed
+        :param last: Dictionary of the data to compare against, defaults to the data at the time of the call
+        :param timeout: Maximum time to wait (seconds), waits indefinitely if None
+        :param namespace: Namespace of the keys
+        :return: Tuple of the version and the dictionary of the modified data, or None if the time ran out
+        """
+
+        # Calculate the deadline
+        deadline = None if timeout is None else time() + timeout
+
+        # Fetch the data to compare against
+        version, data = self.snapshot(*args, transmit=transmit, namespace=namespace)
+        if last is None:
+            last = data
+
+        # Keep waiting until the selected data differs (other keys may be modified in the meantime)
+        while data == last:
+
+            # Calculate the remaining time, stop if it ran out
+            remaining = None if deadline is None else deadline - time()
+            if remaining is not None and remaining <= 0:
+                return None
+
+            # Wait until any write happens
+            with self._changed:
+                self._changed.wait_for(lambda: self._data.version != version, remaining)
+
+            # Fetch the current data
+            version, data = self.snapshot(*args, transmit=transmit, namespace=namespace)
+
+        return version, data
+
+    def subscribe(self, callback, *args, transmit=False, namespace=""):
+        """
+        Function used to call a function whenever the selected data is modified, from a separate thread.
+
+        Example of usage::
+
+            unsubscribe = subscribe(print, "Mot_G")  # prints (version, data) whenever Mot_G is modified
+            unsubscribe()  # stops the notifications
+
+        :param callback: Function called with the version and the dictionary of the modified data
+        :param args: Keys to observe (observes all keys if no args are passed)
+        :param transmit: Boolean to specify if only the transmission data should be observed
+        :param namespace: Namespace of the keys
+        :return: Function used to stop the notifications
+        """
+
+        # Initialise the event used to stop the thread
+        stopped = Event()
+
+        # Inner function to keep waiting for the modifications
+        def _notify_subscriber():
+
+            # Fetch the initial state of the data
+            _, last = self.snapshot(*args, transmit=transmit, namespace=namespace)
+
+            # Keep notifying until stopped (check the event periodically)
+            while not stopped.is_set():
+                result = self.wait_for_change(*args, transmit=transmit, last=last, timeout=0.5, namespace=namespace)
+                if result is not None and not stopped.is_set():
+                    last = result[1]
+                    callback(*result)
+
+        # Start the subscriber thread
+        Thread(target=_notify_subscriber, daemon=True).start()
+
+        return stopped.set
+
+    def enable_history(self, *, size=6000, slots=64):
+        """
+        Function used to start recording the modifications of numeric values. Should be called before any other
+        processes are started, to share the history with them.
+
+        :param size: Number of records kept for each key
+        :param slots: Maximum number of recorded keys
+        """
+
+        if self._history is None:
+            self._history = History(size=size, slots=slots)
+
+    def enable_journal(self, path):
+        """
+        Function used to start persisting all modifications in a :class:`Journal`. Should be called before any other
+        processes are started, to share the journal with them.
+
+        :param path: Path to the journal's log
+        """
+
+        if self._journal is None:
+            self._journal = Journal(path)
+
+    def history(self, key, *, start=None, end=None) -> tuple:
+        """
+        Function used to return the recorded values of a key within a time range.
+
+        Example of usage::
+
+            times, values = history("Mot_G", start=time() - 60)  # returns the values from the last minute
+
+        :param key: Key to return the values of
+        :param start: Start of the range (inclusive timestamp), defaults to the oldest record
+        :param end: End of the range (exclusive timestamp), defaults to the newest record
+        :return: Tuple of the timestamps' and values' arrays (empty if the history is disabled)
+        """
+
+        if self._history is None:
+            return History.EMPTY, History.EMPTY
+
+        return self._history.range(key, start, end)
+
+    def downsample(self, key, buckets, *, start=None, end=None) -> tuple:
+        """
+        Function used to return the recorded values of a key within a time range, reduced to a number of time buckets.
+
+        Example of usage::
+
+            times, minimum, maximum, mean = downsample("Mot_G", 800)  # returns up to 800 points to plot
+
+        :param key: Key to return the values of
+        :param buckets: Number of buckets
+        :param start: Start of the range (inclusive timestamp), defaults to the oldest record
+        :param end: End of the range (exclusive timestamp), defaults to the newest record
+        :return: Tuple of the buckets' start times, and the minimum, maximum and mean values' arrays
+        """
+
+        if self._history is None:
+            return History.EMPTY, History.EMPTY, History.EMPTY, History.EMPTY
+
+        return self._history.downsample(key, buckets, start, end)
+
+    def share(self) -> dict:
+        """
+        Function used to return the objects shared with the other processes - the cache (together with the writers'
+        lock), the condition notified on every modification, the history and the journal.
+
+        The returned dictionary should be passed to a process once it's started, and adopted within it (see
+        :func:`adopt`). Only possible with the backends which can be shared across the processes.
+
+        :return: Dictionary of the shared objects
+        """
+
+        return {"data": self._data, "changed": self._changed, "history": self._history, "journal": self._journal}
+
+    def adopt(self, shared: dict):
+        """
+        Function used to replace the manager's objects with the ones shared by the process which started the current
+        one. Required in the spawned processes (for example on Windows), which otherwise create their own objects on
+        import, and never observe the modifications made by the other processes.
+
+        Example of usage::
+
+            adopt(shared)  # where shared is the result of share(), called in the parent process
+
+        :param shared: Dictionary returned by :func:`share`
+        """
+
+        self._data = shared["data"]
+        self._changed = shared["changed"]
+        self._history = shared["history"]
+        self._journal = shared["journal"]
+
+        # Discard the results computed from the previous cache
+        self._results = dict()
 
     def clear(self):
         """
@@ -147,6 +472,15 @@ class DataManager:
         """
 
         self._data.clear()
+        self._notify()
+
+    def _notify(self):
+        """
+        Function used to wake up all functions waiting for a modification.
+        """
+
+        with self._changed:
+            self._changed.notify_all()
 
     def _init_safeguards(self):
         """
@@ -176,56 +510,18 @@ class DataManager:
         b = -0.2864872
         c = 214.9513
 
-        # Initialise the amp calculation approximation function
-        self._amp = lambda x: a * (x ** 2) + b * x + c
-
-        # Initialise the scaling function (where v is the expected, scaled amp)
-        self._safeguard_scale = lambda v: ((-b + sqrt(b**2 - 4*a*(c - v))) / (2*a),
-                                           (-b - sqrt(b**2 - 4*a*(c - v))) / (2*a))
+        # Initialise the safeguard engine (precomputes the current taken by each PWM value)
+        self._safeguard = Safeguard(self._SAFEGUARD_KEYS, amp_limit=self._AMP_LIMIT, idle_values=self._IDLE_VALUES,
+                                    coefficients=(a, b, c))
 
-    def _safeguard_transmission_data(self, *args):
+    def _safeguard_transmission_data(self, data: dict):
         """
         Function used to safeguard the values that are to be transmitted to Raspberry Pi and further.
 
-        :param args: Args from the `get` function
+        :param data: Transmission data read from the cache
         """
 
-        # Fetch selected data or transmission-specific dictionary if no args passed
-        data = {key: self._data[key] for key in args if key in self._transmission_keys and key in self._data} if args \
-            else {key: self._data[key] for key in self._transmission_keys if key in self._data}
-
-        # Select the safeguard data to scale it
-        safeguard_data = {key: data[key] for key in self._SAFEGUARD_KEYS if key in data}
-
-        # Calculate how much current would be taken by each value
-        amps = {key: self._amp(value) for key, value in safeguard_data.items()}
-
-        # Calculate the total current
-        current = sum(amps.values())
-
-        # Safeguard the values if the limit was passed
-        if current > self._AMP_LIMIT:
-
-            # Find the ratio
-            ratio = self._AMP_LIMIT / current
-
-            # Iterate over the data to scale the values
-            for key in safeguard_data:
-
-                # Find the vales by solving the quadratic equation
-                values = self._safeguard_scale(amps[key]*ratio)
-
-                # Check if the value should be considered
-                if safeguard_data[key] not in self._IDLE_VALUES:
-
-                    # Override current value with the closer one
-                    if abs(safeguard_data[key] - values[0]) <= abs(safeguard_data[key] - values[1]):
-                        safeguard_data[key] = values[0]
-                    else:
-                        safeguard_data[key] = values[1]
-
-        # Return modified data
-        return safeguard_data
+        return self._safeguard(data)
 
 
 # Create a closure for the data manager
@@ -240,16 +536,30 @@ def _init_manager():
     d = DataManager()
 
     # Inner function to return the current state of the data
-    def get_data(*args, transmit=False):
+    def get_data(*args, transmit=False, namespace=""):
         """
         Encloses :func:`DataManager.get`.
 
         :param args: Keys passed to get
         :param transmit: Boolean passed to get
+        :param namespace: Namespace passed to get
         :return: Result of the :func:`get` function
         """
 
-        return d.get(*args, transmit=transmit)
+        return d.get(*args, transmit=transmit, namespace=namespace)
+
+    # Inner function to return the current state of the data together with its version
+    def snapshot(*args, transmit=False, namespace=""):
+        """
+        Encloses :func:`DataManager.snapshot`.
+
+        :param args: Keys passed to snapshot
+        :param transmit: Boolean passed to snapshot
+        :param namespace: Namespace passed to snapshot
+        :return: Result of the :func:`snapshot` function
+        """
+
+        return d.snapshot(*args, transmit=transmit, namespace=namespace)
 
     # Inner function to alter the data
     def set_data(**kwargs):
@@ -261,6 +571,115 @@ def _init_manager():
 
         d.set(**kwargs)
 
+    # Inner function to alter several values in a single transaction
+    def set_many(data, namespace=""):
+        """
+        Encloses :func:`DataManager.set_many`.
+
+        :param data: Dictionary passed to set_many
+        :param namespace: Namespace passed to set_many
+        :return: Result of the :func:`set_many` function
+        """
+
+        return d.set_many(data, namespace)
+
+    # Inner function to wait for a modification
+    def wait_for_change(*args, transmit=False, last=None, timeout=None, namespace=""):
+        """
+        Encloses :func:`DataManager.wait_for_change`.
+
+        :param args: Keys passed to wait_for_change
+        :param transmit: Boolean passed to wait_for_change
+        :param last: Dictionary passed to wait_for_change
+        :param timeout: Timeout passed to wait_for_change
+        :param namespace: Namespace passed to wait_for_change
+        :return: Result of the :func:`wait_for_change` function
+        """
+
+        return d.wait_for_change(*args, transmit=transmit, last=last, timeout=timeout, namespace=namespace)
+
+    # Inner function to subscribe to the modifications
+    def subscribe(callback, *args, transmit=False, namespace=""):
+        """
+        Encloses :func:`DataManager.subscribe`.
+
+        :param callback: Function passed to subscribe
+        :param args: Keys passed to subscribe
+        :param transmit: Boolean passed to subscribe
+        :param namespace: Namespace passed to subscribe
+        :return: Result of the :func:`subscribe` function
+        """
+
+        return d.subscribe(callback, *args, transmit=transmit, namespace=namespace)
+
+    # Inner function to start recording the modifications
+    def enable_history(*, size=6000, slots=64):
+        """
+        Encloses :func:`DataManager.enable_history`.
+
+        :param size: Size passed to enable_history
+        :param slots: Slots passed to enable_history
+        """
+
+        d.enable_history(size=size, slots=slots)
+
+    # Inner function to start persisting the modifications
+    def enable_journal(path):
+        """
+        Encloses :func:`DataManager.enable_journal`.
+
+        :param path: Path passed to enable_journal
+        """
+
+        d.enable_journal(path)
+
+    # Inner function to return the recorded values
+    def history(key, *, start=None, end=None):
+        """
+        Encloses :func:`DataManager.history`.
+
+        :param key: Key passed to history
+        :param start: Start passed to history
+        :param end: End passed to history
+        :return: Result of the :func:`history` function
+        """
+
+        return d.history(key, start=start, end=end)
+
+    # Inner function to return the reduced recorded values
+    def downsample(key, buckets, *, start=None, end=None):
+        """
+        Encloses :func:`DataManager.downsample`.
+
+        :param key: Key passed to downsample
+        :param buckets: Number of buckets passed to downsample
+        :param start: Start passed to downsample
+        :param end: End passed to downsample
+        :return: Result of the :func:`downsample` function
+        """
+
+        return d.downsample(key, buckets, start=start, end=end)
+
+    # Inner function to return the objects shared with the other processes
+    def share():
+        """
+        Encloses :func:`DataManager.share`.
+
+        :return: Result of the :func:`share` function
+        """
+
+        return d.share()
+
+    # Inner function to adopt the objects shared by the parent process
+    def adopt(shared):
+        """
+        Encloses :func:`DataManager.adopt`.
+
+        :param shared: Dictionary passed to adopt
+        """
+
+        d.adopt(shared)
+
     # Inner function to clear the cache
     def clear():
         """
@@ -270,8 +689,10 @@ def _init_manager():
         d.clear()
 
     # Return the enclosed functions
-    return get_data, set_data, clear
+    return get_data, snapshot, set_data, set_many, wait_for_change, subscribe, enable_history, enable_journal, \
+        history, downsample, share, adopt, clear
 
 
 # Create globally accessible functions to manage the data
-get_data, set_data, clear = _init_manager()
+get_data, snapshot, set_data, set_many, wait_for_change, subscribe, enable_history, enable_journal, history, \
+    downsample, share, adopt, clear = _init_manager()
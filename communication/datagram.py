@@ -0,0 +1,329 @@
+"""
+Datagram
+********
+
+Description
+===========
+
+This module is used to send the control setpoints as UDP datagrams, so that a lost packet only loses its own setpoints,
+instead of delaying every later setpoint until it's retransmitted (the head-of-line blocking of TCP).
+
+Functionality
+=============
+
+Datagrams
+---------
+
+Each datagram carries a single, complete message, preceded by a fixed-size header::
+
+    <Q session><Q sequence number><d timestamp><B message type><payload>
+
+The payload is encoded the same way as the payload of a framed message (see the :mod:`communication.protocol` module),
+but the `DELTA` flag is never used, as any datagram may be lost.
+
+The session is the sender's creation time (microseconds since the epoch), and the sequence number is incremented with
+each datagram. A (session, sequence number) pair which isn't newer than the newest pair received so far is stale - it
+was delayed or duplicated by the network, and is superseded by the setpoints already applied - so it's discarded. A new
+session (for example after the surface station reconnects) is always newer than the previous one, so the receiver
+follows it without being reset.
+
+The timestamp is the sender's wall-clock time, and can be used to measure the latency (or to discard the old setpoints)
+when the clocks of both sides are synchronised.
+
+Sender and receiver
+-------------------
+
+The :class:`DatagramSender` class sends the datagrams of a single session to the given address. The
+:class:`DatagramReceiver` class is the reference implementation of the receiving side - it decodes each datagram, and
+discards the stale ones, counting the received, the stale and the skipped (lost or reordered) datagrams.
+
+Loss injection
+--------------
+
+The :class:`LossInjector` class simulates an unreliable link, to test both sides over the loopback interface - each
+datagram passed through it is dropped with the given probability, or held back and delivered after the next one (so that
+it arrives stale).
+
+Execution
+---------
+
+To send the setpoints, create a sender for the Raspberry Pi's address::
+
+    sender = DatagramSender(("localhost", 50000), BINARY)
+    sender.send({"Mot_G": 1600})
+
+To receive them, feed each datagram into a receiver, optionally through an injector::
+
+    receiver, injector = DatagramReceiver(), LossInjector(loss=0.1)
+    for datagram in injector(server.recv(MAX_DATAGRAM_SIZE)):
+        data = receiver.receive(datagram)
+        if data is not None:
+            apply(data)
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the module:
+
+    1. :func:`encode_datagram` and :func:`decode_datagram` build and parse a datagram
+    2. :class:`DatagramSender` sends the sequence-numbered datagrams of a session
+    3. :class:`DatagramReceiver` decodes the datagrams, discarding the stale ones
+    4. :class:`LossInjector` drops and reorders the datagrams passed through it
+
+Modifications
+=============
+
+You should consider modifying the `MAX_DATAGRAM_SIZE` if bigger messages are sent (the datagrams should fit a single
+ethernet frame to avoid the IP fragmentation).
+"""
+
+import socket
+import struct
+from communication.protocol import BINARY, DELTA, JSON, ProtocolError, decode_data, encode_payload
+from random import Random
+from time import time, time_ns
+
+# Declare the datagram header - session, sequence number, timestamp and the message type
+HEADER = struct.Struct("<QQdB")
+
+# Declare the maximum size of a datagram (bytes), so that it fits a single ethernet frame
+MAX_DATAGRAM_SIZE = 1472
+
+
+def encode_datagram(session: int, sequence: int, data: dict, message_type=BINARY, timestamp=None) -> bytes:
+    """
+    Function used to build a datagram.
+
+    :param session: Session of the sender
+    :param sequence: Sequence number of the datagram within the session
+    :param data: Dictionary of values to send
+    :param message_type: Either `JSON` or `BINARY`
+    :param timestamp: Time of sending (seconds since the epoch), current time by default
+    :return: Header followed by the payload
+    """
+
+    if message_type & DELTA:
+        raise ValueError("The datagrams can't carry the delta messages")
+
+    # Encode the payload, and make sure it won't be fragmented
+    payload = encode_payload(data, message_type)
+    if HEADER.size + len(payload) > MAX_DATAGRAM_SIZE:
+        raise ValueError("The datagram would exceed {} bytes".format(MAX_DATAGRAM_SIZE))
+
+    return HEADER.pack(session, sequence, time() if timestamp is None else timestamp, message_type) + payload
+
+
+def decode_datagram(datagram) -> tuple:
+    """
+    Function used to parse a datagram.
+
+    :param datagram: Received bytes
+    :return: Tuple of the session, the sequence number, the timestamp and the dictionary of the received values
+    """
+
+    if len(datagram) < HEADER.size:
+        raise ProtocolError("Datagram shorter than its header: {} bytes".format(len(datagram)))
+
+    session, sequence, timestamp, message_type = HEADER.unpack_from(datagram)
+    if message_type not in (JSON, BINARY):
+        raise ProtocolError("Unexpected datagram type: {}".format(message_type))
+
+    # Decode the payload, treating any encoding error as a malformed datagram
+    try:
+        data = decode_data(message_type, memoryview(datagram)[HEADER.size:])
+    except (UnicodeDecodeError, ValueError) as error:
+        raise ProtocolError("Invalid datagram payload: {}".format(error))
+
+    return session, sequence, timestamp, data
+
+
+class DatagramSender:
+
+    def __init__(self, address: tuple, message_type=BINARY):
+        """
+        Constructor function used to initialise the socket and a new session.
+
+        :param address: Receiver's (IP address, port) tuple
+        :param message_type: Either `JSON` or `BINARY`
+        """
+
+        # Save the address and the message type
+        self._address = address
+        self._message_type = message_type
+
+        # Set the socket for IPv4 addresses (hence AF_INET) and UDP (hence SOCK_DGRAM)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        # Start a new session, newer than any previous one
+        self._session = time_ns() // 1000
+        self._sequence = 0
+
+    @property
+    def session(self) -> int:
+        """
+        Getter for the session.
+
+        :return: Session of the sent datagrams
+        """
+
+        return self._session
+
+    @property
+    def sequence(self) -> int:
+        """
+        Getter for the sequence number of the last datagram.
+
+        :return: Sequence number, 0 if nothing was sent
+        """
+
+        return self._sequence
+
+    def send(self, data: dict) -> int:
+        """
+        Function used to send the values in the next datagram.
+
+        :param data: Dictionary of values to send
+        :return: Sequence number of the datagram
+        """
+
+        self._sequence += 1
+        self._socket.sendto(encode_datagram(self._session, self._sequence, data, self._message_type), self._address)
+
+        return self._sequence
+
+    def close(self):
+        """
+        Function used to close the socket.
+        """
+
+        self._socket.close()
+
+
+class DatagramReceiver:
+
+    def __init__(self):
+        """
+        Constructor function used to initialise the newest (session, sequence number) pair and the counters.
+        """
+
+        # Initialise the newest pair received
+        self._newest = (0, 0)
+
+        # Initialise the counters of the received, the stale and the skipped datagrams
+        self._received = 0
+        self._stale = 0
+        self._skipped = 0
+
+    @property
+    def received(self) -> int:
+        """
+        Getter for the number of the accepted datagrams.
+
+        :return: Number of datagrams which weren't stale
+        """
+
+        return self._received
+
+    @property
+    def stale(self) -> int:
+        """
+        Getter for the number of the discarded datagrams.
+
+        :return: Number of datagrams which arrived after a newer one (or were duplicated)
+        """
+
+        return self._stale
+
+    @property
+    def skipped(self) -> int:
+        """
+        Getter for the number of the skipped sequence numbers.
+
+        :return: Number of datagrams which didn't arrive in order within their session (lost, or arrived stale)
+        """
+
+        return self._skipped
+
+    def receive(self, datagram):
+        """
+        Function used to decode a datagram, unless it's stale.
+
+        :param datagram: Received bytes
+        :return: Dictionary of the received values, or None if the datagram is stale
+        """
+
+        session, sequence, _, data = decode_datagram(datagram)
+
+        # Discard the datagram if a newer one was received already
+        if (session, sequence) <= self._newest:
+            self._stale += 1
+            return None
+
+        # Count the sequence numbers skipped within the session (the first datagram of a session is always accepted)
+        if session == self._newest[0]:
+            self._skipped += sequence - self._newest[1] - 1
+
+        self._newest = (session, sequence)
+        self._received += 1
+
+        return data
+
+
+class LossInjector:
+
+    def __init__(self, loss=0.0, reorder=0.0, seed=None):
+        """
+        Constructor function used to initialise the simulated link.
+
+        :param loss: Probability of dropping a datagram
+        :param reorder: Probability of holding a datagram back, and delivering it after the next one
+        :param seed: Seed of the random generator, for the reproducible runs
+        """
+
+        # Save the probabilities, and initialise the random generator
+        self._loss = loss
+        self._reorder = reorder
+        self._generator = Random(seed)
+
+        # Initialise the datagram held back
+        self._held = None
+
+        # Initialise the number of dropped datagrams
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        """
+        Getter for the number of dropped datagrams.
+
+        :return: Number of datagrams dropped since the injector was created
+        """
+
+        return self._dropped
+
+    def __call__(self, datagram) -> list:
+        """
+        Function used to pass a datagram through the simulated link.
+
+        :param datagram: Sent bytes
+        :return: List of the datagrams delivered now (none, the given one, or the given and the held back ones)
+        """
+
+        # Drop the datagram
+        if self._generator.random() < self._loss:
+            self._dropped += 1
+            return []
+
+        # Hold the datagram back, unless another one is held already
+        if self._held is None and self._generator.random() < self._reorder:
+            self._held = datagram
+            return []
+
+        # Deliver the datagram, followed by the held back one
+        delivered, self._held = [datagram] + ([self._held] if self._held is not None else []), None
+
+        return delivered
@@ -0,0 +1,232 @@
+"""
+Decoding
+********
+
+Description
+===========
+
+This module is used to decode the received frames in separate processes, so that decoding doesn't compete for the GIL
+with the socket reads of the video streams and the control loop running in the same interpreter.
+
+Functionality
+=============
+
+DecoderPool
+-----------
+
+The :class:`DecoderPool` class runs a pool of worker processes, which decode the complete frame payloads - un-pickle the
+pickled frames, or decode the framed frames (for example with :func:`cv2.imdecode` for the JPEG payloads). The frame
+rate therefore scales with the number of cores, rather than being limited by a single interpreter.
+
+The decoded frames come back through shared memory - the pool owns a ring of shared memory slots, and each decode is
+given a free slot, into which the worker writes the decoded pixels (only the shape and the pixel type are sent back
+through the pool's pipe). The frame is then copied out of the slot into a regular array, and the slot is reused. If no
+slot is free, or the frame doesn't fit in the slot, the frame is sent back through the pipe instead (and the slot is
+grown to fit the next frames).
+
+Decoding
+--------
+
+The :func:`decode_payload` function decodes a payload of either protocol of the :class:`VideoStream`, both within the
+workers and within the video streams when no pool is used.
+
+Execution
+---------
+
+To decode the frames of several streams in the pool, create a single pool and pass it to each stream::
+
+    pool = DecoderPool(workers=2)
+    streams = [VideoStream(ip=ip, port=port, decoder=pool) for port in range(50010, 50013)]
+
+To decode a payload yourself, submit it and wait for the result::
+
+    frame = pool.submit(payload, framed=True).result()
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the module:
+
+    1. :func:`decode_payload` decodes a frame's payload
+    2. :func:`_decode_into` decodes a frame's payload within a worker, writing it into a slot if it fits
+
+The following list shortly summarises the functionality of each code component within the :class:`DecoderPool` class:
+
+    1. :func:`__init__` starts the worker processes and creates the slots
+    2. :func:`submit` schedules the decoding of a payload
+    3. :func:`close` stops the workers and removes the slots
+    4. :func:`_complete` copies the decoded frame out of its slot, and releases the slot
+
+Modifications
+=============
+
+You should consider modifying the `workers` and the `slots` passed to :func:`DecoderPool.__init__` to match the number
+of the cores and the cameras, and the `SLOT_SIZE` if the frames are much larger than 1 MiB.
+"""
+
+import atexit
+import numpy as np
+from communication.frames import decode_frame
+from concurrent.futures import Future, ProcessPoolExecutor
+from dill import loads
+from multiprocessing import get_context, shared_memory
+from queue import Empty, Queue
+from threading import Lock
+
+# Declare the initial size of each slot (bytes), which fits a 640x480 colour frame
+SLOT_SIZE = 1 << 20
+
+# Declare the slots attached by a worker process, by their indices (kept open for the worker's lifetime)
+_attached = dict()
+
+
+def decode_payload(payload, framed: bool):
+    """
+    Function used to decode a frame's payload.
+
+    :param payload: Framed frame (see :func:`decode_frame`), or pickled frame (empty if the frame was empty)
+    :param framed: Whether the frame is framed, or pickled
+    :return: OpenCV-formatted frame (numpy array), or None if the frame was empty
+    """
+
+    if framed:
+        return decode_frame(payload)
+
+    # Un-pickle the frame or set it to None if it's empty
+    return loads(payload) if payload else None
+
+
+def _decode_into(payload, framed: bool, slot) -> tuple:
+    """
+    Function used to decode a frame's payload within a worker process, and write the decoded pixels into a slot.
+
+    :param payload: Payload passed to :func:`decode_payload`
+    :param framed: Whether the frame is framed, or pickled
+    :param slot: Tuple of the slot's index and the name of its shared memory block, or None if no slot is available
+    :return: Tuple of the shape and the pixel type if the frame was written into the slot, or of the frame and None
+        otherwise
+    """
+
+    frame = decode_payload(payload, framed)
+    if frame is None or slot is None:
+        return frame, None
+
+    # Attach to the slot (or to its replacement, once it was grown)
+    index, name = slot
+    if index not in _attached or _attached[index].name != name:
+        if index in _attached:
+            _attached[index].close()
+        _attached[index] = shared_memory.SharedMemory(name=name, create=False)
+
+    # Send the frame back through the pipe if it doesn't fit in the slot
+    memory = _attached[index]
+    if frame.nbytes > memory.size:
+        return frame, None
+
+    np.ndarray(frame.shape, frame.dtype, buffer=memory.buf)[...] = frame
+
+    return frame.shape, frame.dtype.str
+
+
+class DecoderPool:
+
+    def __init__(self, *, workers=2, slots=None):
+        """
+        Constructor function used to start the worker processes, and create the shared memory slots.
+
+        :param workers: Number of the worker processes
+        :param slots: Number of the slots, which limits the number of frames sent back through shared memory at once,
+            twice the number of workers by default
+        """
+
+        # Start the workers, spawned so that they don't inherit the threads of the surface station
+        self._executor = ProcessPoolExecutor(workers, mp_context=get_context("spawn"))
+
+        # Create the slots, and queue the indices of the free ones
+        self._slots = [shared_memory.SharedMemory(create=True, size=SLOT_SIZE) for _ in range(slots or workers * 2)]
+        self._free = Queue()
+        for index in range(len(self._slots)):
+            self._free.put(index)
+
+        # Initialise the lock used to replace the slots, and remember whether the pool was closed
+        self._lock = Lock()
+        self._closed = False
+
+        # Remove the slots on exit
+        atexit.register(self.close)
+
+    def submit(self, payload, framed: bool) -> Future:
+        """
+        Function used to schedule the decoding of a frame's payload (never blocks).
+
+        :param payload: Payload passed to :func:`decode_payload`
+        :param framed: Whether the frame is framed, or pickled
+        :return: Future of the OpenCV-formatted frame (numpy array), or None if the frame was empty
+        """
+
+        # Take a free slot, if any
+        try:
+            index = self._free.get_nowait()
+        except Empty:
+            index = None
+
+        with self._lock:
+            slot = None if index is None else (index, self._slots[index].name)
+
+        # Decode the payload in a worker, and copy the result out of the slot once done
+        result = Future()
+        future = self._executor.submit(_decode_into, payload, framed, slot)
+        future.add_done_callback(lambda done: self._complete(done, index, result))
+
+        return result
+
+    def close(self):
+        """
+        Function used to stop the workers, and remove the slots (only once).
+        """
+
+        if self._closed:
+            return
+
+        self._closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for memory in self._slots:
+            memory.close()
+            memory.unlink()
+
+    def _complete(self, future, index, result):
+        """
+        Function used to copy the decoded frame out of its slot, release the slot, and resolve the result.
+
+        :param future: Completed future of :func:`_decode_into`
+        :param index: Index of the slot given to the decoding, or None if no slot was free
+        :param result: Future to resolve with the frame
+        """
+
+        try:
+            value, dtype = future.result()
+
+            # Copy the frame out of the slot, so that the slot can be reused straight away
+            if dtype is not None:
+                with self._lock:
+                    value = np.ndarray(value, np.dtype(dtype), buffer=self._slots[index].buf).copy()
+
+            # Grow the slot if the frame didn't fit in it
+            elif value is not None and index is not None and value.nbytes > self._slots[index].size:
+                with self._lock:
+                    self._slots[index].close()
+                    self._slots[index].unlink()
+                    self._slots[index] = shared_memory.SharedMemory(create=True, size=value.nbytes)
+
+            result.set_result(value)
+
+        except Exception as error:
+            result.set_exception(error)
+
+        # Release the slot
+        if index is not None:
+            self._free.put(index)
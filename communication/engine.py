@@ -0,0 +1,219 @@
+"""
+Engine
+******
+
+Description
+===========
+
+This module is used to run the networking tasks as coroutines on a single asyncio event loop, instead of dedicating a
+process or a thread (blocked on a socket) to each connection.
+
+Functionality
+=============
+
+Engine
+------
+
+The :class:`Engine` class runs an event loop in a background thread. The :class:`Connection` and :class:`VideoStream`
+objects created with an engine submit their coroutines to it when started, and keep their usual API - the frames and the
+data manager are updated the same way as without the engine.
+
+The engine also provides the resources shared by all of its coroutines, so that their number doesn't grow with the
+number of connections (for example of several vehicles):
+
+    1. A pool of worker threads, running the blocking or CPU-bound functions (for example decoding the frames) without
+       blocking the event loop
+    2. A single watcher thread, which waits for the data manager's modifications and notifies each subscribed coroutine
+       of the changes of its data (instead of a data manager's subscriber thread for each connection)
+
+Execution
+---------
+
+To run the connection and the streams on a shared engine, pass it to the constructors::
+
+    engine = Engine()
+    connection = Connection(ip=ip, port=50000, engine=engine)
+    streams = [VideoStream(ip=ip, port=port, engine=engine) for port in range(50010, 50013)]
+
+    connection.connect()
+    for stream in streams:
+        stream.stream()
+
+.. note::
+
+    The event loop's thread is started with the first submitted coroutine. The engine keeps the submitted coroutines'
+    tasks referenced until they finish, as the event loop only references them weakly.
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`Engine` class:
+
+    1. :func:`__init__` builds the event loop and the worker pool
+    2. :func:`loop` is a getter for the event loop
+    3. :func:`submit` schedules a coroutine on the event loop
+    4. :func:`run` runs a function in the worker pool, as a coroutine
+    5. :func:`subscribe` calls a function on the event loop whenever the selected data is modified
+    6. :func:`stop` stops the event loop and the worker pool
+    7. :func:`_run` runs the event loop until stopped
+    8. :func:`_keep` runs a submitted coroutine, keeping its task referenced
+    9. :func:`_watch` keeps notifying the subscribers of the modifications
+"""
+
+import asyncio
+import communication.data_manager as dm
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
+
+
+class Engine:
+
+    def __init__(self, *, workers=4):
+        """
+        Constructor function used to initialise the event loop, its thread and the worker pool.
+
+        :param workers: Number of the worker threads
+        """
+
+        # Build the event loop and the thread running it
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._run, daemon=True)
+
+        # Initialise the lock used to start the threads only once
+        self._lock = Lock()
+
+        # Initialise the tasks of the running coroutines (the event loop only references them weakly)
+        self._tasks = set()
+
+        # Build the worker pool
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="engine-worker")
+
+        # Initialise the subscriptions (lists of the callback, the selection and the last data), and the watcher thread
+        self._subscriptions = list()
+        self._watcher = Thread(target=self._watch, daemon=True)
+        self._stopped = Event()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Getter for the event loop.
+
+        :return: Event loop running the coroutines
+        """
+
+        return self._loop
+
+    def submit(self, coroutine):
+        """
+        Function used to schedule a coroutine on the event loop, starting the loop's thread if needed.
+
+        :param coroutine: Coroutine to run
+        :return: :class:`concurrent.futures.Future` of the coroutine's result
+        """
+
+        # Start the thread on the first submission
+        with self._lock:
+            if self._thread.ident is None:
+                self._thread.start()
+
+        return asyncio.run_coroutine_threadsafe(self._keep(coroutine), self._loop)
+
+    async def run(self, function, *args):
+        """
+        Function used to run a function in the worker pool, without blocking the event loop.
+
+        :param function: Function to run
+        :param args: Arguments of the function
+        :return: Result of the function
+        """
+
+        return await self._loop.run_in_executor(self._executor, function, *args)
+
+    def subscribe(self, callback, *, transmit=False, namespace=""):
+        """
+        Function used to call a function on the event loop whenever the selected data is modified.
+
+        :param callback: Function called with the version and the dictionary of the modified data
+        :param transmit: Boolean to specify if only the transmission data should be observed
+        :param namespace: Namespace of the keys
+        :return: Function used to stop the notifications
+        """
+
+        # Register the subscription, starting the watcher on the first one
+        subscription = [callback, transmit, namespace, dm.snapshot(transmit=transmit, namespace=namespace)[1]]
+        with self._lock:
+            self._subscriptions.append(subscription)
+            if self._watcher.ident is None:
+                self._watcher.start()
+
+        # Inner function to stop the notifications
+        def _unsubscribe():
+            with self._lock:
+                if subscription in self._subscriptions:
+                    self._subscriptions.remove(subscription)
+
+        return _unsubscribe
+
+    def stop(self):
+        """
+        Function used to stop the event loop (the running coroutines are abandoned), the watcher and the worker pool.
+        """
+
+        self._stopped.set()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=False)
+
+    def _run(self):
+        """
+        Function used to run the event loop in the current thread, until stopped.
+        """
+
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _keep(self, coroutine):
+        """
+        Function used to run a submitted coroutine, keeping its task referenced until it finishes (otherwise the task
+        can be garbage collected while it waits).
+
+        :param coroutine: Coroutine to run
+        :return: Result of the coroutine
+        """
+
+        task = asyncio.current_task()
+        self._tasks.add(task)
+
+        try:
+            return await coroutine
+        finally:
+            self._tasks.discard(task)
+
+    def _watch(self):
+        """
+        Function used to wait for the data manager's modifications, and notify each subscriber whose data changed, until
+        stopped.
+        """
+
+        # Fetch the initial state of the data
+        _, last = dm.snapshot()
+
+        # Keep waiting for any modification (check whether stopped periodically)
+        while not self._stopped.is_set():
+            result = dm.wait_for_change(last=last, timeout=0.5)
+            if result is None:
+                continue
+            last = result[1]
+
+            # Notify the subscribers whose selected data changed
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+            for subscription in subscriptions:
+                callback, transmit, namespace, data = subscription
+                version, current = dm.snapshot(transmit=transmit, namespace=namespace)
+                if current != data:
+                    subscription[3] = current
+                    self._loop.call_soon_threadsafe(callback, version, current)
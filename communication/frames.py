@@ -0,0 +1,271 @@
+"""
+Frames
+******
+
+Description
+===========
+
+This module is used to frame the camera frames exchanged with the Raspberry Pi, replacing the pickled frames followed by
+the "Frame was successfully sent" terminator.
+
+Functionality
+=============
+
+Framing
+-------
+
+Each frame consists of a fixed-size header followed by the payload::
+
+    <2s magic><B encoding><B dtype><I sequence><d timestamp><H width><H height><B channels><I length of the payload>
+    <payload>
+
+The following encodings are supported:
+
+    1. `RAW` - the pixels in the row-major order, decoded straight into a NumPy array with :func:`numpy.frombuffer`
+    2. `JPEG` - the image compressed with :func:`cv2.imencode`, decoded with :func:`cv2.imdecode` (the dtype, width,
+       height and channels of the header still describe the decoded image)
+
+The sequence number is increased by the sender with each frame, and the timestamp is the sender's :func:`time.time` at
+capture. As the length is known upfront, the frame's end is found without searching for a terminator, and the frame's
+bytes can never be mistaken for the end of the frame.
+
+Negotiation
+-----------
+
+The Raspberry Pi builds which don't support the framing keep sending the pickled frames. As a pickle always starts with
+the `0x80` byte, the protocol is detected from the first bytes of each connection - the framed stream starts with the
+`MAGIC` bytes (see :func:`is_framed`). The surface acknowledges each frame with "ACK" in both protocols.
+
+Flow control
+------------
+
+By default, the Raspberry Pi waits for the acknowledgement after each frame (stop-and-wait), so at most one frame is
+sent per round trip. With the framed protocol, the surface can instead declare a window of frames which may be in flight
+at once, by sending the `WINDOW_HELLO` straight after connecting::
+
+    <3s "WIN"><H window>
+
+The Raspberry Pi then keeps sending the frames as long as fewer than `window` frames are unacknowledged, and the surface
+acknowledges the frames cumulatively with the `WINDOW_ACK`, carrying the sequence number of the last received frame::
+
+    <3s "ACK"><I sequence>
+
+As the Raspberry Pi reads the surface's first message before its first acknowledgement, it tells both modes apart by the
+first 3 bytes - "WIN" or "ACK".
+
+Execution
+---------
+
+To frame an image, call :func:`encode_frame`, and decode it with :func:`decode_frame` once fully received::
+
+    connection.sendall(encode_frame(image, sequence, time(), JPEG))
+
+    header = decode_header(data)
+    if len(data) >= HEADER.size + header.length:
+        image = decode_frame(data)
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the module:
+
+    1. :class:`FrameHeader` is the decoded header of a frame
+    2. :func:`is_framed` detects the framed stream from its first bytes
+    3. :func:`encode_frame` frames an image
+    4. :func:`encode_header` encodes the header of an image's frame
+    5. :func:`decode_header` decodes the header of a frame
+    6. :func:`decode_frame` decodes the image of a fully received frame
+    7. :func:`encode_window_hello` encodes the declaration of the window
+    8. :func:`encode_acknowledgement` encodes a cumulative acknowledgement
+
+Modifications
+=============
+
+You should add the new encodings and dtypes as constants, and handle them in :func:`encode_frame` and
+:func:`decode_frame`. Never change the value of an existing encoding or dtype, as they're shared with the Raspberry Pi.
+You should also consider modifying the `MAX_FRAME_LENGTH` if bigger frames are expected.
+"""
+
+import numpy as np
+import struct
+from collections import namedtuple
+from communication.protocol import ProtocolError
+from cv2 import IMREAD_UNCHANGED, IMWRITE_JPEG_QUALITY, imdecode, imencode
+
+# Declare the bytes starting each frame, and the frame's header
+MAGIC = b"SF"
+HEADER = struct.Struct("<2sBBIdHHBI")
+
+# Declare the encodings of the payload
+RAW = 0
+JPEG = 1
+
+# Declare the codes of the supported pixel types
+DTYPES = {
+    0: np.dtype(np.uint8),
+    1: np.dtype(np.uint16),
+    2: np.dtype(np.float32)
+}
+
+# Declare the stop-and-wait acknowledgement, and the windowed mode's declaration of the window and acknowledgement
+ACK = b"ACK"
+HELLO = b"WIN"
+WINDOW_HELLO = struct.Struct("<3sH")
+WINDOW_ACK = struct.Struct("<3sI")
+
+# Declare the maximum length of a payload (bytes), longer frames are treated as a malformed stream
+MAX_FRAME_LENGTH = 1 << 26
+
+# Declare the default quality of the JPEG payloads (0 to 100)
+JPEG_QUALITY = 90
+
+# Declare the decoded header of a frame
+FrameHeader = namedtuple("FrameHeader", ("encoding", "dtype", "sequence", "timestamp", "width", "height", "channels",
+                                         "length"))
+
+
+def is_framed(data) -> bool:
+    """
+    Function used to detect the framed stream from its first bytes.
+
+    :param data: First bytes of the stream (at least as many as the `MAGIC`)
+    :return: True if the stream is framed, False if it consists of the pickled frames
+    """
+
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def encode_frame(image, sequence: int, timestamp: float, encoding=RAW, *, quality=JPEG_QUALITY) -> bytes:
+    """
+    Function used to frame an image.
+
+    :param image: NumPy array of the image, either 2-dimensional or with the channels as the last dimension
+    :param sequence: Sequence number of the frame
+    :param timestamp: Sender's time of the capture (seconds)
+    :param encoding: Either `RAW` or `JPEG`
+    :param quality: Quality of the JPEG payload
+    :return: Header followed by the payload
+    """
+
+    # Encode the payload
+    if encoding == RAW:
+        payload = np.ascontiguousarray(image).tobytes()
+    elif encoding == JPEG:
+        success, payload = imencode(".jpg", image, (IMWRITE_JPEG_QUALITY, quality))
+        if not success:
+            raise ValueError("Failed to encode the image as JPEG")
+        payload = payload.tobytes()
+    else:
+        raise ValueError("Unsupported encoding: {}".format(encoding))
+
+    return encode_header(image, sequence, timestamp, encoding, len(payload)) + payload
+
+
+def encode_header(image, sequence: int, timestamp: float, encoding: int, length: int) -> bytes:
+    """
+    Function used to encode the header of an image's frame, without encoding the payload (for example to write the raw
+    pixels straight from the image's memory).
+
+    :param image: NumPy array of the image, either 2-dimensional or with the channels as the last dimension
+    :param sequence: Sequence number of the frame
+    :param timestamp: Sender's time of the capture (seconds)
+    :param encoding: Either `RAW` or `JPEG`
+    :param length: Length of the payload (bytes)
+    :return: Encoded header
+    """
+
+    # Find the code of the pixel type
+    codes = {dtype: code for code, dtype in DTYPES.items()}
+    if image.dtype not in codes:
+        raise ValueError("Unsupported pixel type: {}".format(image.dtype))
+
+    height, width = image.shape[:2]
+    channels = image.shape[2] if image.ndim == 3 else 1
+
+    return HEADER.pack(MAGIC, encoding, codes[image.dtype], sequence, timestamp, width, height, channels, length)
+
+
+def decode_header(data) -> FrameHeader:
+    """
+    Function used to decode the header of a frame.
+
+    Raises :class:`ProtocolError` if the header is malformed, after which the connection should be reset (as the frame
+    boundaries are lost).
+
+    :param data: Bytes (or any other buffer) starting with a full header
+    :return: Decoded header
+    """
+
+    magic, *fields = HEADER.unpack_from(data)
+    header = FrameHeader(*fields)
+
+    # Check if the header makes sense
+    if magic != MAGIC:
+        raise ProtocolError("Invalid frame magic: {}".format(magic))
+    if header.encoding not in (RAW, JPEG):
+        raise ProtocolError("Unexpected frame encoding: {}".format(header.encoding))
+    if header.dtype not in DTYPES:
+        raise ProtocolError("Unexpected frame dtype: {}".format(header.dtype))
+    if header.length > MAX_FRAME_LENGTH:
+        raise ProtocolError("Frame too long: {} bytes".format(header.length))
+
+    return header
+
+
+def decode_frame(data):
+    """
+    Function used to decode the image of a fully received frame.
+
+    The raw images share the memory of the given data (no copy is made), so a writable buffer (for example a bytearray)
+    should be passed if the images are modified later.
+
+    :param data: Bytes (or any other buffer) of the header followed by the payload
+    :return: OpenCV-formatted frame (numpy array), or None if the payload is empty
+    """
+
+    header = decode_header(data)
+    if not header.length:
+        return None
+
+    payload = memoryview(data)[HEADER.size:HEADER.size + header.length]
+    shape = (header.height, header.width) if header.channels == 1 else (header.height, header.width, header.channels)
+
+    # Decode the JPEG payload, and check it matches the header
+    if header.encoding == JPEG:
+        image = imdecode(np.frombuffer(payload, np.uint8), IMREAD_UNCHANGED)
+        if image is None or image.shape != shape:
+            raise ProtocolError("Invalid JPEG payload")
+        return image
+
+    # Interpret the raw payload as the pixels
+    dtype = DTYPES[header.dtype]
+    if header.length != dtype.itemsize * int(np.prod(shape)):
+        raise ProtocolError("Invalid raw payload length: {} bytes".format(header.length))
+
+    return np.frombuffer(payload, dtype).reshape(shape)
+
+
+def encode_window_hello(window: int) -> bytes:
+    """
+    Function used to encode the declaration of the window, sent by the surface straight after connecting.
+
+    :param window: Maximum number of the unacknowledged frames
+    :return: Encoded declaration
+    """
+
+    return WINDOW_HELLO.pack(HELLO, window)
+
+
+def encode_acknowledgement(sequence: int) -> bytes:
+    """
+    Function used to encode a cumulative acknowledgement of the windowed mode.
+
+    :param sequence: Sequence number of the last received frame (acknowledging all frames up to it)
+    :return: Encoded acknowledgement
+    """
+
+    return WINDOW_ACK.pack(ACK, sequence)
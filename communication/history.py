@@ -0,0 +1,339 @@
+"""
+History
+*******
+
+Description
+===========
+
+This module is used to record the time series of the data manager's values, so that they can be inspected or plotted
+after they were modified.
+
+Functionality
+=============
+
+History
+-------
+
+The :class:`History` class keeps a fixed-size ring buffer of (timestamp, value) pairs for each recorded key. All buffers
+are preallocated in a single shared memory block, so the values written by any process (for example the telemetry
+received by the connection process) are visible to all processes.
+
+Each key is assigned a slot on its first write. Appending a value is O(1) - the value is written at the head of the
+slot's ring, and the head counter is increased. Readers copy the part of the ring they need, and discard the records
+which were overwritten while copying, by comparing the head counter before and after.
+
+The writers exclude each other with a lock created together with the block, which travels with the history whenever the
+history is pickled (when a process is started with it), so every process writing into the block uses the same lock.
+
+Execution
+---------
+
+The history is created by the :class:`DataManager` once it's enabled, before any other processes are started::
+
+    dm.enable_history()
+    times, values = dm.history("Mot_G", start=time() - 60)  # values from the last minute
+    times, minimum, maximum, mean = dm.downsample("Mot_G", 800)  # 800 points to plot
+
+.. note::
+
+    Only numeric (and boolean) values are recorded, other values are ignored.
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`History` class:
+
+    1. :func:`__init__` creates (or attaches to) the shared memory block
+    2. :func:`keys` lists the recorded keys
+    3. :func:`append` records the values
+    4. :func:`range` returns the records within a time range
+    5. :func:`downsample` returns the minimum, maximum and mean of the records within a number of time buckets
+    6. :func:`close` releases the block (and removes it if created by this process)
+    7. :func:`__getstate__` pickles the block's dimensions and name together with the writers' lock
+    8. :func:`__setstate__` attaches to the pickled block, using the pickled lock
+    9. :func:`_slot` finds (or assigns) the slot of a key
+    10. :func:`_find` finds the slot of a key
+    11. :func:`_segments` splits the records into the chronological parts of a ring
+
+Modifications
+=============
+
+You should adjust the `size` and `slots` passed to :func:`__init__` to specify how many records per key, and how many
+keys, should fit in the memory.
+"""
+
+import atexit
+import numpy as np
+import os
+from communication.shared_memory import open_block
+from numbers import Real
+from pathos import helpers
+
+# Declare the environment variable used to share the block's name with spawned processes
+ENVIRONMENT_KEY = "SURFACE_DATA_MANAGER_HISTORY"
+
+# Declare the maximum length of a key (bytes)
+KEY_LENGTH = 32
+
+
+class History:
+
+    # Empty array returned when nothing was recorded
+    EMPTY = np.empty(0)
+    EMPTY.flags.writeable = False
+
+    def __init__(self, *, size=6000, slots=64, name=None, lock=None):
+        """
+        Constructor function used to create a new history block, or attach to an existing one.
+
+        :param size: Number of records kept for each key
+        :param slots: Maximum number of recorded keys
+        :param name: Name of the block to attach to, defaults to the one exported in the environment (if any)
+        :param lock: Lock shared between the block's writers, a new one is created if not given
+        """
+
+        # Store the dimensions (one additional record is allocated, as the record being written is never read)
+        self._capacity, self._slots = size + 1, slots
+
+        # Calculate the offsets of each array within the block
+        names_offset = 8
+        heads_offset = names_offset + KEY_LENGTH * slots
+        times_offset = heads_offset + 8 * slots
+        values_offset = times_offset + 8 * slots * self._capacity
+
+        # Attach to the existing block, or create a new one
+        self._memory, created = open_block(values_offset + 8 * slots * self._capacity, ENVIRONMENT_KEY, name)
+
+        # Remember the process which created the block, to remove it on exit
+        if created:
+            self._owner = os.getpid()
+            atexit.register(self.close)
+        else:
+            self._owner = None
+
+        # Build the arrays - number of assigned slots, key of each slot, number of records appended to each slot, and
+        # the records themselves
+        buffer = self._memory.buf
+        self._count = np.ndarray((1,), dtype=np.int64, buffer=buffer)
+        self._names = np.ndarray((slots,), dtype="S{}".format(KEY_LENGTH), buffer=buffer, offset=names_offset)
+        self._heads = np.ndarray((slots,), dtype=np.int64, buffer=buffer, offset=heads_offset)
+        self._times = np.ndarray((slots, self._capacity), dtype=np.float64, buffer=buffer, offset=times_offset)
+        self._values = np.ndarray((slots, self._capacity), dtype=np.float64, buffer=buffer, offset=values_offset)
+
+        # Initialise the lock shared between the writers (passed to the other processes together with the history)
+        self._lock = helpers.mp.Lock() if lock is None else lock
+
+        # Initialise the process-local mapping of keys to slots
+        self._index = dict()
+
+    def keys(self) -> list:
+        """
+        Function used to list the recorded keys.
+
+        :return: List of keys
+        """
+
+        return [name.decode("utf-8") for name in self._names[:self._count[0]]]
+
+    def append(self, data: dict, timestamp: float):
+        """
+        Function used to record the values.
+
+        :param data: Dictionary of values to record
+        :param timestamp: Time of the modification (seconds)
+        """
+
+        with self._lock:
+
+            for key, value in data.items():
+
+                # Ignore the non-numeric values
+                if not isinstance(value, Real):
+                    continue
+
+                # Find the slot, ignore the key if no slots are left
+                slot = self._slot(key)
+                if slot is None:
+                    continue
+
+                # Write the record at the head of the ring, and move the head afterwards
+                head = self._heads[slot]
+                self._times[slot, head % self._capacity] = timestamp
+                self._values[slot, head % self._capacity] = value
+                self._heads[slot] = head + 1
+
+    def range(self, key, start=None, end=None) -> tuple:
+        """
+        Function used to return the records within a time range.
+
+        Only the records within the range are copied.
+
+        :param key: Key to return the records of
+        :param start: Start of the range (inclusive), defaults to the oldest record
+        :param end: End of the range (exclusive), defaults to the newest record
+        :return: Tuple of the timestamps' array and the values' array
+        """
+
+        # Initialise the parts of the records
+        times, values = [self.EMPTY], [self.EMPTY]
+
+        # Find the slot, return empty arrays if the key wasn't recorded
+        slot = self._find(key)
+        if slot is None:
+            return times[0], values[0]
+
+        # Remember the head counter before copying
+        head = int(self._heads[slot])
+
+        # Copy the records within the range from each chronological part of the ring, remembering the counter of the
+        # first record copied from each part
+        counters = list()
+        for counter, segment_times, segment_values in self._segments(slot, max(0, head - self._capacity), head):
+            first = 0 if start is None else int(np.searchsorted(segment_times, start, side="left"))
+            last = len(segment_times) if end is None else int(np.searchsorted(segment_times, end, side="left"))
+            counters.append(counter + first)
+            times.append(segment_times[first:last].copy())
+            values.append(segment_values[first:last].copy())
+
+        # Discard the records overwritten while copying (including the one being written)
+        oldest = int(self._heads[slot]) + 1 - self._capacity
+        for i, counter in enumerate(counters, 1):
+            if counter < oldest:
+                times[i], values[i] = times[i][oldest - counter:], values[i][oldest - counter:]
+
+        return np.concatenate(times), np.concatenate(values)
+
+    def downsample(self, key, buckets, start=None, end=None) -> tuple:
+        """
+        Function used to reduce the records within a time range to a number of equally long time buckets.
+
+        Empty buckets are skipped, which makes the result suitable to be plotted at screen resolution.
+
+        :param key: Key to return the records of
+        :param buckets: Number of buckets
+        :param start: Start of the range (inclusive), defaults to the oldest record
+        :param end: End of the range (exclusive), defaults to the newest record
+        :return: Tuple of the buckets' start times, and the minimum, maximum and mean values' arrays
+        """
+
+        # Fetch the records
+        times, values = self.range(key, start, end)
+
+        # Return empty arrays if nothing was recorded
+        if not len(times):
+            return times, values, values, values
+
+        # Calculate the bucket of each record
+        start = times[0] if start is None else start
+        end = times[-1] if end is None else end
+        width = (end - start) / buckets or 1
+        indices = np.minimum(((times - start) // width).astype(np.int64), buckets - 1)
+
+        # Find where each non-empty bucket begins (records are sorted by time)
+        boundaries = np.flatnonzero(np.diff(indices, prepend=-1))
+        counts = np.diff(boundaries, append=len(values))
+
+        return (start + indices[boundaries] * width, np.minimum.reduceat(values, boundaries),
+                np.maximum.reduceat(values, boundaries), np.add.reduceat(values, boundaries) / counts)
+
+    def close(self):
+        """
+        Function used to release the block. The block is removed if it was created by the current process.
+        """
+
+        # Release the arrays and the block (ignore repeated calls)
+        if self._values is not None:
+            self._count = self._names = self._heads = self._times = self._values = None
+            self._memory.close()
+
+            # Only remove the block from the process which created it
+            if self._owner == os.getpid():
+                self._memory.unlink()
+
+    def __getstate__(self) -> dict:
+        """
+        Function used to pickle the history as the block's dimensions and name, and the writers' lock (only possible
+        while starting a new process).
+
+        :return: Dictionary of the pickled state
+        """
+
+        return {"size": self._capacity - 1, "slots": self._slots, "name": self._memory.name, "lock": self._lock}
+
+    def __setstate__(self, state: dict):
+        """
+        Function used to attach to the pickled block, using the pickled writers' lock.
+
+        :param state: Dictionary returned by :func:`__getstate__`
+        """
+
+        self.__init__(**state)
+
+    def _slot(self, key):
+        """
+        Function used to find the slot of a key, or assign a new one. Must be called with the lock acquired.
+
+        :param key: Key to find the slot of
+        :return: Index of the slot, or None if no slots are left (or the key is too long)
+        """
+
+        # Find the slot assigned by any process
+        slot = self._find(key)
+
+        # Assign a new slot if needed
+        if slot is None:
+            name = key.encode("utf-8")
+
+            # Ignore the key if it can't be stored
+            if self._count[0] == self._slots or len(name) > KEY_LENGTH:
+                return None
+
+            slot = int(self._count[0])
+            self._names[slot] = name
+            self._heads[slot] = 0
+            self._count[0] = slot + 1
+            self._index[key] = slot
+
+        return slot
+
+    def _find(self, key):
+        """
+        Function used to find the slot of a key, without assigning a new one.
+
+        :param key: Key to find the slot of
+        :return: Index of the slot, or None if the key wasn't recorded
+        """
+
+        # Refresh the slots assigned by the other processes if the key is unknown
+        if key not in self._index:
+            self._index.update({known.decode("utf-8"): i for i, known in enumerate(self._names[:self._count[0]])})
+
+        return self._index.get(key)
+
+    def _segments(self, slot, first, last) -> list:
+        """
+        Function used to split a range of the records into the chronological, contiguous parts of the ring.
+
+        :param slot: Index of the slot
+        :param first: Counter of the first record
+        :param last: Counter after the last record
+        :return: List of (counter, timestamps, values) tuples, where the arrays are views of the ring, oldest first
+        """
+
+        # Return no parts for an empty range
+        if first >= last:
+            return list()
+
+        # Find the positions of the range within the ring
+        begin, end = first % self._capacity, (last - 1) % self._capacity + 1
+
+        # Return a single part if the range doesn't wrap around
+        if begin < end:
+            return [(first, self._times[slot, begin:end], self._values[slot, begin:end])]
+
+        return [(first, self._times[slot, begin:], self._values[slot, begin:]),
+                (first + self._capacity - begin, self._times[slot, :end], self._values[slot, :end])]
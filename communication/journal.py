@@ -0,0 +1,329 @@
+"""
+Journal
+*******
+
+Description
+===========
+
+This module is used to persist every modification of the data manager, so that the commands sent to and the telemetry
+received from the Raspberry Pi can be replayed after a dive.
+
+Functionality
+=============
+
+Journal
+-------
+
+The :class:`Journal` class appends the modifications to a binary, append-only log. The modifications are queued by any
+process (which never blocks on the disc), and written by a single background thread in the process which created the
+journal. The thread writes the queued records in batches, and synchronises the log and its index with the disc at most
+once per `FSYNC_DELAY` - and, once nothing is queued, at most `FSYNC_DELAY` after the last batch was written.
+
+Each record is length-prefixed, and consists of::
+
+    <I length of the rest of the record><d timestamp><packed schema values><JSON of the other keys>
+
+where the values are encoded with :func:`pack_data` (the same way as the binary messages sent to the Raspberry Pi), and
+the JSON part is empty if no other keys were modified. A record whose values can't be encoded (for example a value which
+doesn't fit its field) is reported and skipped, without stopping the thread.
+
+Every `INDEX_INTERVAL` records, a (timestamp, offset) entry is appended to the index file (the log's path followed by
+`.index`), which lets the reader find any timestamp with a binary search.
+
+JournalReader
+-------------
+
+The :class:`JournalReader` class reads the log lazily. A truncated record at the end of the log (for example after a
+power loss) is ignored.
+
+.. note::
+
+    The records are sorted within each written batch, but the modifications queued by different processes at nearly the
+    same time may still be slightly out of order between the batches.
+
+Execution
+---------
+
+The journal is created by the :class:`DataManager` once it's enabled, before any other processes are started::
+
+    dm.enable_journal("dive.log")
+
+To replay the log, create an instance of :class:`JournalReader` and iterate over the records::
+
+    for timestamp, data in JournalReader("dive.log").replay(start=dive_start):
+        print(timestamp, data)
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`Journal` class:
+
+    1. :func:`__init__` opens the files and starts the writing thread
+    2. :func:`record` queues a modification
+    3. :func:`close` writes the queued records and stops the thread
+    4. :func:`__getstate__` pickles the journal's queue, to record from the spawned processes
+    5. :func:`__setstate__` restores the pickled journal's queue
+    6. :func:`_write` runs an infinite loop to keep writing the queued records
+
+The following list shortly summarises the functionality of each code component within the :class:`JournalReader`
+class:
+
+    1. :func:`__init__` opens the files
+    2. :func:`seek` finds the offset to start reading from
+    3. :func:`replay` iterates over the records
+
+Modifications
+=============
+
+You should adjust the `FSYNC_DELAY` to trade the durability for the disc usage, and the `INDEX_INTERVAL` to trade the
+index size for the seeking time.
+"""
+
+import atexit
+import os
+import struct
+from communication.protocol import pack_data, unpack_data
+from pathos import helpers
+from queue import Empty
+from threading import Thread
+from time import time
+
+# Declare the maximum delay between the disc synchronisations (seconds)
+FSYNC_DELAY = 1
+
+# Declare the number of records between the index entries
+INDEX_INTERVAL = 256
+
+# Declare the maximum number of records written at once
+BATCH_SIZE = 1024
+
+# Declare the record header (length of the rest of the record, timestamp) and the index entry (timestamp, offset)
+HEADER = struct.Struct("<Id")
+INDEX_ENTRY = struct.Struct("<dQ")
+
+
+class Journal:
+
+    def __init__(self, path):
+        """
+        Constructor function used to open the log and its index, and start the writing thread.
+
+        :param path: Path to the log (appended to, if it already exists)
+        """
+
+        # Open the files for appending
+        self._log = open(path, "ab")
+        self._index = open(path + ".index", "ab")
+
+        # Remember the current end of the log, and count the records to know when to index them
+        self._offset = self._log.seek(0, os.SEEK_END)
+        self._count = 0
+
+        # Initialise the queue shared with the processes started afterwards
+        self._queue = helpers.mp.Queue()
+
+        # Remember the process which owns the files
+        self._owner = os.getpid()
+
+        # Start the writing thread, and write the remaining records on exit
+        self._thread = Thread(target=self._write, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, data: dict, timestamp: float):
+        """
+        Function used to queue a modification. Never blocks on the disc.
+
+        :param data: Dictionary of the modified values
+        :param timestamp: Time of the modification (seconds)
+        """
+
+        self._queue.put((timestamp, data))
+
+    def close(self):
+        """
+        Function used to write the queued records and stop the thread. Only has effect in the process owning the files.
+        """
+
+        # Ignore repeated calls and calls from other processes
+        if self._owner != os.getpid() or self._log.closed:
+            return
+
+        # Stop the thread once it writes all queued records
+        self._queue.put(None)
+        self._thread.join()
+
+        # Synchronise and close the files
+        for file in (self._log, self._index):
+            file.flush()
+            os.fsync(file.fileno())
+            file.close()
+
+    def __getstate__(self) -> dict:
+        """
+        Function used to pickle the journal as its queue and owner (only possible while starting a new process). The
+        files and the writing thread stay in the owning process.
+
+        :return: Dictionary of the pickled state
+        """
+
+        return {"queue": self._queue, "owner": self._owner}
+
+    def __setstate__(self, state: dict):
+        """
+        Function used to restore the pickled journal, which only queues the records for the owning process.
+
+        :param state: Dictionary returned by :func:`__getstate__`
+        """
+
+        self._queue = state["queue"]
+        self._owner = state["owner"]
+
+    def _write(self):
+        """
+        Function used to keep writing the queued records in batches.
+        """
+
+        # Initialise the time of the last synchronisation, and remember if anything was written since
+        synchronised = time()
+        dirty = False
+
+        # Keep writing until stopped
+        while True:
+
+            # Wait for a record, synchronise the files if nothing was queued for a while
+            try:
+                records = [self._queue.get(timeout=FSYNC_DELAY)]
+            except Empty:
+                records = list()
+
+            # Fetch all other queued records (up to the batch size)
+            while len(records) < BATCH_SIZE:
+                try:
+                    records.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            # Check if the journal was closed
+            stopped = None in records
+            records = sorted((record for record in records if record is not None), key=lambda record: record[0])
+
+            # Encode the records, indexing every `INDEX_INTERVAL` records
+            chunks = list()
+            for timestamp, data in records:
+
+                # Encode the values the same way as the binary messages, skipping the record if they can't be encoded
+                try:
+                    body = pack_data(data)
+                except (struct.error, TypeError, ValueError) as error:
+                    print("Failed to journal the record at {}: {}".format(timestamp, error))
+                    continue
+
+                # Add the index entry
+                if not self._count % INDEX_INTERVAL:
+                    self._index.write(INDEX_ENTRY.pack(timestamp, self._offset))
+
+                chunks.append(HEADER.pack(HEADER.size - 4 + len(body), timestamp))
+                chunks.append(body)
+                self._offset += HEADER.size + len(body)
+                self._count += 1
+
+            # Write the batch at once
+            if chunks:
+                self._log.write(b''.join(chunks))
+                dirty = True
+
+            # Synchronise the files if anything was written and enough time passed since the last synchronisation (also
+            # while nothing is queued, so that the last batch isn't left in the buffers)
+            if dirty and (stopped or time() - synchronised >= FSYNC_DELAY):
+                for file in (self._log, self._index):
+                    file.flush()
+                    os.fsync(file.fileno())
+                synchronised = time()
+                dirty = False
+
+            if stopped:
+                break
+
+
+class JournalReader:
+
+    def __init__(self, path):
+        """
+        Constructor function used to open the log and its index for reading.
+
+        :param path: Path to the log
+        """
+
+        self._path = path
+        self._index_path = path + ".index"
+
+    def seek(self, timestamp) -> int:
+        """
+        Function used to find the offset of the last indexed record at or before the timestamp, with a binary search.
+
+        :param timestamp: Timestamp to find (seconds)
+        :return: Offset within the log
+        """
+
+        # Return the start of the log if the index doesn't exist
+        if not os.path.exists(self._index_path):
+            return 0
+
+        with open(self._index_path, "rb") as index:
+
+            # Find the number of complete entries
+            count = index.seek(0, os.SEEK_END) // INDEX_ENTRY.size
+
+            # Keep halving the range of entries, reading one entry per step
+            low, high, offset = 0, count, 0
+            while low < high:
+                middle = (low + high) // 2
+                index.seek(middle * INDEX_ENTRY.size)
+                entry_timestamp, entry_offset = INDEX_ENTRY.unpack(index.read(INDEX_ENTRY.size))
+
+                if entry_timestamp <= timestamp:
+                    low, offset = middle + 1, entry_offset
+                else:
+                    high = middle
+
+        return offset
+
+    def replay(self, start=None, end=None):
+        """
+        Function used to lazily iterate over the records within a time range.
+
+        :param start: Start of the range (inclusive timestamp), defaults to the beginning of the log
+        :param end: End of the range (exclusive timestamp), defaults to the end of the log
+        :return: Generator of (timestamp, data) tuples
+        """
+
+        with open(self._path, "rb") as log:
+
+            # Move to the closest indexed record
+            log.seek(0 if start is None else self.seek(start))
+
+            while True:
+
+                # Read the header, stop on a truncated record
+                header = log.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return
+                length, timestamp = HEADER.unpack(header)
+
+                # Read the rest of the record, stop on a truncated record
+                body = log.read(length - HEADER.size + 4)
+                if len(body) < length - HEADER.size + 4:
+                    return
+
+                # Skip the records before the range, stop after the range
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    return
+
+                yield timestamp, unpack_data(body)
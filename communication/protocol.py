@@ -0,0 +1,420 @@
+"""
+Protocol
+********
+
+Description
+===========
+
+This module is used to frame the messages exchanged with the Raspberry Pi, so that they can be safely sent over a stream
+socket, regardless of how the stream is split or coalesced by TCP.
+
+Functionality
+=============
+
+Framing
+-------
+
+Each message consists of a fixed-size header followed by the payload::
+
+    <I length of the payload><B message type><payload>
+
+The following message types are supported:
+
+    1. `JSON` - UTF-8 encoded JSON object
+    2. `BINARY` - values of the declared keys packed with :func:`Schema.pack`, followed by the JSON object of the other
+       keys (empty if no other keys are present)
+
+The binary payload is 46 bytes for any set of the declared keys, and is much cheaper to encode and decode than JSON.
+
+A `HEARTBEAT` message carries a sequence number and the sender's :func:`time.monotonic` timestamp, and is echoed back
+unchanged by the receiver - the sender calculates the round-trip time once the echo arrives.
+
+Either type can be combined with the `DELTA` flag, in which case the payload only contains the values which changed, and
+should be applied on top of the previously received values. The binary values of a delta are packed sparsely.
+
+Delta encoding
+--------------
+
+The :class:`DeltaEncoder` class frames only the values which changed since the last acknowledged message, so that an
+idle pilot costs a few bytes per message. Each value is compared against the last acknowledged one (rather than the last
+sent one), so a lost or unanswered message is covered by the next one. A full message (keyframe) is sent every
+`KEYFRAME_INTERVAL` messages, and after each reset (for example on reconnection).
+
+The :class:`DeltaDecoder` class is the reference implementation of the receiving side - it keeps the latest values, and
+updates them with each received message.
+
+Decoder
+-------
+
+The :class:`Decoder` class reassembles the messages incrementally - it can be fed with any chunks of the stream, and
+returns every message completed by each chunk (none, if the chunk only contained a part of a message).
+
+Execution
+---------
+
+To frame a dictionary, call :func:`encode_data`, and feed the received bytes into a :class:`Decoder`::
+
+    connection.sendall(encode_data({"Mot_G": 1500}, BINARY))
+
+    decoder = Decoder()
+    for message_type, payload in decoder.feed(connection.recv(4096)):
+        data = decode_data(message_type, payload)
+
+To send the deltas instead, use a :class:`DeltaEncoder`, and acknowledge each message once a reply is received::
+
+    encoder = DeltaEncoder(BINARY)
+    connection.sendall(encoder.encode({"Mot_G": 1500}))
+    encoder.acknowledge()
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the module:
+
+    1. :class:`ProtocolError` is a support class to handle the malformed streams
+    2. :func:`pack_data` and :func:`unpack_data` encode and decode the binary payload
+    3. :func:`encode` frames a payload
+    4. :func:`encode_payload` encodes a dictionary into a payload
+    5. :func:`encode_data` frames a dictionary
+    6. :func:`decode_data` decodes the dictionary from a payload
+    7. :func:`encode_heartbeat` and :func:`decode_heartbeat` frame and decode a heartbeat
+
+The following list shortly summarises the functionality of each code component within the :class:`Decoder` class:
+
+    1. :func:`__init__` initialises the buffer
+    2. :func:`feed` appends the received bytes and returns the completed messages
+    3. :func:`reset` discards the buffered bytes
+
+The following list shortly summarises the functionality of each code component within the :class:`DeltaEncoder` class:
+
+    1. :func:`__init__` initialises the acknowledged values
+    2. :func:`encode` frames the changed values (or a keyframe)
+    3. :func:`acknowledge` marks the last encoded values as received
+    4. :func:`reset` forces a keyframe
+
+The following list shortly summarises the functionality of each code component within the :class:`DeltaDecoder` class:
+
+    1. :func:`__init__` initialises the received values
+    2. :func:`decode` applies a message to the received values
+    3. :func:`reset` discards the received values
+
+Modifications
+=============
+
+You should add the new message types as constants, and handle them in :func:`decode_data` (or wherever the messages are
+received). Never change the value of an existing type, as the types are shared with the Raspberry Pi. You should also
+consider modifying the `MAX_LENGTH` if bigger messages are expected, and the `KEYFRAME_INTERVAL` to trade the bandwidth
+for the recovery time of a receiver which lost its values.
+"""
+
+import struct
+from communication.schema import SCHEMA
+from json import dumps, loads
+
+# Declare the message header - length of the payload and the message type
+HEADER = struct.Struct("<IB")
+
+# Declare the message types, and the flag marking the messages which only contain the changed values
+JSON = 0
+BINARY = 1
+HEARTBEAT = 2
+DELTA = 0x80
+
+# Declare the heartbeat's payload - sequence number and the sender's timestamp
+HEARTBEAT_PAYLOAD = struct.Struct("<Qd")
+
+# Declare the maximum length of a payload (bytes), longer messages are treated as a malformed stream
+MAX_LENGTH = 1 << 20
+
+# Declare the number of delta messages between the keyframes
+KEYFRAME_INTERVAL = 100
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def pack_data(data: dict, *, sparse=False) -> bytes:
+    """
+    Function used to encode the values into the binary payload.
+
+    :param data: Dictionary of values to encode
+    :param sparse: Whether the declared keys should be packed sparsely
+    :return: Packed values of the declared keys, followed by the JSON object of the other keys (if any)
+    """
+
+    # Split the other keys from the declared keys
+    extra = {key: value for key, value in data.items() if key not in SCHEMA}
+
+    return SCHEMA.pack(data, sparse=sparse) + (bytes(dumps(extra, default=repr), encoding="utf-8") if extra else b'')
+
+
+def unpack_data(payload, *, sparse=False) -> dict:
+    """
+    Function used to decode the values from the binary payload.
+
+    :param payload: Bytes (or any other buffer) returned by :func:`pack_data`
+    :param sparse: Whether the declared keys were packed sparsely
+    :return: Dictionary of the decoded values
+    """
+
+    # Decode the declared keys, and the other keys if present
+    size = SCHEMA.sparse_size(payload) if sparse else SCHEMA.size
+    data = SCHEMA.unpack(payload[:size], sparse=sparse)
+    if len(payload) > size:
+        extra = loads(bytes(payload[size:]).decode("utf-8"))
+        if not isinstance(extra, dict):
+            raise ProtocolError("Invalid binary payload: expected an object after the values, received {}".format(
+                type(extra).__name__))
+        data.update(extra)
+
+    return data
+
+
+def encode(message_type: int, payload: bytes) -> bytes:
+    """
+    Function used to frame a payload.
+
+    :param message_type: Type of the message
+    :param payload: Encoded message
+    :return: Header followed by the payload
+    """
+
+    return HEADER.pack(len(payload), message_type) + payload
+
+
+def encode_payload(data: dict, message_type=JSON) -> bytes:
+    """
+    Function used to encode a dictionary into a payload (without the header).
+
+    :param data: Dictionary of values to send
+    :param message_type: Either `JSON` or `BINARY`, optionally combined with the `DELTA` flag
+    :return: Encoded payload
+    """
+
+    if message_type & ~DELTA == BINARY:
+        return pack_data(data, sparse=bool(message_type & DELTA))
+
+    return bytes(dumps(data), encoding="utf-8")
+
+
+def encode_data(data: dict, message_type=JSON) -> bytes:
+    """
+    Function used to frame a dictionary.
+
+    :param data: Dictionary of values to send
+    :param message_type: Either `JSON` or `BINARY`, optionally combined with the `DELTA` flag
+    :return: Framed message
+    """
+
+    return encode(message_type, encode_payload(data, message_type))
+
+
+def decode_data(message_type: int, payload) -> dict:
+    """
+    Function used to decode a dictionary from a payload.
+
+    :param message_type: Type of the message, either `JSON` or `BINARY`, optionally combined with the `DELTA` flag
+    :param payload: Received payload
+    :return: Dictionary of the received values
+    """
+
+    if message_type & ~DELTA == BINARY:
+        try:
+            return unpack_data(payload, sparse=bool(message_type & DELTA))
+        except struct.error as error:
+            raise ProtocolError("Invalid binary payload: {}".format(error))
+
+    if message_type & ~DELTA == JSON:
+        data = loads(bytes(payload).decode("utf-8"))
+        if not isinstance(data, dict):
+            raise ProtocolError("Invalid JSON payload: expected an object, received {}".format(type(data).__name__))
+        return data
+
+    raise ProtocolError("Unexpected message type: {}".format(message_type))
+
+
+def encode_heartbeat(sequence: int, timestamp: float) -> bytes:
+    """
+    Function used to frame a heartbeat.
+
+    :param sequence: Sequence number of the heartbeat
+    :param timestamp: Sender's time of sending (seconds)
+    :return: Framed message
+    """
+
+    return encode(HEARTBEAT, HEARTBEAT_PAYLOAD.pack(sequence, timestamp))
+
+
+def decode_heartbeat(payload) -> tuple:
+    """
+    Function used to decode a heartbeat (or its echo).
+
+    :param payload: Received payload
+    :return: Tuple of the sequence number and the sender's timestamp
+    """
+
+    try:
+        return HEARTBEAT_PAYLOAD.unpack(payload)
+    except struct.error as error:
+        raise ProtocolError("Invalid heartbeat payload: {}".format(error))
+
+
+class Decoder:
+
+    def __init__(self):
+        """
+        Constructor function used to initialise the buffer of the incomplete message.
+        """
+
+        self._buffer = bytearray()
+
+    def feed(self, data) -> list:
+        """
+        Function used to append the received bytes, and return the messages they completed.
+
+        Raises :class:`ProtocolError` if the stream is malformed, after which the decoder should be reset (along with
+        the connection, as the message boundaries are lost).
+
+        :param data: Received bytes
+        :return: List of (message type, payload) tuples, in the order of arrival
+        """
+
+        # Append the data to the incomplete message
+        buffer = self._buffer
+        buffer += data
+
+        # Extract all complete messages
+        messages, offset = list(), 0
+        while len(buffer) - offset >= HEADER.size:
+
+            # Read the header, and check if the length makes sense
+            length, message_type = HEADER.unpack_from(buffer, offset)
+            if length > MAX_LENGTH:
+                raise ProtocolError("Message too long: {} bytes".format(length))
+
+            # Stop if the payload wasn't fully received yet
+            end = offset + HEADER.size + length
+            if end > len(buffer):
+                break
+
+            messages.append((message_type, bytes(buffer[offset + HEADER.size:end])))
+            offset = end
+
+        # Discard the extracted messages at once
+        if offset:
+            del buffer[:offset]
+
+        return messages
+
+    def reset(self):
+        """
+        Function used to discard the buffered bytes (for example on reconnection).
+        """
+
+        self._buffer.clear()
+
+
+class DeltaEncoder:
+
+    def __init__(self, message_type=JSON, *, keyframe_interval=KEYFRAME_INTERVAL):
+        """
+        Constructor function used to initialise the encoder.
+
+        :param message_type: Type of the messages, either `JSON` or `BINARY`
+        :param keyframe_interval: Number of messages between the keyframes
+        """
+
+        self._message_type = message_type
+        self._keyframe_interval = keyframe_interval
+
+        # Initialise the acknowledged values (None until a keyframe is acknowledged), the values after the last encoded
+        # message, and the number of messages since the last keyframe
+        self._acknowledged = None
+        self._sent = None
+        self._count = 0
+
+    def encode(self, data: dict) -> bytes:
+        """
+        Function used to frame the values which changed since the last acknowledged message, or all values if a
+        keyframe is due.
+
+        :param data: Dictionary of all current values
+        :return: Framed message
+        """
+
+        # Send a keyframe if nothing was acknowledged yet, or enough messages were sent since the last one
+        if self._acknowledged is None or self._count >= self._keyframe_interval:
+            self._sent, self._count = dict(data), 1
+            return encode_data(data, self._message_type)
+
+        # Otherwise send the values which changed since the last acknowledged message, or since the last sent message
+        # (as the receiver may have received the messages which weren't acknowledged yet)
+        acknowledged, sent = self._acknowledged, self._sent
+        changes = {key: value for key, value in data.items()
+                   if key not in acknowledged or acknowledged[key] != value or sent[key] != value}
+        sent.update(changes)
+        self._count += 1
+
+        return encode_data(changes, self._message_type | DELTA)
+
+    def acknowledge(self):
+        """
+        Function used to mark the last encoded message (and so all previous ones) as received.
+        """
+
+        if self._sent is not None:
+            self._acknowledged = dict(self._sent)
+
+    def reset(self):
+        """
+        Function used to forget the acknowledged values, so that the next message is a keyframe.
+        """
+
+        self._acknowledged = self._sent = None
+        self._count = 0
+
+
+class DeltaDecoder:
+
+    def __init__(self):
+        """
+        Constructor function used to initialise the received values.
+        """
+
+        self._data = None
+
+    def decode(self, message_type: int, payload) -> dict:
+        """
+        Function used to apply a received message to the values.
+
+        :param message_type: Type of the message
+        :param payload: Received payload
+        :return: Dictionary of all current values
+        """
+
+        data = decode_data(message_type, payload)
+
+        # Replace the values with a keyframe
+        if not message_type & DELTA:
+            self._data = data
+
+        # Update the values with a delta, which can't be applied before the first keyframe
+        elif self._data is None:
+            raise ProtocolError("Received a delta before any keyframe")
+
+        else:
+            self._data.update(data)
+
+        return dict(self._data)
+
+    def reset(self):
+        """
+        Function used to discard the values (for example on reconnection).
+        """
+
+        self._data = None
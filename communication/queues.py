@@ -0,0 +1,193 @@
+"""
+Queues
+******
+
+Description
+===========
+
+This module is used to provide the bounded queues connecting the pipelines (for example the sending and the receiving
+threads of a connection), which never block the producer.
+
+Functionality
+=============
+
+DroppingQueue
+-------------
+
+The :class:`DroppingQueue` class is a bounded :class:`queue.Queue`, which discards the oldest item instead of blocking
+when a new item is put into a full queue. It's meant for the items superseded by the newer ones (for example the control
+setpoints, or the camera frames), where delivering the latest item quickly matters more than delivering every item. The
+number of discarded items is counted.
+
+FrameMailbox
+------------
+
+The :class:`FrameMailbox` class keeps only the latest camera frame, together with its sequence number (increasing with
+each received frame) and the time it was received. The consumers either read the latest frame without blocking, or wait
+until a frame newer than the one they've already seen arrives - so a display or a vision worker only wakes up when there
+is a new frame, rather than spinning over the same one.
+
+Execution
+---------
+
+Use the queue as any other :class:`queue.Queue`::
+
+    queue = DroppingQueue(1)
+    queue.put({"Mot_G": 1600})
+    queue.put({"Mot_G": 1700})  # discards the first item
+    queue.get()  # returns {"Mot_G": 1700}
+    queue.dropped  # returns 1
+
+To consume each new frame of a mailbox, remember the sequence number of the last one::
+
+    received = mailbox.wait_for_frame(0)
+    while True:
+        process(received.frame)
+        received = mailbox.wait_for_frame(received.sequence)
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`DroppingQueue`
+class:
+
+    1. :func:`__init__` builds the queue
+    2. :func:`dropped` is a getter for the number of discarded items
+    3. :func:`put` adds an item, discarding the oldest one if the queue is full
+
+The following list shortly summarises the functionality of each code component within the :class:`FrameMailbox` class:
+
+    1. :func:`__init__` builds the empty mailbox
+    2. :func:`sequence` is a getter for the sequence number of the latest frame
+    3. :func:`put` replaces the latest frame, unless a newer frame was put already
+    4. :func:`latest` returns the latest frame without blocking
+    5. :func:`wait_for_frame` blocks until a frame newer than the given one is put
+"""
+
+from collections import namedtuple
+from queue import Queue
+from threading import Condition
+
+# Declare the frame stored in a mailbox, with its sequence number and the time it was received
+ReceivedFrame = namedtuple("ReceivedFrame", ("sequence", "timestamp", "frame"))
+
+
+class DroppingQueue(Queue):
+
+    def __init__(self, maxsize=1):
+        """
+        Constructor function used to initialise the queue.
+
+        :param maxsize: Maximum number of items, must be positive
+        """
+
+        if maxsize <= 0:
+            raise ValueError("The size of a dropping queue must be positive")
+
+        super().__init__(maxsize)
+
+        # Initialise the number of discarded items
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        """
+        Getter for the number of discarded items.
+
+        :return: Number of items discarded since the queue was created
+        """
+
+        return self._dropped
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Function used to add an item, discarding the oldest item if the queue is full. Never blocks.
+
+        :param item: Item to add
+        :param block: Ignored, kept for compatibility with :class:`queue.Queue`
+        :param timeout: Ignored, kept for compatibility with :class:`queue.Queue`
+        """
+
+        with self.not_full:
+
+            # Discard the oldest item if needed (it's treated as done, so that joining the queue doesn't wait for it)
+            if self._qsize() >= self.maxsize:
+                self._get()
+                self._dropped += 1
+                self.unfinished_tasks -= 1
+
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+
+class FrameMailbox:
+
+    def __init__(self):
+        """
+        Constructor function used to initialise the empty mailbox.
+        """
+
+        # Initialise the latest frame (None until the first frame is put), and the condition notified on each new frame
+        self._latest = None
+        self._changed = Condition()
+
+    @property
+    def sequence(self) -> int:
+        """
+        Getter for the sequence number of the latest frame.
+
+        :return: Sequence number of the latest frame, 0 if no frame was put yet
+        """
+
+        latest = self._latest
+
+        return latest.sequence if latest is not None else 0
+
+    def put(self, frame, sequence: int, timestamp: float) -> bool:
+        """
+        Function used to replace the latest frame and wake up the waiting consumers, unless a newer frame was put
+        already (for example when the frames are decoded out of order). Never blocks for long.
+
+        :param frame: Frame to store
+        :param sequence: Sequence number of the frame, must be positive
+        :param timestamp: Time the frame was received (seconds)
+        :return: True if the frame was stored, False if it was older than the latest frame
+        """
+
+        with self._changed:
+            if sequence <= self.sequence:
+                return False
+
+            self._latest = ReceivedFrame(sequence, timestamp, frame)
+            self._changed.notify_all()
+
+        return True
+
+    def latest(self):
+        """
+        Function used to return the latest frame without blocking.
+
+        :return: Latest :class:`ReceivedFrame`, or None if no frame was put yet
+        """
+
+        return self._latest
+
+    def wait_for_frame(self, after_seq=0, timeout=None):
+        """
+        Function used to block until a frame newer than the given one is put.
+
+        :param after_seq: Sequence number of the last frame seen by the consumer (0 to wait for any frame)
+        :param timeout: Maximum time to wait (seconds), waits indefinitely if None
+        :return: Latest :class:`ReceivedFrame`, or None if the time ran out
+        """
+
+        with self._changed:
+            if not self._changed.wait_for(lambda: self.sequence > after_seq, timeout):
+                return None
+
+            return self._latest
@@ -0,0 +1,485 @@
+"""
+Recorder
+********
+
+Description
+===========
+
+This module is used to record what the cameras see during a dive, by writing the video streams' frames to the disc.
+
+Functionality
+=============
+
+Recorder
+--------
+
+The :class:`Recorder` class taps each :class:`VideoStream` (see :func:`VideoStream.tap`), and puts each published frame
+into a bounded :class:`DroppingQueue`. A single background thread takes the frames from the queue and writes them to the
+disc, so the reception never waits for the disc - if the disc falls behind and the queue is full, the oldest queued
+frame is discarded instead, and counted as dropped.
+
+Each camera is recorded into its own files within the recording's directory, in either of the following formats:
+
+    1. `raw` - a single indexed container (`camera<index>.frames`), consisting of the framed raw frames (see the
+       :mod:`communication.frames` module), written straight from the decoded frames' memory
+    2. `video` - the :class:`cv2.VideoWriter` segments (`camera<index>_<segment>.avi`), each holding at most
+       `SEGMENT_FRAMES` frames (a new segment is also started if the frame size changes) - the numbering continues from
+       the segments already recorded into the directory, so they are never overwritten
+
+Either way, an entry is appended to the camera's index (`camera<index>.index`) for each frame::
+
+    <I sequence><d timestamp><I segment><Q offset>
+
+where the sequence number and the receive timestamp come from the video stream, and the offset is the frame's byte
+offset within the container (the segment is always 0), or the frame's position within the segment.
+
+The files are synchronised with the disc at most once per `FSYNC_DELAY`. A frame which can't be encoded (for example of
+an unsupported pixel type) is reported and skipped, without stopping the thread.
+
+RecordingReader
+---------------
+
+The :class:`RecordingReader` class reads a camera's recording lazily, using the index to find the frames within a time
+range. A truncated frame at the end of the container (for example after a power loss) is ignored.
+
+Execution
+---------
+
+To record the streams, create an instance of :class:`Recorder` and start it (the streams can be started before or
+after)::
+
+    recorder = Recorder("recordings/dive", streams, form="raw")
+    recorder.start()
+    ...
+    recorder.stop()
+    recorder.dropped  # returns the number of the frames dropped because the disc fell behind
+
+To replay a camera's recording, create an instance of :class:`RecordingReader` and iterate over the frames::
+
+    for sequence, timestamp, frame in RecordingReader("recordings/dive", camera=0).replay(start=dive_start):
+        imshow("camera", frame)
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`Recorder` class:
+
+    1. :func:`__init__` creates the recording's directory and the queue
+    2. :func:`recorded` is a getter for the number of the recorded frames
+    3. :func:`recorded_bytes` is a getter for the number of the recorded frames' bytes
+    4. :func:`dropped` is a getter for the number of the dropped frames
+    5. :func:`start` opens the files, starts the writing thread and taps the streams
+    6. :func:`stop` removes the taps, writes the queued frames and stops the thread
+    7. :func:`_tap` builds the function queueing a camera's frames
+    8. :func:`_last_segment` finds the number of a camera's last segment recorded into the directory
+    9. :func:`_write` runs an infinite loop to keep writing the queued frames
+    10. :func:`_write_raw` appends a frame to a camera's container
+    11. :func:`_write_video` appends a frame to a camera's current segment
+    12. :func:`_synchronise` synchronises the files with the disc
+
+The following list shortly summarises the functionality of each code component within the :class:`RecordingReader`
+class:
+
+    1. :func:`__init__` finds the camera's files
+    2. :func:`index` reads the camera's index
+    3. :func:`seek` finds the first indexed frame at or after the timestamp
+    4. :func:`replay` iterates over the frames
+
+Modifications
+=============
+
+You should adjust the `QUEUE_SIZE` to trade the memory for the tolerance of the disc's stalls, the `SEGMENT_FRAMES` to
+trade the number of files for the size of each file, and the `VIDEO_CODEC` to trade the disc usage for the quality.
+"""
+
+import atexit
+import os
+import struct
+from collections import namedtuple
+from communication.frames import HEADER, RAW, decode_frame, decode_header, encode_header
+from communication.queues import DroppingQueue
+from cv2 import CAP_PROP_POS_FRAMES, VideoCapture, VideoWriter, VideoWriter_fourcc, error as OpenCVError
+from queue import Empty
+from threading import Event, Thread
+from time import time
+
+# Declare the supported formats
+FORMATS = ("raw", "video")
+
+# Declare the maximum number of the queued frames, shared by all cameras
+QUEUE_SIZE = 64
+
+# Declare the maximum delay between the disc synchronisations (seconds)
+FSYNC_DELAY = 1
+
+# Declare the maximum number of frames within a video segment, the codec of the segments, and their frame rate
+SEGMENT_FRAMES = 9000
+VIDEO_CODEC = "MJPG"
+VIDEO_FPS = 30
+
+# Declare the index entry (sequence number, receive timestamp, segment, offset or position)
+INDEX_ENTRY = struct.Struct("<IdIQ")
+
+# Declare the decoded index entry
+IndexEntry = namedtuple("IndexEntry", ("sequence", "timestamp", "segment", "offset"))
+
+
+class Recorder:
+
+    def __init__(self, path, streams, *, form="raw", queue_size=QUEUE_SIZE, fps=VIDEO_FPS):
+        """
+        Constructor function used to create the recording's directory, and the queue of the frames.
+
+        :param path: Path to the recording's directory (created if needed)
+        :param streams: List of the :class:`VideoStream` instances to record, each camera is named by its index
+        :param form: Format of the recording, one of `FORMATS`
+        :param queue_size: Maximum number of the queued frames, shared by all cameras
+        :param fps: Frame rate declared in the video segments (the index holds the real timestamps)
+        """
+
+        if form not in FORMATS:
+            raise ValueError("Unsupported recording format: {}".format(form))
+
+        # Save the recording's information, and create its directory
+        self._path = path
+        self._streams = streams
+        self._form = form
+        self._fps = fps
+        os.makedirs(path, exist_ok=True)
+
+        # Initialise the queue of the (camera, sequence, timestamp, frame) tuples, and the taps of the streams
+        self._queue = DroppingQueue(queue_size)
+        self._taps = [self._tap(camera) for camera in range(len(streams))]
+
+        # Initialise the files of each camera - the index, and either the container or the current segment
+        self._indices = list()
+        self._containers = list()
+        self._segments = list()
+
+        # Initialise the counters of the recorded frames and bytes
+        self._recorded = 0
+        self._recorded_bytes = 0
+
+        # Build the writing thread, and the event set once the recording is stopped
+        self._thread = Thread(target=self._write, daemon=True)
+        self._stopped = Event()
+
+    @property
+    def recorded(self) -> int:
+        """
+        Getter for the number of the recorded frames.
+
+        :return: Number of the frames written since the recording started
+        """
+
+        return self._recorded
+
+    @property
+    def recorded_bytes(self) -> int:
+        """
+        Getter for the number of the recorded frames' bytes.
+
+        :return: Number of the bytes of the frames written since the recording started (including the containers'
+            headers, but before the video segments' compression)
+        """
+
+        return self._recorded_bytes
+
+    @property
+    def dropped(self) -> int:
+        """
+        Getter for the number of the dropped frames.
+
+        :return: Number of the frames discarded because the disc fell behind
+        """
+
+        return self._queue.dropped
+
+    def start(self):
+        """
+        Function used to open the files, start the writing thread, and tap the streams.
+        """
+
+        # Open the files for appending
+        for camera in range(len(self._streams)):
+            name = os.path.join(self._path, "camera{}".format(camera))
+            self._indices.append(open(name + ".index", "ab"))
+            if self._form == "raw":
+                self._containers.append(open(name + ".frames", "ab"))
+
+            # Remember the current segment of each camera (the writer, the segment's number, the size and the position),
+            # continuing the numbering of the segments recorded into the directory before
+            else:
+                self._segments.append([None, self._last_segment(camera), None, 0])
+
+        # Start the thread, and write the remaining frames on exit
+        self._thread.start()
+        atexit.register(self.stop)
+
+        # Start queueing the frames
+        for stream, tap in zip(self._streams, self._taps):
+            stream.tap(tap)
+
+    def stop(self):
+        """
+        Function used to remove the taps, write the queued frames, and stop the thread (only once).
+        """
+
+        # Ignore repeated calls and the recordings which weren't started (but close the files if the thread failed)
+        if self._stopped.is_set() or self._thread.ident is None:
+            return
+
+        # Stop queueing the frames
+        for stream, tap in zip(self._streams, self._taps):
+            stream.untap(tap)
+
+        # Stop the thread once it writes all queued frames (waking it up straight away)
+        self._stopped.set()
+        self._queue.put(None)
+        self._thread.join()
+
+        # Synchronise and close the files
+        self._synchronise()
+        for file in self._indices + self._containers:
+            file.close()
+        for segment in self._segments:
+            if segment[0] is not None:
+                segment[0].release()
+
+    def _tap(self, camera: int):
+        """
+        Function used to build the function queueing a camera's frames (never blocks).
+
+        :param camera: Index of the camera
+        :return: Function registered with :func:`VideoStream.tap`
+        """
+
+        def tap(sequence, timestamp, frame):
+            if frame is not None:
+                self._queue.put((camera, sequence, timestamp, frame))
+
+        return tap
+
+    def _last_segment(self, camera: int) -> int:
+        """
+        Function used to find the number of a camera's last segment recorded into the directory.
+
+        :param camera: Index of the camera
+        :return: Number of the last segment, or -1 if none was recorded
+        """
+
+        prefix, last = "camera{}_".format(camera), -1
+        for name in os.listdir(self._path):
+            stem, extension = os.path.splitext(name)
+            if extension == ".avi" and stem.startswith(prefix) and stem[len(prefix):].isdigit():
+                last = max(last, int(stem[len(prefix):]))
+
+        return last
+
+    def _write(self):
+        """
+        Function used to keep writing the queued frames, until stopped and the queue is empty.
+        """
+
+        # Initialise the time of the last synchronisation
+        synchronised = time()
+
+        while True:
+
+            # Wait for a frame, stop once stopped and all frames were written
+            try:
+                item = self._queue.get(timeout=FSYNC_DELAY)
+            except Empty:
+                item = None
+            if item is None and self._stopped.is_set() and self._queue.empty():
+                break
+
+            # Write the frame, and its index entry, skipping the frame if it can't be encoded
+            if item is not None:
+                camera, sequence, timestamp, frame = item
+                try:
+                    if self._form == "raw":
+                        segment, offset = self._write_raw(camera, frame, sequence, timestamp)
+                    else:
+                        segment, offset = self._write_video(camera, frame)
+                    self._indices[camera].write(INDEX_ENTRY.pack(sequence, timestamp, segment, offset))
+                    self._recorded += 1
+                except (ValueError, struct.error, OpenCVError) as error:
+                    print("Failed to record the frame {} of camera {}: {}".format(sequence, camera, error))
+
+            # Synchronise the files if enough time passed since the last synchronisation
+            if time() - synchronised >= FSYNC_DELAY:
+                self._synchronise()
+                synchronised = time()
+
+    def _write_raw(self, camera: int, frame, sequence: int, timestamp: float) -> tuple:
+        """
+        Function used to append a frame to a camera's container, straight from the frame's memory.
+
+        :param camera: Index of the camera
+        :param frame: OpenCV-formatted frame (numpy array)
+        :param sequence: Sequence number of the frame
+        :param timestamp: Time the frame was received (seconds)
+        :return: Tuple of the segment (always 0) and the frame's offset within the container
+        """
+
+        container = self._containers[camera]
+        offset = container.tell()
+
+        # Write the header, then the pixels without copying them into the header's bytes
+        container.write(encode_header(frame, sequence, timestamp, RAW, frame.nbytes))
+        container.write(frame.data if frame.flags.c_contiguous else frame.tobytes())
+        self._recorded_bytes += HEADER.size + frame.nbytes
+
+        return 0, offset
+
+    def _write_video(self, camera: int, frame) -> tuple:
+        """
+        Function used to append a frame to a camera's current segment, starting a new segment if the current one is
+        full or the frame's size changed.
+
+        :param camera: Index of the camera
+        :param frame: OpenCV-formatted frame (numpy array)
+        :return: Tuple of the segment's number and the frame's position within the segment
+        """
+
+        segment = self._segments[camera]
+        size = (frame.shape[1], frame.shape[0])
+
+        # Start a new segment if needed
+        if segment[0] is None or segment[2] != size or segment[3] >= SEGMENT_FRAMES:
+            if segment[0] is not None:
+                segment[0].release()
+            segment[1] += 1
+            name = os.path.join(self._path, "camera{}_{:04d}.avi".format(camera, segment[1]))
+            segment[0] = VideoWriter(name, VideoWriter_fourcc(*VIDEO_CODEC), self._fps, size, frame.ndim == 3)
+            segment[2], segment[3] = size, 0
+
+        segment[0].write(frame)
+        segment[3] += 1
+        self._recorded_bytes += frame.nbytes
+
+        return segment[1], segment[3] - 1
+
+    def _synchronise(self):
+        """
+        Function used to flush the files, and synchronise the containers with the disc.
+        """
+
+        for file in self._indices + self._containers:
+            file.flush()
+        for file in self._containers:
+            os.fsync(file.fileno())
+
+
+class RecordingReader:
+
+    def __init__(self, path, camera=0):
+        """
+        Constructor function used to find a camera's files within a recording.
+
+        :param path: Path to the recording's directory
+        :param camera: Index of the camera
+        """
+
+        self._name = os.path.join(path, "camera{}".format(camera))
+        self._index_path = self._name + ".index"
+        self._container_path = self._name + ".frames"
+
+    def index(self) -> list:
+        """
+        Function used to read the camera's index.
+
+        :return: List of the :class:`IndexEntry` of each recorded frame, in the order of writing
+        """
+
+        with open(self._index_path, "rb") as index:
+            data = index.read()
+
+        # Ignore a truncated entry at the end of the index
+        end = len(data) - len(data) % INDEX_ENTRY.size
+
+        return [IndexEntry(*entry) for entry in INDEX_ENTRY.iter_unpack(data[:end])]
+
+    def seek(self, timestamp, entries=None) -> int:
+        """
+        Function used to find the first indexed frame at or after the timestamp, with a binary search.
+
+        :param timestamp: Timestamp to find (seconds)
+        :param entries: Entries returned by :func:`index`, read if not given
+        :return: Position of the entry within the index (the number of the entries if all frames are older)
+        """
+
+        entries = self.index() if entries is None else entries
+
+        # Keep halving the range of entries
+        low, high = 0, len(entries)
+        while low < high:
+            middle = (low + high) // 2
+            if entries[middle].timestamp < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def replay(self, start=None, end=None):
+        """
+        Function used to lazily iterate over the frames within a time range.
+
+        :param start: Start of the range (inclusive timestamp), defaults to the beginning of the recording
+        :param end: End of the range (exclusive timestamp), defaults to the end of the recording
+        :return: Generator of (sequence, timestamp, frame) tuples
+        """
+
+        entries = self.index()
+        entries = entries[0 if start is None else self.seek(start, entries):]
+
+        # Read the frames of the container
+        if os.path.exists(self._container_path):
+            with open(self._container_path, "rb") as container:
+                for entry in entries:
+                    if end is not None and entry.timestamp >= end:
+                        return
+
+                    # Read the header and the pixels, stop on a truncated frame
+                    container.seek(entry.offset)
+                    data = bytearray(container.read(HEADER.size))
+                    if len(data) < HEADER.size:
+                        return
+                    length = decode_header(data).length
+                    data += container.read(length)
+                    if len(data) < HEADER.size + length:
+                        return
+
+                    yield entry.sequence, entry.timestamp, decode_frame(data)
+            return
+
+        # Read the frames of the video segments, opening each segment once
+        capture, current = None, None
+        try:
+            for entry in entries:
+                if end is not None and entry.timestamp >= end:
+                    return
+
+                # Open the frame's segment, moving to the frame's position
+                if entry.segment != current:
+                    if capture is not None:
+                        capture.release()
+                    capture = VideoCapture("{}_{:04d}.avi".format(self._name, entry.segment))
+                    capture.set(CAP_PROP_POS_FRAMES, entry.offset)
+                    current = entry.segment
+
+                success, frame = capture.read()
+                if not success:
+                    return
+
+                yield entry.sequence, entry.timestamp, frame
+
+        finally:
+            if capture is not None:
+                capture.release()
@@ -0,0 +1,163 @@
+"""
+Safeguard
+*********
+
+Description
+===========
+
+This module is used to limit the total current drawn by the thrusters and motors, by scaling down the PWM values that
+are sent to the Raspberry Pi.
+
+Functionality
+=============
+
+Safeguard
+---------
+
+The :class:`Safeguard` class approximates the current taken by each PWM value with a quadratic function. If the total
+current exceeds the limit, each value is moved towards the idle value so that its current is scaled by the same ratio.
+
+The current of every integer PWM value within the expected range is precomputed into a lookup table, and the constant
+parts of the quadratic formula used for scaling are calculated once, on construction.
+
+Execution
+---------
+
+The safeguard is created by the :class:`DataManager`. To use it yourself, create an instance and call it with the data::
+
+    safeguard = Safeguard({"Thr_FP", "Thr_FS"}, amp_limit=99, idle_values={1500}, coefficients=(a, b, c))
+    safe_data = safeguard({"Thr_FP": 1900, "Thr_FS": 1900})
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`Safeguard` class:
+
+    1. :func:`__init__` builds the safeguard and precomputes the lookup table
+    2. :func:`amp` calculates the current taken by a value
+    3. :func:`scale` finds the values taking the given current
+    4. :func:`__call__` safeguards the data
+
+Modifications
+=============
+
+You should adjust the `pwm_range` passed to :func:`__init__` if the expected PWM values change.
+"""
+
+from math import sqrt
+
+
+class Safeguard:
+
+    def __init__(self, keys, *, amp_limit, idle_values, coefficients, pwm_range=(1100, 1900)):
+        """
+        Constructor function used to initialise the safeguard.
+
+        :param keys: Keys of the values to safeguard
+        :param amp_limit: Maximum total current
+        :param idle_values: Values which should never be scaled
+        :param coefficients: Quadratic function's hyper parameters (a, b, c), approximating the current of a value
+        :param pwm_range: Inclusive range of the integer values to precompute the current of
+        """
+
+        # Store the keys in a fixed order, to iterate over them quickly
+        self._keys = tuple(keys)
+
+        # Store the limits
+        self._amp_limit = amp_limit
+        self._idle_values = frozenset(idle_values)
+
+        # Store the quadratic function's hyper parameters
+        self._a, self._b, self._c = coefficients
+
+        # Precompute the constant parts of the quadratic formula
+        self._b_squared = self._b ** 2
+        self._four_a = 4 * self._a
+        self._two_a = 2 * self._a
+
+        # Precompute the current taken by each value within the range
+        self._pwm_min, self._pwm_max = pwm_range
+        self._amps = [self._amp(value) for value in range(self._pwm_min, self._pwm_max + 1)]
+
+    def _amp(self, value):
+        """
+        Function used to evaluate the quadratic function.
+
+        :param value: PWM value
+        :return: Approximated current
+        """
+
+        return self._a * (value ** 2) + self._b * value + self._c
+
+    def amp(self, value):
+        """
+        Function used to calculate the current taken by a value, using the lookup table when possible.
+
+        :param value: PWM value
+        :return: Approximated current
+        """
+
+        if value.__class__ is int and self._pwm_min <= value <= self._pwm_max:
+            return self._amps[value - self._pwm_min]
+
+        return self._amp(value)
+
+    def scale(self, amp):
+        """
+        Function used to find the values which take the given current, by solving the quadratic equation.
+
+        :param amp: Expected current
+        :return: Tuple of both roots
+        """
+
+        root = sqrt(self._b_squared - self._four_a * (self._c - amp))
+
+        return (-self._b + root) / self._two_a, (-self._b - root) / self._two_a
+
+    def __call__(self, data: dict) -> dict:
+        """
+        Function used to safeguard the data.
+
+        :param data: Dictionary of the values (keys not registered in the safeguard are ignored)
+        :return: Dictionary of the safeguarded values
+        """
+
+        # Select the safeguard data to scale it
+        safeguard_data = {key: data[key] for key in self._keys if key in data}
+
+        # Calculate how much current would be taken by each value, using the lookup table for integer values in range
+        table, low, high = self._amps, self._pwm_min, self._pwm_max
+        amps = [table[value - low] if value.__class__ is int and low <= value <= high else self._amp(value)
+                for value in safeguard_data.values()]
+
+        # Calculate the total current
+        current = sum(amps)
+
+        # Safeguard the values if the limit was passed
+        if current > self._amp_limit:
+
+            # Find the ratio
+            ratio = self._amp_limit / current
+
+            # Fetch the precomputed constants (the scaling is inlined, for performance reasons)
+            b, c, b_squared, four_a, two_a = self._b, self._c, self._b_squared, self._four_a, self._two_a
+
+            # Iterate over the data to scale the values
+            for (key, value), amp in zip(safeguard_data.items(), amps):
+
+                # Check if the value should be considered
+                if value not in self._idle_values:
+
+                    # Find the values by solving the quadratic equation (same as :func:`scale`)
+                    root = sqrt(b_squared - four_a * (c - amp * ratio))
+                    first, second = (-b + root) / two_a, (-b - root) / two_a
+
+                    # Override current value with the closer one
+                    safeguard_data[key] = first if abs(value - first) <= abs(value - second) else second
+
+        # Return modified data
+        return safeguard_data
@@ -0,0 +1,320 @@
+"""
+Schema
+******
+
+Description
+===========
+
+This module is used to declare the type, range, default value and a stable numeric id of each key managed by the data
+manager, and to encode the values into compact, fixed-size binary structs.
+
+Functionality
+=============
+
+Field
+-----
+
+The :class:`Field` class describes a single key, and validates its values.
+
+Schema
+------
+
+The :class:`Schema` class is a registry of fields. It validates dictionaries of values, and packs them into a struct
+consisting of a bit mask of the present keys, followed by the values of all fields (in the order of their ids). Values
+of the integer fields are rounded when packed (for example the safeguarded PWM values).
+
+The values can also be packed sparsely - the bit mask is followed by the values of the present keys only, which keeps
+the packed changes of a few keys small.
+
+Keys which are not declared in the schema (for example the telemetry received from the Raspberry Pi) are neither
+validated nor packed.
+
+Execution
+---------
+
+You should simply use the `SCHEMA` registry::
+
+    SCHEMA.validate({"Mot_G": 1500})  # raises ValueError if the value is invalid
+    payload = SCHEMA.pack({"Mot_G": 1500})  # returns the fixed-size bytes
+    data = SCHEMA.unpack(payload)  # returns {"Mot_G": 1500}
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`Field` class:
+
+    1. :func:`__init__` builds the field
+    2. :func:`validate` checks the value's type and range
+
+The following list shortly summarises the functionality of each code component within the :class:`Schema` class:
+
+    1. :func:`__init__` builds the registry and the struct
+    2. :func:`size` is a getter for the size of the packed values
+    3. :func:`__contains__`, :func:`__getitem__` and :func:`__iter__` provide access to the fields
+    4. :func:`defaults` returns the default values
+    5. :func:`validate` checks the values of the declared keys
+    6. :func:`pack` encodes the values into bytes
+    7. :func:`unpack` decodes the values from bytes
+    8. :func:`sparse_size` returns the size of the sparsely packed values
+    9. :func:`_sparse_struct` builds the struct of the sparsely packed values
+
+Modifications
+=============
+
+You should modify the `SCHEMA` registry whenever a new key is introduced. Never change the id of an existing field, as
+the ids (and so the order of the packed values) are shared with the Raspberry Pi - add new fields at the end instead.
+"""
+
+import struct
+from functools import lru_cache
+from math import inf
+from numbers import Integral, Real
+
+# Declare the struct format and the accepted Python type of each field type
+TYPES = {
+    "uint16": ("H", Integral),
+    "int16": ("h", Integral),
+    "bool": ("?", bool),
+    "float32": ("f", Real)
+}
+
+
+class Field:
+
+    def __init__(self, id, key, type, *, minimum=None, maximum=None, default=None):
+        """
+        Constructor function used to initialise the field.
+
+        :param id: Stable numeric id of the field (position within the packed struct)
+        :param key: Data manager key
+        :param type: Type of the values, one of `TYPES`
+        :param minimum: Minimum value (inclusive), or None if not limited
+        :param maximum: Maximum value (inclusive), or None if not limited
+        :param default: Default (idle) value
+        """
+
+        self.id, self.key, self.type = id, key, type
+        self.minimum, self.maximum, self.default = minimum, maximum, default
+
+        # Fetch the struct format and the accepted type
+        self.code, self._accepted = TYPES[type]
+
+    def validate(self, value):
+        """
+        Function used to check the value's type and range. The integer fields accept floats, as they are rounded when
+        packed.
+
+        :param value: Value to check
+        :return: The value
+        """
+
+        # Check the type
+        if not isinstance(value, Real if self._accepted is Integral else self._accepted):
+            raise ValueError("Invalid type of {}: {!r} (expected {})".format(self.key, value, self.type))
+
+        # Check the range
+        if (self.minimum is not None and value < self.minimum) or (self.maximum is not None and value > self.maximum):
+            raise ValueError("Value of {} out of range: {!r} (expected {} to {})".format(
+                self.key, value, self.minimum, self.maximum))
+
+        return value
+
+
+class Schema:
+
+    def __init__(self, fields):
+        """
+        Constructor function used to initialise the registry.
+
+        :param fields: Iterable of the :class:`Field` objects, the ids must be consecutive, starting at 0
+        """
+
+        # Store the fields in the order of their ids
+        self._fields = tuple(sorted(fields, key=lambda field: field.id))
+
+        # Check if the ids are consecutive, and fit in the bit mask
+        if [field.id for field in self._fields] != list(range(len(self._fields))) or len(self._fields) > 64:
+            raise ValueError("Field ids must be consecutive, starting at 0 (up to 64 fields)")
+
+        # Build the key to field mapping
+        self._keys = {field.key: field for field in self._fields}
+
+        # Build the key to (accepted built-in types, minimum, maximum) mapping, for performance reasons
+        self._bounds = {field.key: ((bool,) if field._accepted is bool else (int, float),
+                                    -inf if field.minimum is None else field.minimum,
+                                    inf if field.maximum is None else field.maximum) for field in self._fields}
+
+        # Build the struct - bit mask of the present keys, followed by all values
+        self._struct = struct.Struct("<Q" + "".join(field.code for field in self._fields))
+
+        # Build the rounding function of each field, and the values used for the missing keys
+        self._convert = tuple(round if field.code in "Hh" else (lambda value: value) for field in self._fields)
+        self._missing = tuple(field.default if field.default is not None else 0 for field in self._fields)
+
+    @property
+    def size(self) -> int:
+        """
+        Getter for the size of the packed values.
+
+        :return: Number of bytes
+        """
+
+        return self._struct.size
+
+    def __contains__(self, key):
+        """
+        Function used to check if a key is declared.
+
+        :param key: Key to check
+        :return: True if the key is declared, False otherwise
+        """
+
+        return key in self._keys
+
+    def __getitem__(self, key) -> Field:
+        """
+        Function used to access the field of a key.
+
+        :param key: Declared key
+        :return: Field of the key
+        """
+
+        return self._keys[key]
+
+    def __iter__(self):
+        """
+        Function used to iterate over the fields, in the order of their ids.
+
+        :return: Iterator over the fields
+        """
+
+        return iter(self._fields)
+
+    def defaults(self) -> dict:
+        """
+        Function used to return the default values.
+
+        :return: Dictionary of the fields' default values (fields without one are skipped)
+        """
+
+        return {field.key: field.default for field in self._fields if field.default is not None}
+
+    def validate(self, data: dict) -> dict:
+        """
+        Function used to check the values of the declared keys. Other keys are ignored.
+
+        :param data: Dictionary of values to check
+        :return: The dictionary
+        """
+
+        # Check the values against the precomputed bounds, and let the field validate the value if any check fails
+        # (which also accepts the non-built-in numeric types, or raises the error)
+        bounds = self._bounds
+        for key, value in data.items():
+            if key in bounds:
+                accepted, minimum, maximum = bounds[key]
+                if value.__class__ not in accepted or not minimum <= value <= maximum:
+                    self._keys[key].validate(value)
+
+        return data
+
+    def pack(self, data: dict, *, sparse=False) -> bytes:
+        """
+        Function used to encode the values of the declared keys into bytes. Other keys are ignored.
+
+        :param data: Dictionary of values to encode
+        :param sparse: Whether only the values of the present keys should be packed
+        :return: Fixed-size bytes, or variable-size bytes if packed sparsely
+        """
+
+        # Build the mask and the values of the present keys only, in the order of their ids
+        if sparse:
+            fields = [self._keys[key] for key in data if key in self._keys]
+            fields.sort(key=lambda field: field.id)
+            mask = sum(1 << field.id for field in fields)
+            return self._sparse_struct(mask).pack(mask, *(self._convert[field.id](data[field.key]) for field in fields))
+
+        # Build the mask and the values
+        mask, values = 0, list(self._missing)
+        for key, value in data.items():
+            if key in self._keys:
+                field = self._keys[key]
+                mask |= 1 << field.id
+                values[field.id] = self._convert[field.id](value)
+
+        return self._struct.pack(mask, *values)
+
+    def unpack(self, payload, *, sparse=False) -> dict:
+        """
+        Function used to decode the values from bytes.
+
+        :param payload: Bytes (or any other buffer) returned by :func:`pack`, sparse payloads may be followed by other
+        bytes, which are ignored
+        :param sparse: Whether the values were packed sparsely
+        :return: Dictionary of the present values
+        """
+
+        # Decode the present values only, in the order of their ids
+        if sparse:
+            mask, *values = self._sparse_struct(int.from_bytes(payload[:8], "little")).unpack_from(payload)
+            return {field.key: value for field, value in zip(
+                (field for field in self._fields if mask & (1 << field.id)), values)}
+
+        mask, *values = self._struct.unpack(payload)
+
+        return {field.key: values[field.id] for field in self._fields if mask & (1 << field.id)}
+
+    def sparse_size(self, payload) -> int:
+        """
+        Function used to return the size of the sparsely packed values, found from their mask.
+
+        :param payload: Bytes (or any other buffer) starting with the values returned by :func:`pack`
+        :return: Number of bytes
+        """
+
+        return self._sparse_struct(int.from_bytes(payload[:8], "little")).size
+
+    @lru_cache(maxsize=256)
+    def _sparse_struct(self, mask) -> struct.Struct:
+        """
+        Function used to build (and cache) the struct of the sparsely packed values.
+
+        :param mask: Bit mask of the present keys
+        :return: Struct of the mask followed by the present values
+        """
+
+        return struct.Struct("<Q" + "".join(field.code for field in self._fields if mask & (1 << field.id)))
+
+
+# Declare the schema of the data manager's keys
+SCHEMA = Schema([
+
+    # Controller axes, triggers and the hat (normalised)
+    Field(0, "lax", "int16", minimum=1100, maximum=1900, default=1500),
+    Field(1, "lay", "int16", minimum=1100, maximum=1900, default=1500),
+    Field(2, "rax", "int16", minimum=1100, maximum=1900, default=1500),
+    Field(3, "ray", "int16", minimum=1100, maximum=1900, default=1500),
+    Field(4, "lt", "int16", minimum=1100, maximum=1500, default=1500),
+    Field(5, "rt", "int16", minimum=1500, maximum=1900, default=1500),
+    Field(6, "hx", "int16", minimum=-1, maximum=1, default=0),
+    Field(7, "hy", "int16", minimum=-1, maximum=1, default=0),
+
+    # Thrusters' PWM outputs
+    Field(8, "Thr_FP", "uint16", minimum=1100, maximum=1900, default=1500),
+    Field(9, "Thr_FS", "uint16", minimum=1100, maximum=1900, default=1500),
+    Field(10, "Thr_AP", "uint16", minimum=1100, maximum=1900, default=1500),
+    Field(11, "Thr_AS", "uint16", minimum=1100, maximum=1900, default=1500),
+    Field(12, "Thr_TFP", "uint16", minimum=1100, maximum=1900, default=1500),
+    Field(13, "Thr_TFS", "uint16", minimum=1100, maximum=1900, default=1500),
+    Field(14, "Thr_TAP", "uint16", minimum=1100, maximum=1900, default=1500),
+    Field(15, "Thr_TAS", "uint16", minimum=1100, maximum=1900, default=1500),
+
+    # Motors' PWM outputs
+    Field(16, "Mot_R", "uint16", minimum=1100, maximum=1900, default=1500),
+    Field(17, "Mot_G", "uint16", minimum=1100, maximum=1900, default=1500),
+    Field(18, "Mot_F", "uint16", minimum=1100, maximum=1900, default=1500),
+])
@@ -0,0 +1,595 @@
+"""
+Shared Memory
+*************
+
+Description
+===========
+
+This module is used to store the data manager's values in a block of shared memory, so that they are accessible across
+different processes without any disc or socket I/O.
+
+Functionality
+=============
+
+SharedMemoryCache
+-----------------
+
+The :class:`SharedMemoryCache` class keeps the fixed set of control keys in a typed binary layout, described by the
+`LAYOUT` mapping (built from the data manager's schema). Any other keys (for example the telemetry received from the
+Raspberry Pi) are pickled into a bounded overflow area of the same block.
+
+The block is split into regions, each with its own typed layout and overflow area - one region for the global keys, and
+one for each of up to `NAMESPACES` namespaces (for example of the vehicles, see the :class:`DataManager`). A namespace
+is assigned its region on the first write of its keys, and keeps it for the lifetime of the block. The keys of a
+namespace are stored without the namespace's prefix, so a vehicle's control keys stay typed, and a write only pickles
+the overflow of the modified regions. The keys of the namespaces which don't fit in the block are stored in the global
+region.
+
+Consistency between the processes is provided by a sequence lock - a writer makes the sequence counter odd for the
+duration of the write, and a reader retries until it observes the same, even counter before and after copying the data.
+Half of the sequence counter is exposed as the version of the data, which increases with every write.
+
+The writers exclude each other with a lock created together with the block. The lock travels with the cache whenever
+the cache is pickled (when a process is started with the cache, or with an object holding it), so every process writing
+into the block uses the same lock. A process which attaches to the block by its name gets its own lock instead, so it
+must receive the pickled cache before it writes.
+
+Execution
+---------
+
+The cache is created by the :class:`DataManager`, and shouldn't be used directly. To use it yourself, create an
+instance before starting any other processes::
+
+    cache = SharedMemoryCache()
+    cache["Mot_G"] = 1500
+
+.. note::
+
+    Forked processes share the block with their parent. Spawned processes attach to the same block by its name, which
+    is exported in the `ENVIRONMENT_KEY` environment variable, and share the writers' lock once they receive the pickled
+    cache (see :func:`DataManager.share`). The exported block is only attached to by the processes started afterwards -
+    any other instance created within the same process creates its own block.
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The :func:`open_block` function attaches to (or creates) a shared memory block by its name, and the :func:`_track`
+function remembers if the current process uses its own resource tracker.
+
+The following list shortly summarises the functionality of each code component within the :class:`SharedMemoryCache`
+class:
+
+    1. :func:`__init__` creates (or attaches to) the shared memory block
+    2. :func:`version` is a getter for the version of the data
+    3. :func:`name` is a getter for the name of the block
+    4. :func:`__getitem__` reads a single value
+    5. :func:`__setitem__` writes a single value
+    6. :func:`__contains__` checks if a value is present
+    7. :func:`__iter__` iterates over the present keys
+    8. :func:`snapshot` reads all values at once
+    9. :func:`update` writes several values at once
+    10. :func:`clear` removes all values
+    11. :func:`close` releases the block (and removes it if created by this process)
+    12. :func:`__getstate__` pickles the block's name together with the writers' lock
+    13. :func:`__setstate__` attaches to the pickled block, using the pickled lock
+    14. :func:`_locate` finds the region of a key (and assigns a region to a new namespace)
+    15. :func:`_load_namespaces` updates the process-local copy of the assigned namespaces
+    16. :func:`_assign` assigns a region to a namespace
+    17. :func:`_read` copies a consistent state of the block
+    18. :func:`_read_value` reads a single, consistent value of the layout
+    19. :func:`_write` modifies the block under the sequence lock
+
+Modifications
+=============
+
+The `LAYOUT` mapping follows the `SCHEMA` registry, so new control keys should be declared there. You should modify the
+`OVERFLOW_SIZE` constant if more telemetry should fit in each region, and the `NAMESPACES` constant if more namespaces
+(vehicles) should have their own region.
+"""
+
+import atexit
+import os
+import struct
+from communication.cache import NAMESPACE_SEPARATOR, Cache
+from communication.schema import SCHEMA
+from multiprocessing import resource_tracker, shared_memory
+from pickle import dumps, loads
+from time import sleep
+from pathos import helpers
+
+# Declare the typed layout of the control keys (struct format characters), following the schema
+LAYOUT = {field.key: field.code for field in SCHEMA}
+
+# Declare the number of bytes available for the keys outside of the layout, within each region
+OVERFLOW_SIZE = 4096
+
+# Declare the number of the namespaces with their own region, and the maximum length of their names (bytes)
+NAMESPACES = 16
+NAME_SIZE = 32
+
+# Declare the environment variable used to share the block's name (and its creator's process id) with spawned processes
+ENVIRONMENT_KEY = "SURFACE_DATA_MANAGER_BLOCK"
+
+# Remember the creator's process id of each block created (inherited by the forked processes), and the process which
+# started the resource tracker used by the current process (the forked processes share their parent's tracker)
+_creators = dict()
+_tracker_owner = None
+
+
+def _track():
+    """
+    Function used to remember if the current process starts its own resource tracker. Called before opening any block.
+    """
+
+    global _tracker_owner
+
+    if resource_tracker._resource_tracker._fd is None:
+        _tracker_owner = os.getpid()
+
+
+def open_block(size, environment_key, name=None):
+    """
+    Function used to attach to an existing shared memory block, or create a new one and export its name.
+
+    :param size: Size of the block to create (bytes)
+    :param environment_key: Environment variable used to share the block's name with spawned processes
+    :param name: Name of the block to attach to, defaults to the one exported by a parent process (if any)
+    :return: Tuple of the shared memory block and a boolean specifying if it was created
+    """
+
+    # Fetch the name of the block exported by a parent process (the blocks exported by the current process are never
+    # attached to this way, so that each instance within the process gets its own block and lock)
+    exported, _, creator = os.environ.get(environment_key, "").rpartition(":")
+    if name is None and exported and creator != str(os.getpid()):
+        name = exported
+
+    _track()
+
+    # Attach to the existing block
+    if name:
+        try:
+            memory = shared_memory.SharedMemory(name=name, create=False)
+        except FileNotFoundError:
+            pass
+        else:
+            # Stop the process's own resource tracker from removing the block once the process exits (the block is only
+            # removed by the process which created it, and a tracker shared with the creator must keep its entry)
+            if _tracker_owner == os.getpid() and _creators.get(memory.name) != os.getpid():
+                resource_tracker.unregister(memory._name, "shared_memory")
+            return memory, False
+
+    # Create a new block
+    memory = shared_memory.SharedMemory(create=True, size=size)
+    _creators[memory.name] = os.getpid()
+
+    # Export the block's name, unless a live block is exported already (the first block stays shared with the processes
+    # started afterwards)
+    if not exported or name == exported:
+        os.environ[environment_key] = "{}:{}".format(memory.name, os.getpid())
+
+    return memory, True
+
+
+class SharedMemoryCache(Cache):
+
+    # Header - sequence counter and the number of the assigned namespaces
+    _HEADER = struct.Struct("<QI")
+
+    # Name of an assigned namespace (the names follow the header, in the order of the regions)
+    _NAME = struct.Struct("<{}s".format(NAME_SIZE))
+
+    # Header of each region - present keys' bit mask and the overflow length
+    _REGION = struct.Struct("<II")
+
+    # Typed values of the layout keys
+    _VALUES = struct.Struct("<" + "".join(LAYOUT.values()))
+
+    def __init__(self, *, name=None, lock=None):
+        """
+        Constructor function used to create a new shared memory block, or attach to an existing one.
+
+        :param name: Name of the block to attach to, defaults to the one exported in the environment (if any)
+        :param lock: Lock shared between the block's writers, a new one is created if not given
+        """
+
+        # Calculate the offset and the size of the regions (the global region followed by the namespaces' regions), and
+        # the size of the block
+        self._regions = self._HEADER.size + self._NAME.size * NAMESPACES
+        self._region_size = self._REGION.size + self._VALUES.size + OVERFLOW_SIZE
+        self._size = self._regions + self._region_size * (NAMESPACES + 1)
+
+        # Attach to the existing block, or create a new one
+        self._memory, created = open_block(self._size, ENVIRONMENT_KEY, name)
+
+        # Remember the process which created the block, to remove it on exit
+        if created:
+            self._owner = os.getpid()
+            atexit.register(self.close)
+        else:
+            self._owner = None
+
+        # Store the buffer reference
+        self._buffer = self._memory.buf
+
+        # Initialise the lock shared between the writers (passed to the other processes together with the cache)
+        self._lock = helpers.mp.Lock() if lock is None else lock
+
+        # Remember the index of each key, for performance reasons
+        self._index = {key: i for i, key in enumerate(LAYOUT)}
+
+        # Remember the offset of each key's value within a region
+        self._offsets = dict()
+        offset = self._REGION.size
+        for key, code in LAYOUT.items():
+            self._offsets[key] = (offset, struct.Struct("<" + code))
+            offset += struct.calcsize("<" + code)
+
+        # Initialise the process-local copy of the assigned namespaces, mapping their names to the regions, and the
+        # prefix of the keys of each region
+        self._namespaces = dict()
+        self._prefixes = [""]
+
+    @property
+    def version(self):
+        """
+        Getter for the version of the data, increased on every write.
+
+        :return: Current version
+        """
+
+        return self._HEADER.unpack_from(self._buffer, 0)[0] // 2
+
+    @property
+    def name(self):
+        """
+        Getter for the block's name.
+
+        :return: Name of the shared memory block
+        """
+
+        return self._memory.name
+
+    def __getitem__(self, key):
+        """
+        Function used to read a single value.
+
+        :param key: Key to read
+        :return: Stored value
+        """
+
+        # Read the typed value directly if the key belongs to the layout of its region
+        location = self._locate(key)
+        if location is not None and location[1] in self._index:
+            present, value = self._read_value(*location)
+            if present:
+                return value
+
+        return self._read()[1][key]
+
+    def __setitem__(self, key, value):
+        """
+        Function used to write a single value.
+
+        :param key: Key to modify
+        :param value: New value
+        """
+
+        self._write({key: value})
+
+    def __contains__(self, key):
+        """
+        Function used to check if a value is stored under the key.
+
+        :param key: Key to check
+        :return: True if the value is present, False otherwise
+        """
+
+        # Check the mask directly if the key belongs to the layout of its region
+        location = self._locate(key)
+        if location is not None and location[1] in self._index and self._read_value(*location)[0]:
+            return True
+
+        return key in self._read()[1]
+
+    def __iter__(self):
+        """
+        Function used to iterate over the stored keys.
+
+        :return: Iterator over a copy of the keys
+        """
+
+        return iter(list(self._read()[1]))
+
+    def snapshot(self) -> tuple:
+        """
+        Function used to read all values at once.
+
+        :return: Tuple of the version and the dictionary of all present values
+        """
+
+        return self._read()
+
+    def update(self, data: dict) -> int:
+        """
+        Function used to write several values at once.
+
+        :param data: Dictionary of values to write
+        :return: Version of the data after the write
+        """
+
+        return self._write(data)
+
+    def clear(self):
+        """
+        Function used to remove all values.
+        """
+
+        self._write(None)
+
+    def close(self):
+        """
+        Function used to release the block. The block is removed if it was created by the current process.
+        """
+
+        # Release the buffer and the block (ignore repeated calls)
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+            self._memory.close()
+
+            # Only remove the block from the process which created it
+            if self._owner == os.getpid():
+                self._memory.unlink()
+
+    def __getstate__(self) -> dict:
+        """
+        Function used to pickle the cache as the block's name and the writers' lock (only possible while starting a new
+        process).
+
+        :return: Dictionary of the pickled state
+        """
+
+        return {"name": self.name, "lock": self._lock}
+
+    def __setstate__(self, state: dict):
+        """
+        Function used to attach to the pickled block, using the pickled writers' lock.
+
+        :param state: Dictionary returned by :func:`__getstate__`
+        """
+
+        self.__init__(name=state["name"], lock=state["lock"])
+
+    def _locate(self, key, assign=False):
+        """
+        Function used to find the region of a key, and the key within the region (without the namespace's prefix).
+
+        :param key: Key to find
+        :param assign: Whether a region should be assigned to a new namespace (only while holding the writers' lock)
+        :return: Tuple of the region's index and the key within the region, or None if the key's namespace isn't
+            assigned
+        """
+
+        # Store the global keys in the global region
+        namespace, separator, inner = key.partition(NAMESPACE_SEPARATOR)
+        if not (separator and namespace):
+            return 0, key
+
+        # Fetch the namespaces assigned by the other processes, if the namespace isn't known yet
+        if namespace not in self._namespaces:
+            self._load_namespaces(self._HEADER.unpack_from(self._buffer, 0)[1])
+
+            # Assign a new region if requested, store the keys in the global region if no region is left
+            if namespace not in self._namespaces:
+                if not assign:
+                    return None
+                if not self._assign(namespace):
+                    return 0, key
+
+        return self._namespaces[namespace], inner
+
+    def _load_namespaces(self, count):
+        """
+        Function used to update the process-local copy of the assigned namespaces. The namespaces are never unassigned,
+        so only the new ones are read.
+
+        :param count: Number of the assigned namespaces
+        """
+
+        for region in range(len(self._namespaces) + 1, count + 1):
+            name = self._NAME.unpack_from(self._buffer, self._HEADER.size + (region - 1) * self._NAME.size)[0]
+            name = name.rstrip(b"\0").decode("utf-8")
+            self._namespaces[name] = region
+            self._prefixes.append(name + NAMESPACE_SEPARATOR)
+
+    def _assign(self, namespace) -> bool:
+        """
+        Function used to assign the next free region to a namespace. Must be called while holding the writers' lock,
+        with all assigned namespaces loaded.
+
+        :param namespace: Name of the namespace
+        :return: True if the region was assigned, False if no region is left or the name is too long
+        """
+
+        name = namespace.encode("utf-8")
+        count = len(self._namespaces)
+        if count == NAMESPACES or len(name) > NAME_SIZE:
+            return False
+
+        # Write the name, and publish it by increasing the number of the assigned namespaces (the new region is empty,
+        # so the readers' copies stay consistent without modifying the sequence counter)
+        self._NAME.pack_into(self._buffer, self._HEADER.size + count * self._NAME.size, name)
+        self._HEADER.pack_into(self._buffer, 0, self._HEADER.unpack_from(self._buffer, 0)[0], count + 1)
+        self._load_namespaces(count + 1)
+
+        return True
+
+    def _read(self) -> tuple:
+        """
+        Function used to copy a consistent state of the block.
+
+        :return: Tuple of the version and the dictionary of all present values
+        """
+
+        # Keep retrying until no write happened during the copy
+        while True:
+
+            # Fetch the sequence counter, retry if a write is in progress
+            sequence, count = self._HEADER.unpack_from(self._buffer, 0)
+            if sequence & 1:
+                sleep(0)
+                continue
+
+            # Copy the values of the non-empty regions
+            regions = list()
+            for region in range(count + 1):
+                offset = self._regions + region * self._region_size
+                mask, length = self._REGION.unpack_from(self._buffer, offset)
+                if mask or length:
+                    start = offset + self._REGION.size + self._VALUES.size
+                    regions.append((region, mask, self._VALUES.unpack_from(self._buffer, offset + self._REGION.size),
+                                    bytes(self._buffer[start:start + length])))
+
+            # Verify that the copy is consistent
+            if self._HEADER.unpack_from(self._buffer, 0)[0] == sequence:
+                break
+
+        # Fetch the names of the namespaces assigned since the last read
+        self._load_namespaces(count)
+
+        data = dict()
+        for region, mask, values, overflow in regions:
+            prefix = self._prefixes[region]
+
+            # Build the layout values, using the mask to skip the missing keys
+            data.update({prefix + key: values[i] for key, i in self._index.items() if mask & (1 << i)})
+
+            # Merge the overflow values
+            if overflow:
+                data.update({prefix + key: value for key, value in loads(overflow).items()} if prefix else
+                            loads(overflow))
+
+        return sequence // 2, data
+
+    def _read_value(self, region, key) -> tuple:
+        """
+        Function used to read a single, consistent value of the layout.
+
+        :param region: Index of the key's region
+        :param key: Layout key to read (without the namespace's prefix)
+        :return: Tuple of a boolean specifying if the value is present, and the value itself
+        """
+
+        offset, packer = self._offsets[key]
+        region = self._regions + region * self._region_size
+        bit = 1 << self._index[key]
+
+        # Keep retrying until no write happened during the read
+        while True:
+
+            # Fetch the sequence counter, retry if a write is in progress
+            sequence = self._HEADER.unpack_from(self._buffer, 0)[0]
+            if sequence & 1:
+                sleep(0)
+                continue
+
+            # Copy the mask and the value, and verify that the read is consistent
+            mask = self._REGION.unpack_from(self._buffer, region)[0]
+            value = packer.unpack_from(self._buffer, region + offset)[0]
+            if self._HEADER.unpack_from(self._buffer, 0)[0] == sequence:
+                return bool(mask & bit), value
+
+    def _write(self, data) -> int:
+        """
+        Function used to modify the block under the sequence lock.
+
+        :param data: Dictionary of values to write, or None to remove all values
+        :return: Version of the data after the write
+        """
+
+        with self._lock:
+
+            # Fetch the names of the namespaces assigned by the other processes
+            self._load_namespaces(self._HEADER.unpack_from(self._buffer, 0)[1])
+
+            # Group the values by their regions (assigning the regions to the new namespaces), or empty all regions
+            if data is None:
+                changes = {region: None for region in range(len(self._namespaces) + 1)}
+            else:
+                changes = dict()
+                for key, value in data.items():
+                    region, key = self._locate(key, assign=True)
+                    changes.setdefault(region, dict())[key] = value
+
+            # Build the new state of each modified region
+            updates = list()
+            for region, region_data in changes.items():
+                offset = self._regions + region * self._region_size
+                start = offset + self._REGION.size + self._VALUES.size
+
+                # Fetch the current state of the region, and its overflow values
+                mask, length = self._REGION.unpack_from(self._buffer, offset)
+                overflow = loads(bytes(self._buffer[start:start + length])) if length else dict()
+
+                # Initialise the typed values to write, and remember if the overflow needs to be serialised again
+                values = list()
+                modified = False
+
+                if region_data is None:
+                    mask, overflow = 0, dict()
+                    modified = True
+
+                else:
+                    for key, value in region_data.items():
+
+                        # Store typed values in the layout, fall back to the overflow for other keys or values
+                        if key in self._index:
+                            key_offset, packer = self._offsets[key]
+                            try:
+                                packer.pack(value)
+                            except struct.error:
+                                pass
+                            else:
+                                values.append((offset + key_offset, packer, value))
+                                mask |= 1 << self._index[key]
+                                if key in overflow:
+                                    del overflow[key]
+                                    modified = True
+                                continue
+                            mask &= ~(1 << self._index[key])
+
+                        overflow[key] = value
+                        modified = True
+
+                # Serialise the overflow values if they were modified
+                if modified:
+                    overflow = dumps(overflow) if overflow else b''
+                    if len(overflow) > OVERFLOW_SIZE:
+                        raise ValueError("Data exceeds the shared memory overflow size ({} bytes)".format(
+                            OVERFLOW_SIZE))
+                    length = len(overflow)
+                else:
+                    overflow = None
+
+                updates.append((offset, start, mask, length, values, overflow))
+
+            # Mark the write as in progress
+            sequence, count = self._HEADER.unpack_from(self._buffer, 0)
+            self._HEADER.pack_into(self._buffer, 0, sequence + 1, count)
+
+            # Modify the regions
+            for offset, start, mask, length, values, overflow in updates:
+                for value_offset, packer, value in values:
+                    packer.pack_into(self._buffer, value_offset, value)
+                if overflow is not None:
+                    self._buffer[start:start + length] = overflow
+                self._REGION.pack_into(self._buffer, offset, mask, length)
+
+            # Mark the write as finished
+            self._HEADER.pack_into(self._buffer, 0, sequence + 2, count)
+
+        return sequence // 2 + 1
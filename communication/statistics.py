@@ -0,0 +1,388 @@
+"""
+Statistics
+**********
+
+Description
+===========
+
+This module is used to measure the health of the link with the Raspberry Pi - how long the messages take to make a
+round trip, and when the Raspberry Pi was last heard from - and the performance of each camera's video stream.
+
+Functionality
+=============
+
+LinkStatistics
+--------------
+
+The :class:`LinkStatistics` class keeps a rolling window of the latest round-trip times (RTT), and the time the last
+message was received. All values are kept in the shared memory, so the statistics recorded by the connection process can
+be queried from any other process (for example the GUI).
+
+The percentiles and the histogram are calculated from the samples within the window, so they describe the recent state
+of the link rather than the whole session.
+
+A link is considered dead once nothing was received within the given deadline - the connection then closes it, and
+counts it as lost.
+
+StreamStatistics
+----------------
+
+The :class:`StreamStatistics` class keeps the rolling windows of a :class:`VideoStream`'s latest frames - the time each
+frame was fully received and its size, and the time each frame took to decode and to become available to the consumers
+(from the moment its end was received, until it was published). It also counts the connections, the corrupt frames
+(which fail to un-pickle or to decode, and reset the connection) and the dropped frames (decoded, but superseded by a
+newer frame before being published). The frame and byte rates are calculated from the frames received within the last
+`RATE_PERIOD`.
+
+The windows are written without a lock, as each window and counter only has a single writer (the stream's receiving
+thread, or the publishing code guarded by the stream's own lock), which fills a sample before counting it. A reader
+may therefore see a sample that is being overwritten, which is tolerated in exchange for never blocking the stream. All
+values are kept in the shared memory, so they can be queried from any process.
+
+Execution
+---------
+
+The statistics are recorded by the :class:`Connection`, and queried through it::
+
+    connection.statistics()  # returns {"alive": True, "rtt_p50": 0.0004, ...}
+
+To record them directly::
+
+    statistics = LinkStatistics(window=1000)
+    statistics.connected()
+    statistics.record(0.0004)
+    statistics.percentiles(50, 99)  # returns {50: 0.0004, 99: 0.0004}
+
+The stream statistics are recorded by each :class:`VideoStream`, and queried through it::
+
+    stream.statistics()  # returns {"fps": 29.9, "bytes_per_second": 27554000.0, "decode_p50": 0.0021, ...}
+
+.. note::
+
+    The times are measured with :func:`time.monotonic`, so they're comparable between the processes.
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`LinkStatistics`
+class:
+
+    1. :func:`__init__` allocates the shared window and counters
+    2. :func:`connected` marks the start of a connection
+    3. :func:`heard` marks a message received from the Raspberry Pi
+    4. :func:`record` records a round-trip time
+    5. :func:`sent_heartbeat` counts a heartbeat sent
+    6. :func:`lost` counts a dead (or closed) link
+    7. :func:`expired` checks whether nothing was received within a deadline
+    8. :func:`samples` returns the round-trip times within the window
+    9. :func:`percentiles` calculates the percentiles of the round-trip times
+    10. :func:`histogram` counts the round-trip times within the given bins
+    11. :func:`summary` returns a dictionary of all statistics
+
+The following list shortly summarises the functionality of each code component within the :class:`StreamStatistics`
+class:
+
+    1. :func:`__init__` allocates the shared windows and counters
+    2. :func:`connected` counts a connection
+    3. :func:`arrived` records a fully received frame
+    4. :func:`published` records a published frame's decoding time and latency
+    5. :func:`corrupt` counts a corrupt frame
+    6. :func:`dropped` counts a dropped frame
+    7. :func:`rates` calculates the frames and the bytes received per second
+    8. :func:`percentiles` calculates the percentiles of the decoding times and the latencies
+    9. :func:`summary` returns a dictionary of all statistics
+
+Modifications
+=============
+
+You should adjust the `window` passed to :func:`__init__` to specify how many round trips (or frames) are kept, and the
+`RATE_PERIOD` to trade the stability of the rates for their responsiveness.
+"""
+
+import numpy as np
+from pathos import helpers
+from time import monotonic
+
+# Declare the indices of the counters - number of samples recorded, time of the last message received, start of the
+# connection (0 if not connected), number of heartbeats sent, and number of links lost
+SAMPLES = 0
+HEARD = 1
+CONNECTED = 2
+HEARTBEATS = 3
+LOST = 4
+
+# Declare the percentiles included in the summary
+PERCENTILES = (50, 95, 99)
+
+# Declare the indices of the stream counters - number of frames received, number of frames published, number of
+# connections, number of corrupt frames, and number of dropped frames
+FRAMES_ARRIVED = 0
+FRAMES_PUBLISHED = 1
+CONNECTIONS = 2
+CORRUPT = 3
+DROPPED = 4
+
+# Declare the period over which the stream's frame and byte rates are calculated (seconds)
+RATE_PERIOD = 2
+
+
+class LinkStatistics:
+
+    def __init__(self, *, window=1000):
+        """
+        Constructor function used to allocate the shared window of samples and counters.
+
+        :param window: Number of the latest round-trip times kept
+        """
+
+        # Allocate the ring of the round-trip times and the counters, and the lock shared between the processes
+        self._window = window
+        self._samples = helpers.mp.Array("d", window, lock=False)
+        self._counters = helpers.mp.Array("d", 5, lock=False)
+        self._lock = helpers.mp.Lock()
+
+    def connected(self):
+        """
+        Function used to mark the start of a connection (the deadline counts from it, until a message is received).
+        """
+
+        with self._lock:
+            self._counters[CONNECTED] = self._counters[HEARD] = monotonic()
+
+    def heard(self):
+        """
+        Function used to mark a message received from the Raspberry Pi.
+        """
+
+        self._counters[HEARD] = monotonic()
+
+    def record(self, rtt: float):
+        """
+        Function used to record a round-trip time (which also marks a message received).
+
+        :param rtt: Round-trip time (seconds)
+        """
+
+        with self._lock:
+            count = int(self._counters[SAMPLES])
+            self._samples[count % self._window] = rtt
+            self._counters[SAMPLES] = count + 1
+            self._counters[HEARD] = monotonic()
+
+    def sent_heartbeat(self):
+        """
+        Function used to count a heartbeat sent.
+        """
+
+        with self._lock:
+            self._counters[HEARTBEATS] += 1
+
+    def lost(self):
+        """
+        Function used to count a lost link, and mark it as disconnected.
+        """
+
+        with self._lock:
+            self._counters[LOST] += 1
+            self._counters[CONNECTED] = 0
+
+    def expired(self, deadline: float) -> bool:
+        """
+        Function used to check whether nothing was received within the deadline, while connected.
+
+        :param deadline: Maximum time between the received messages (seconds)
+        :return: True if the link stopped responding, False otherwise
+        """
+
+        return bool(self._counters[CONNECTED]) and monotonic() - self._counters[HEARD] > deadline
+
+    def samples(self) -> np.ndarray:
+        """
+        Function used to return the round-trip times within the window.
+
+        :return: Array of the round-trip times (seconds), in no particular order
+        """
+
+        with self._lock:
+            return np.array(self._samples[:min(int(self._counters[SAMPLES]), self._window)])
+
+    def percentiles(self, *percentiles) -> dict:
+        """
+        Function used to calculate the percentiles of the round-trip times within the window.
+
+        :param percentiles: Percentiles to calculate, `PERCENTILES` by default
+        :return: Dictionary of the round-trip times (seconds) for each percentile, None if nothing was recorded
+        """
+
+        percentiles, samples = percentiles or PERCENTILES, self.samples()
+        if not samples.size:
+            return {percentile: None for percentile in percentiles}
+
+        return dict(zip(percentiles, np.percentile(samples, percentiles).tolist()))
+
+    def histogram(self, bins) -> tuple:
+        """
+        Function used to count the round-trip times within the window, falling into each bin.
+
+        :param bins: Number of bins, or the sequence of the bins' edges (seconds)
+        :return: Tuple of the counts' array and the edges' array
+        """
+
+        return np.histogram(self.samples(), bins)
+
+    def summary(self, deadline: float) -> dict:
+        """
+        Function used to return all statistics.
+
+        :param deadline: Maximum time between the received messages (seconds)
+        :return: Dictionary of the statistics
+        """
+
+        # Fetch the counters and the percentiles
+        counters = self._counters[:]
+        summary = {"rtt_p{}".format(percentile): value for percentile, value in self.percentiles().items()}
+
+        # Calculate the time since the last message was received (None if never connected)
+        summary["since_heard"] = monotonic() - counters[HEARD] if counters[HEARD] else None
+        summary["alive"] = bool(counters[CONNECTED]) and not self.expired(deadline)
+        summary["samples"] = int(counters[SAMPLES])
+        summary["heartbeats"] = int(counters[HEARTBEATS])
+        summary["links_lost"] = int(counters[LOST])
+
+        return summary
+
+
+class StreamStatistics:
+
+    def __init__(self, *, window=1000):
+        """
+        Constructor function used to allocate the shared windows of samples and counters.
+
+        :param window: Number of the latest frames kept
+        """
+
+        # Allocate the rings of the (arrival time, size) and the (decoding time, latency) pairs, and the counters
+        self._window = window
+        self._arrivals = helpers.mp.Array("d", window * 2, lock=False)
+        self._publications = helpers.mp.Array("d", window * 2, lock=False)
+        self._counters = helpers.mp.Array("d", 5, lock=False)
+
+    def connected(self):
+        """
+        Function used to count a connection (every connection but the first one is a reconnection).
+        """
+
+        self._counters[CONNECTIONS] += 1
+
+    def arrived(self, size: int):
+        """
+        Function used to record a fully received frame. Must only be called by the stream's receiving thread.
+
+        :param size: Size of the frame (bytes)
+        """
+
+        # Fill the sample before counting it
+        count = int(self._counters[FRAMES_ARRIVED])
+        index = count % self._window * 2
+        self._arrivals[index], self._arrivals[index + 1] = monotonic(), size
+        self._counters[FRAMES_ARRIVED] = count + 1
+
+    def published(self, decode: float, latency: float):
+        """
+        Function used to record a published frame. Must only be called by one thread at a time.
+
+        :param decode: Time taken to decode the frame (seconds)
+        :param latency: Time from the frame's end being received, until the frame was published (seconds)
+        """
+
+        # Fill the sample before counting it
+        count = int(self._counters[FRAMES_PUBLISHED])
+        index = count % self._window * 2
+        self._publications[index], self._publications[index + 1] = decode, latency
+        self._counters[FRAMES_PUBLISHED] = count + 1
+
+    def corrupt(self):
+        """
+        Function used to count a corrupt frame. Must only be called by the stream's receiving thread.
+        """
+
+        self._counters[CORRUPT] += 1
+
+    def dropped(self):
+        """
+        Function used to count a dropped frame. Must only be called by one thread at a time.
+        """
+
+        self._counters[DROPPED] += 1
+
+    def rates(self) -> tuple:
+        """
+        Function used to calculate the frames and the bytes received per second, within the last `RATE_PERIOD` (or the
+        time covered by the window, if shorter).
+
+        :return: Tuple of the frames per second and the bytes per second
+        """
+
+        # Fetch the filled part of the window
+        count, now = int(self._counters[FRAMES_ARRIVED]), monotonic()
+        samples = np.array(self._arrivals[:min(count, self._window) * 2]).reshape(-1, 2)
+        if not samples.size:
+            return 0.0, 0.0
+
+        # Shorten the period to the time covered by a full window
+        period = RATE_PERIOD
+        if count >= self._window:
+            period = max(min(period, now - samples[:, 0].min()), 1e-9)
+
+        recent = samples[samples[:, 0] >= now - period]
+
+        return len(recent) / period, float(recent[:, 1].sum()) / period
+
+    def percentiles(self, *percentiles) -> dict:
+        """
+        Function used to calculate the percentiles of the decoding times and the latencies within the window.
+
+        :param percentiles: Percentiles to calculate, `PERCENTILES` by default
+        :return: Dictionary of the (decoding time, latency) tuples (seconds) for each percentile, None if nothing was
+            published
+        """
+
+        percentiles = percentiles or PERCENTILES
+        count = int(self._counters[FRAMES_PUBLISHED])
+        samples = np.array(self._publications[:min(count, self._window) * 2]).reshape(-1, 2)
+        if not samples.size:
+            return {percentile: None for percentile in percentiles}
+
+        values = np.percentile(samples, percentiles, axis=0).tolist()
+
+        return {percentile: tuple(value) for percentile, value in zip(percentiles, values)}
+
+    def summary(self) -> dict:
+        """
+        Function used to return all statistics.
+
+        :return: Dictionary of the statistics
+        """
+
+        # Fetch the counters and the rates
+        counters = self._counters[:]
+        summary = dict(zip(("fps", "bytes_per_second"), self.rates()))
+
+        # Add the percentiles of the decoding times and the latencies
+        for percentile, value in self.percentiles().items():
+            summary["decode_p{}".format(percentile)] = value[0] if value is not None else None
+            summary["latency_p{}".format(percentile)] = value[1] if value is not None else None
+
+        # Calculate the time since the last frame was received (None if nothing was received)
+        arrived = int(counters[FRAMES_ARRIVED])
+        summary["since_frame"] = monotonic() - self._arrivals[(arrived - 1) % self._window * 2] if arrived else None
+        summary["frames"] = arrived
+        summary["reconnects"] = max(int(counters[CONNECTIONS]) - 1, 0)
+        summary["corrupt"] = int(counters[CORRUPT])
+        summary["dropped"] = int(counters[DROPPED])
+
+        return summary
@@ -0,0 +1,294 @@
+"""
+Vehicles
+********
+
+Description
+===========
+
+This module is used to control several vehicles from a single surface station, within a single process.
+
+Functionality
+=============
+
+VehicleManager
+--------------
+
+The :class:`VehicleManager` class owns the sessions of several vehicles, and runs all of them on a single, shared
+:class:`Engine` - one event loop for all control links and video streams, one worker pool decoding the frames, and one
+watcher of the data manager's modifications. The number of the processes and the threads therefore doesn't grow with the
+number of vehicles (a standalone :class:`Connection` runs in its own process, and each standalone :class:`VideoStream`
+in its own thread).
+
+Vehicle
+-------
+
+The :class:`Vehicle` class is a single vehicle's session - its control link and its cameras. The vehicle's data is kept
+in its own namespace of the data manager (the keys are prefixed with the vehicle's name, for example `rov2/Mot_G`), so
+the vehicles never overwrite each other's setpoints or telemetry. A vehicle with an empty name uses the global keys, so
+it can be driven by the existing :class:`Controller`.
+
+Execution
+---------
+
+To control several vehicles, add each of them to the manager, and start it::
+
+    manager = VehicleManager()
+    manager.add("rov1", ip="169.254.246.235")
+    manager.add("rov2", ip="169.254.231.182", cameras=2, protocol="binary", duplex=True)
+    manager.start()
+
+    manager["rov2"].set_data(Mot_G=1600)
+    manager["rov2"].get_data("depth")  # returns {"depth": 10.5}
+    manager["rov2"].frames  # returns the latest frame of each camera
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`Vehicle` class:
+
+    1. :func:`__init__` builds the vehicle's connection and video streams
+    2. :func:`name` is a getter for the vehicle's name (and namespace)
+    3. :func:`connection` is a getter for the vehicle's :class:`Connection`
+    4. :func:`streams` is a getter for the vehicle's :class:`VideoStream` objects
+    5. :func:`frames` is a getter for the latest frame of each camera
+    6. :func:`get_data` retrieves the vehicle's data
+    7. :func:`set_data` modifies the vehicle's data
+    8. :func:`statistics` returns the statistics of the vehicle's control link
+    9. :func:`start` starts the vehicle's connection and video streams
+
+The following list shortly summarises the functionality of each code component within the :class:`VehicleManager`
+class:
+
+    1. :func:`__init__` builds the shared engine
+    2. :func:`engine` is a getter for the shared :class:`Engine`
+    3. :func:`add` adds a vehicle (and starts it, if the manager was started already)
+    4. :func:`__getitem__`, :func:`__iter__` and :func:`__len__` access the vehicles by their names
+    5. :func:`start` starts all vehicles
+    6. :func:`stop` stops the shared engine, and with it all vehicles
+
+Modifications
+=============
+
+You should consider modifying the `workers` passed to :func:`VehicleManager.__init__` to specify how many frames can be
+decoded at once.
+"""
+
+import communication.data_manager as dm
+from communication.connection import Connection
+from communication.engine import Engine
+from communication.video_stream import VideoStream
+
+# Declare the offset between the control port and the first camera port
+CAMERA_PORT_OFFSET = 10
+
+
+class Vehicle:
+
+    def __init__(self, name: str, *, ip: str, port: int, camera_port: int, cameras: int, engine: Engine, **options):
+        """
+        Constructor function used to initialise the vehicle's connection and video streams.
+
+        :param name: Name of the vehicle, used as the namespace of its data
+        :param ip: Vehicle's IP address
+        :param port: Vehicle's control port
+        :param camera_port: Port of the vehicle's first camera (the next cameras use the next ports)
+        :param cameras: Number of the vehicle's cameras
+        :param engine: :class:`Engine` to run the connection and the video streams on
+        :param options: Remaining options of the :class:`Connection` (protocol, delta, duplex, transport)
+        """
+
+        if dm.NAMESPACE_SEPARATOR in name:
+            raise ValueError("The vehicle's name can't contain \"{}\"".format(dm.NAMESPACE_SEPARATOR))
+
+        # Save the name, and remember whether the vehicle was started
+        self._name = name
+        self._started = False
+
+        # Build the control link within the vehicle's namespace, and the video streams
+        self._connection = Connection(ip=ip, port=port, engine=engine, namespace=name, **options)
+        self._streams = [VideoStream(ip=ip, port=p, engine=engine) for p in range(camera_port, camera_port + cameras)]
+
+    @property
+    def name(self) -> str:
+        """
+        Getter for the vehicle's name.
+
+        :return: Name of the vehicle (the namespace of its data)
+        """
+
+        return self._name
+
+    @property
+    def connection(self) -> Connection:
+        """
+        Getter for the vehicle's control link.
+
+        :return: :class:`Connection` of the vehicle
+        """
+
+        return self._connection
+
+    @property
+    def streams(self) -> list:
+        """
+        Getter for the vehicle's video streams.
+
+        :return: List of the :class:`VideoStream` objects, one for each camera
+        """
+
+        return self._streams
+
+    @property
+    def frames(self) -> list:
+        """
+        Getter for the latest frames of the vehicle's cameras.
+
+        :return: List of the OpenCV-formatted frames (None until a camera's first frame is received)
+        """
+
+        return [stream.frame for stream in self._streams]
+
+    def get_data(self, *args, transmit=False) -> dict:
+        """
+        Function used to retrieve the vehicle's data.
+
+        :param args: Keys to retrieve (returns all keys of the vehicle if no args are passed)
+        :param transmit: Boolean to specify if only the transmission data should be retrieved
+        :return: Dictionary of the data (the keys without the vehicle's prefix)
+        """
+
+        return dm.get_data(*args, transmit=transmit, namespace=self._name)
+
+    def set_data(self, **kwargs):
+        """
+        Function used to modify the vehicle's data.
+
+        :param kwargs: Key-value pairs to modify (the keys without the vehicle's prefix)
+        """
+
+        dm.set_many(kwargs, namespace=self._name)
+
+    def statistics(self) -> dict:
+        """
+        Function used to return the statistics of the vehicle's control link.
+
+        :return: Dictionary of the statistics (see :func:`Connection.statistics`)
+        """
+
+        return self._connection.statistics()
+
+    def start(self):
+        """
+        Function used to start the vehicle's connection and video streams (only once).
+        """
+
+        if self._started:
+            return
+
+        self._started = True
+        self._connection.connect()
+        for stream in self._streams:
+            stream.stream()
+
+
+class VehicleManager:
+
+    def __init__(self, *, workers=4):
+        """
+        Constructor function used to initialise the shared engine, and the vehicles' sessions.
+
+        :param workers: Number of the engine's worker threads, shared by all vehicles
+        """
+
+        # Build the shared engine
+        self._engine = Engine(workers=workers)
+
+        # Initialise the vehicles (by their names), and remember whether the manager was started
+        self._vehicles = dict()
+        self._started = False
+
+    @property
+    def engine(self) -> Engine:
+        """
+        Getter for the shared engine.
+
+        :return: :class:`Engine` running all vehicles
+        """
+
+        return self._engine
+
+    def add(self, name: str, *, ip="localhost", port=50000, camera_port=None, cameras=3, **options) -> Vehicle:
+        """
+        Function used to add a vehicle, and start it if the manager was started already.
+
+        :param name: Unique name of the vehicle, used as the namespace of its data
+        :param ip: Vehicle's IP address
+        :param port: Vehicle's control port
+        :param camera_port: Port of the vehicle's first camera, `CAMERA_PORT_OFFSET` after the control port by default
+        :param cameras: Number of the vehicle's cameras
+        :param options: Remaining options of the :class:`Connection` (protocol, delta, duplex, transport)
+        :return: The added :class:`Vehicle`
+        """
+
+        if name in self._vehicles:
+            raise ValueError("Vehicle {} was added already".format(name))
+
+        # Build the vehicle's session on the shared engine
+        camera_port = port + CAMERA_PORT_OFFSET if camera_port is None else camera_port
+        vehicle = Vehicle(name, ip=ip, port=port, camera_port=camera_port, cameras=cameras, engine=self._engine,
+                          **options)
+        self._vehicles[name] = vehicle
+
+        # Start the vehicle if the others are running
+        if self._started:
+            vehicle.start()
+
+        return vehicle
+
+    def __getitem__(self, name: str) -> Vehicle:
+        """
+        Function used to access a vehicle by its name.
+
+        :param name: Name of the vehicle
+        :return: The :class:`Vehicle`
+        """
+
+        return self._vehicles[name]
+
+    def __iter__(self):
+        """
+        Function used to iterate over the vehicles.
+
+        :return: Iterator of the :class:`Vehicle` objects, in the order they were added
+        """
+
+        return iter(self._vehicles.values())
+
+    def __len__(self) -> int:
+        """
+        Function used to count the vehicles.
+
+        :return: Number of the vehicles
+        """
+
+        return len(self._vehicles)
+
+    def start(self):
+        """
+        Function used to start all vehicles (and any vehicle added later).
+        """
+
+        self._started = True
+        for vehicle in self._vehicles.values():
+            vehicle.start()
+
+    def stop(self):
+        """
+        Function used to stop the shared engine, and with it all vehicles' connections and video streams.
+        """
+
+        self._engine.stop()
@@ -13,7 +13,41 @@ Functionality
 VideoStream
 -----------
 
-The :class:`VideoStream` class provides a TCP-based streaming of a single camera.
+The :class:`VideoStream` class provides a TCP-based streaming of a single camera. The stream runs in a separate thread
+by default. If an :class:`Engine` is given, it runs as a coroutine on the engine's event loop instead, and the received
+frames are decoded in the engine's worker pool, so that the event loop keeps serving the other connections meanwhile.
+
+The received data is reassembled in a single, preallocated buffer, which is only grown when a frame doesn't fit in it.
+The socket writes straight into the buffer's free space (with `recv_into`), and only the newly received bytes are
+searched for the frame's terminator, so each byte of a frame is copied once, rather than once per `recv` call.
+
+The following protocols are supported:
+
+    1. `framed` - each frame starts with a header declaring its length, encoding and shape (see the
+       :mod:`communication.frames` module), and the raw or JPEG payload is decoded straight into a NumPy array
+    2. `dill` - pickled frames followed by the "Frame was successfully sent" terminator, for the Raspberry Pi builds
+       which don't support the framing
+    3. `auto` - either of the above, detected from the first bytes of each connection
+
+If a :class:`DecoderPool` is given, the pickled and the JPEG frames are decoded in its worker processes (the raw frames
+are cheap to decode, so they're always decoded by the stream). The receiving thread sends the acknowledgement and keeps
+receiving the next frame while the previous ones are decoded, and only waits for a decode once `self._MAX_PENDING`
+frames are being decoded. Each frame is published as soon as it's decoded, unless a newer frame was published already.
+
+The frames are published into a :class:`FrameMailbox`, together with their sequence numbers (in the order of arrival,
+increasing across the reconnections) and the times they were received. The consumers read the latest frame with
+:func:`latest`, or block in :func:`wait_for_frame` until a frame newer than the last one they've seen arrives. The
+consumers which need every published frame (for example the :class:`Recorder`) register a tap with :func:`tap`, called
+with each published frame - the taps are called by the receiving (or the decoding) thread, so they must never block.
+
+Each stream measures its performance with :class:`StreamStatistics` - the frame and byte rates, the decoding times, the
+latencies from receiving a frame's end until publishing it, the reconnections, and the corrupt and the dropped frames.
+The statistics are kept in the shared memory, and can be queried from any process with :func:`statistics`.
+
+By default, each frame is acknowledged before the Raspberry Pi sends the next one (stop-and-wait), which limits the
+frame rate to one frame per round trip. With the framed protocol, a window can be given instead - the Raspberry Pi then
+keeps up to `window` frames in flight, and the stream acknowledges the frames cumulatively, by their sequence numbers
+(see the :mod:`communication.frames` module). The received data is still bounded, by the window's frames.
 
 Execution
 ---------
@@ -23,7 +57,33 @@ To start the stream, you should create an instance of :class:`VideoStream` and c
     stream = VideoStream(ip=ip, port=port)
     stream.stream()
 
-where `ip` and `port` are the connection-related values.
+where `ip` and `port` are the connection-related values. To only accept the framed stream, pass the protocol::
+
+    stream = VideoStream(ip=ip, port=port, protocol="framed")
+
+To keep several frames in flight (which requires the framed protocol), pass the window::
+
+    stream = VideoStream(ip=ip, port=port, protocol="framed", window=4)
+
+To decode the frames in separate processes, pass a pool (shared by all streams)::
+
+    pool = DecoderPool(workers=2)
+    stream = VideoStream(ip=ip, port=port, decoder=pool)
+
+To process each new frame (without spinning over the same frame), wait for the frames newer than the last one seen::
+
+    received = stream.wait_for_frame(0)
+    while True:
+        process(received.frame)
+        received = stream.wait_for_frame(received.sequence)
+
+To stop the stream (for example before closing the pool it decodes the frames in)::
+
+    stream.stop()
+
+To find which camera link is the bottleneck, compare the streams' statistics::
+
+    stream.statistics()  # returns {"fps": 29.9, "bytes_per_second": 27554000.0, "decode_p50": 0.0021, ...}
 
 Functions & classes
 -------------------
@@ -37,15 +97,41 @@ The following list shortly summarises the functionality of each code component w
     1. :class:`DataError` is a support class to handle custom exceptions
     2. :func:`__init__` builds the stream object
     3. :func:`frame` is a getter for the camera frame
-    4. :func:`_handle_data` receives and sends the data
-    5. :func:`_connect` runs an infinite loop to keep exchanging the data (frames)
-    6. :func:`stream` starts the streaming thread
+    4. :func:`latest` returns the latest frame with its sequence number and receive time, without blocking
+    5. :func:`wait_for_frame` blocks until a frame newer than the given one is received
+    6. :func:`tap` registers a function called with each published frame
+    7. :func:`untap` removes a registered function
+    8. :func:`statistics` returns the stream's statistics
+    9. :func:`stream_statistics` is a getter for the :class:`StreamStatistics` object
+    10. :func:`_handle_data` receives and sends the data
+    11. :func:`_handle_data_async` receives and sends the data, as a coroutine
+    12. :func:`_receive` receives the data straight into the buffer
+    13. :func:`_append` copies the data received by the asyncio streams into the buffer
+    14. :func:`_reserve` grows the buffer if its free space is too small
+    15. :func:`_extract_frame` decodes a fully received frame
+    16. :func:`_decode` decodes a frame according to the protocol
+    17. :func:`_acknowledgement` encodes the acknowledgement of the received frames
+    18. :func:`_offloaded` checks whether a frame should be decoded in the pool
+    19. :func:`_collect` waits for the frames decoded in the pool
+    20. :func:`_publish` publishes a frame into the mailbox, unless a newer frame was published already
+    21. :func:`_take_frame` removes a fully received frame from the buffer
+    22. :func:`_take_framed` removes a fully received framed frame from the buffer
+    23. :func:`_take_pickled` removes a fully received pickled frame from the buffer
+    24. :func:`_consume` discards the given number of bytes from the start of the buffer
+    25. :func:`_reset` discards the partially received frame
+    26. :func:`_close` closes the socket
+    27. :func:`_connect` runs a loop to keep exchanging the data (frames), until the stream is stopped
+    28. :func:`_connect_async` runs a loop to keep exchanging the data (frames), as a coroutine
+    29. :func:`stream` starts the streaming thread
+    30. :func:`stop` stops the stream, and waits for its thread
 
 Modifications
 =============
 
 The only functions that could require modification are :func:`_on_surface_disconnected` and :func:`_handle_data`, as
-the module expands. You should also consider modifying the `self._TIMEOUT` value within :func:`__init__`.
+the module expands. You should also consider modifying the `self._TIMEOUT` value within :func:`__init__`, and the
+`self._INITIAL_BUFFER_SIZE` value if the frames are much larger than 1 MiB, and the `self._MAX_PENDING` value to trade
+the memory for the decoding parallelism.
 
 Authorship
 ==========
@@ -53,12 +139,23 @@ Authorship
 Kacper Florianski
 """
 
+import asyncio
 import socket
-from time import sleep
-from dill import loads
-from threading import Thread
+from collections import deque
+from concurrent.futures import Future
+from communication.decoding import decode_payload
+from communication.frames import ACK, HEADER, MAGIC, RAW, decode_header, encode_acknowledgement, encode_window_hello, \
+    is_framed
+from communication.protocol import ProtocolError
+from communication.queues import FrameMailbox
+from communication.statistics import StreamStatistics
+from time import monotonic, sleep, time
+from threading import Event, Lock, Thread
 from _pickle import UnpicklingError
 
+# Declare the supported protocols
+PROTOCOLS = ("auto", "framed", "dill")
+
 
 class VideoStream:
 
@@ -66,16 +163,27 @@ class VideoStream:
     class DataError(Exception):
         pass
 
-    def __init__(self, ip="localhost", port=50001):
+    def __init__(self, ip="localhost", port=50001, engine=None, protocol="auto", decoder=None, window=1):
         """
         Constructor function used to initialise the stream.
 
-        It is recommended that you change the `self._RECONNECT_DELAY` to adjust the delay on reconnection with the Pi.
+        It is recommended that you change the `self._RECONNECT_DELAY` to adjust the delay on reconnection with the Pi,
+        and the `self._BUFFER_SIZE` to adjust the number of bytes received at once.
 
         :param ip: Raspberry Pi's IP address
         :param port: Raspberry Pi's port
+        :param engine: :class:`Engine` to run the stream on, instead of a separate thread
+        :param protocol: Name of the protocol, one of `PROTOCOLS`
+        :param decoder: :class:`DecoderPool` to decode the frames in, instead of the stream's thread (or the engine)
+        :param window: Maximum number of the unacknowledged frames, more than 1 requires the framed protocol
         """
 
+        if protocol not in PROTOCOLS:
+            raise ValueError("Unsupported protocol: {}".format(protocol))
+
+        if window > 1 and protocol != "framed":
+            raise ValueError("The windowed acknowledgements require the framed protocol")
+
         # Save the host and port information
         self._ip = ip
         self._port = port
@@ -86,27 +194,128 @@ class VideoStream:
         # Initialise the delay constant to offload some computing power when reconnecting
         self._RECONNECT_DELAY = 1
 
-        # Build and store the thread instance
-        self._thread = Thread(target=self._connect)
+        # Initialise the maximum number of bytes received at once
+        self._BUFFER_SIZE = 65536
+
+        # Initialise the starting size of the received data's buffer (fits a pickled 640x480 colour frame)
+        self._INITIAL_BUFFER_SIZE = 1 << 20
+
+        # Initialise the maximum number of frames decoded in the pool at once
+        self._MAX_PENDING = 2
 
-        # Initialise the frame-end string to recognise when a full frame was received
+        # Build and store the thread instance, or remember the engine
+        self._thread = Thread(target=self._connect) if engine is None else None
+        self._engine = engine
+
+        # Initialise the event set once the stream should stop
+        self._stopped = Event()
+
+        # Initialise the frame-end string to recognise when a full pickled frame was received
         self._end_payload = bytes("Frame was successfully sent", encoding="ASCII")
 
-        # Store the frame information
-        self._frame = None
+        # Save the protocol, and whether the stream is framed (None until detected)
+        self._protocol = protocol
+        self._framed = {"auto": None, "framed": True, "dill": False}[protocol]
+
+        # Save the window, and initialise the sequence number of the last received frame (acknowledged cumulatively)
+        self._window = window
+        self._last_sequence = None
 
-        # Initialise the frame video stream data
-        self._frame_partial = b''
+        # Initialise the mailbox of the latest frame, and the functions called with each published frame (replaced
+        # rather than modified, so that they're iterated over without a lock)
+        self._mailbox = FrameMailbox()
+        self._taps = tuple()
+
+        # Save the decoder pool, and initialise the futures of the frames decoded in it (in the order of arrival)
+        self._decoder = decoder
+        self._pending = deque()
+
+        # Initialise the sequence numbers of the last received frame and of the last frame of the previous connections
+        # (the frames still being decoded when the connection was reset aren't published), and the lock guarding them
+        self._received_frames = 0
+        self._stale_frames = 0
+        self._frame_lock = Lock()
+
+        # Initialise the performance statistics (shared with the other processes)
+        self._statistics = StreamStatistics(window=1000)
+
+        # Initialise the buffer of the received data, its view, and the numbers of the received and the searched bytes
+        self._buffer = bytearray(self._INITIAL_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._received = 0
+        self._searched = 0
 
     @property
     def frame(self):
         """
         Getter for the camera frame
 
-        :return: OpenCV-formatted frame (numpy array)
+        :return: OpenCV-formatted frame (numpy array), or None if no frame was received yet
+        """
+
+        latest = self._mailbox.latest()
+
+        return latest.frame if latest is not None else None
+
+    def latest(self):
+        """
+        Function used to return the latest frame without blocking.
+
+        :return: :class:`ReceivedFrame` of the sequence number, the receive time and the frame, or None if no frame was
+            received yet
+        """
+
+        return self._mailbox.latest()
+
+    def wait_for_frame(self, after_seq=0, timeout=None):
+        """
+        Function used to block until a frame newer than the given one is received (and decoded).
+
+        :param after_seq: Sequence number of the last frame seen by the caller (0 to wait for any frame)
+        :param timeout: Maximum time to wait (seconds), waits indefinitely if None
+        :return: :class:`ReceivedFrame` of the latest frame, or None if the time ran out
+        """
+
+        return self._mailbox.wait_for_frame(after_seq, timeout)
+
+    def tap(self, callback):
+        """
+        Function used to register a function called with each published frame.
+
+        The function is called by the receiving (or the decoding) thread, so it must return quickly and never block.
+
+        :param callback: Function called with the sequence number, the receive time and the frame
+        """
+
+        self._taps = self._taps + (callback,)
+
+    def untap(self, callback):
+        """
+        Function used to remove a function registered with :func:`tap`.
+
+        :param callback: Registered function
+        """
+
+        self._taps = tuple(tap for tap in self._taps if tap != callback)
+
+    def statistics(self) -> dict:
+        """
+        Function used to return the stream's statistics (can be called from any process).
+
+        :return: Dictionary of the statistics, see :func:`StreamStatistics.summary`
         """
 
-        return self._frame
+        return self._statistics.summary()
+
+    @property
+    def stream_statistics(self) -> StreamStatistics:
+        """
+        Getter for the stream statistics, to query the percentiles or the rates directly.
+
+        :return: :class:`StreamStatistics` object
+        """
+
+        return self._statistics
 
     def _handle_data(self):
         """
@@ -117,40 +326,327 @@ class VideoStream:
 
         # Once connected, keep receiving and sending the data, raise exception in case of errors
         try:
-            # Receive the data
-            self._frame_partial += self._socket.recv(4096)
-
-            # If 0-byte was received, raise exception
-            if not self._frame_partial:
+            # Receive the data, if 0-byte was received, raise exception
+            if not self._receive():
                 sleep(self._RECONNECT_DELAY)
                 raise self.DataError
 
-            # Check if a full frame was sent
-            if self._frame_partial[-len(self._end_payload):] == self._end_payload:
+            # Send the acknowledgement if any full frames were received
+            received = False
+            while self._extract_frame():
+                received = True
+            if received:
+                self._socket.sendall(self._acknowledgement())
 
-                # Un-pickle the frame or set it to None if it's empty
-                self._frame = loads(self._frame_partial[:-len(self._end_payload)]) if self._frame_partial else None
+        except (UnpicklingError, ProtocolError):
+            self._statistics.corrupt()
+            sleep(self._RECONNECT_DELAY)
+            raise self.DataError
 
-                # Reset the video stream data
-                self._frame_partial = b''
+        except (ConnectionResetError, ConnectionAbortedError):
+            sleep(self._RECONNECT_DELAY)
+            raise self.DataError
 
-                # Send the acknowledgement
-                self._socket.sendall(bytes("ACK", encoding="ASCII"))
+    async def _handle_data_async(self, reader, writer):
+        """
+        Function used to process the frames without blocking the event loop.
 
-        except (ConnectionResetError, ConnectionAbortedError, UnpicklingError):
-            sleep(self._RECONNECT_DELAY)
+        Same as :func:`_handle_data`.
+
+        :param reader: :class:`asyncio.StreamReader` of the connection
+        :param writer: :class:`asyncio.StreamWriter` of the connection
+        """
+
+        # Once connected, keep receiving and sending the data, raise exception in case of errors
+        try:
+            # Receive the data, if 0-byte was received, raise exception
+            if not self._append(await reader.read(self._BUFFER_SIZE)):
+                await asyncio.sleep(self._RECONNECT_DELAY)
+                raise self.DataError
+
+            # Take all full frames received, and send the acknowledgement if any
+            payloads = list(iter(self._take_frame, None))
+            if payloads:
+                writer.write(self._acknowledgement())
+                await writer.drain()
+
+            # Decode the frames in the worker pool, and publish them
+            received, arrived = time(), monotonic()
+            for payload in payloads:
+                self._received_frames += 1
+                self._statistics.arrived(len(payload))
+                sequence, start = self._received_frames, monotonic()
+                if self._offloaded(payload):
+                    frame = await asyncio.wrap_future(self._decoder.submit(payload, self._framed))
+                else:
+                    frame = await self._engine.run(self._decode, payload)
+                self._publish(sequence, received, frame, arrived, monotonic() - start)
+
+        except (UnpicklingError, ProtocolError):
+            self._statistics.corrupt()
+            await asyncio.sleep(self._RECONNECT_DELAY)
+            raise self.DataError
+
+        except (ConnectionResetError, ConnectionAbortedError):
+            await asyncio.sleep(self._RECONNECT_DELAY)
             raise self.DataError
 
+    def _receive(self) -> int:
+        """
+        Function used to receive the data from the socket straight into the buffer's free space.
+
+        :return: Number of the received bytes (0 if the connection was closed)
+        """
+
+        # Make room for the data, and let the socket write it after the already received bytes
+        self._reserve(self._BUFFER_SIZE)
+        count = self._socket.recv_into(self._view[self._received:], self._BUFFER_SIZE)
+        self._received += count
+
+        return count
+
+    def _append(self, data) -> int:
+        """
+        Function used to copy the data received by the asyncio streams into the buffer.
+
+        The asyncio streams don't support receiving into a given buffer, so the data is copied once instead.
+
+        :param data: Received bytes
+        :return: Number of the received bytes (0 if the connection was closed)
+        """
+
+        # Make room for the data, and write it after the already received bytes
+        self._reserve(len(data))
+        self._view[self._received:self._received + len(data)] = data
+        self._received += len(data)
+
+        return len(data)
+
+    def _reserve(self, size: int):
+        """
+        Function used to grow the buffer (at least doubling it) if fewer than the given number of bytes are free.
+
+        :param size: Number of the bytes that must be free
+        """
+
+        if len(self._buffer) - self._received >= size:
+            return
+
+        # Release the view, as a bytearray can't be resized while it's exported
+        self._view.release()
+        self._buffer.extend(bytes(max(len(self._buffer), size)))
+        self._view = memoryview(self._buffer)
+
+    def _extract_frame(self) -> bool:
+        """
+        Function used to decode the frame once it was fully received.
+
+        :return: True if a full frame was received, False otherwise
+        """
+
+        # Check if a full frame was sent
+        payload = self._take_frame()
+        if payload is None:
+            return False
+
+        self._received_frames += 1
+        self._statistics.arrived(len(payload))
+        sequence, received, arrived = self._received_frames, time(), monotonic()
+
+        # Decode the frame in the pool (once there's room for it), and publish it once decoded
+        if self._offloaded(payload):
+            self._collect(self._MAX_PENDING - 1)
+            future = self._decoder.submit(payload, self._framed)
+            future.add_done_callback(lambda done: self._publish(sequence, received, done, arrived))
+            self._pending.append(future)
+
+        # Otherwise decode the frame straight away
+        else:
+            frame = self._decode(payload)
+            self._publish(sequence, received, frame, arrived, monotonic() - arrived)
+
+        return True
+
+    def _decode(self, payload):
+        """
+        Function used to decode a fully received frame according to the protocol.
+
+        :param payload: Framed frame, or pickled frame (empty if the frame was empty)
+        :return: OpenCV-formatted frame (numpy array), or None if the frame was empty
+        """
+
+        return decode_payload(payload, self._framed)
+
+    def _acknowledgement(self) -> bytes:
+        """
+        Function used to encode the acknowledgement of the received frames.
+
+        :return: "ACK", or the cumulative acknowledgement of the last received frame if the window is used
+        """
+
+        return encode_acknowledgement(self._last_sequence) if self._window > 1 else ACK
+
+    def _offloaded(self, payload) -> bool:
+        """
+        Function used to check whether a frame should be decoded in the pool.
+
+        :param payload: Framed frame, or pickled frame
+        :return: True if a pool was given and the frame isn't a raw frame, False otherwise
+        """
+
+        return self._decoder is not None and not (self._framed and decode_header(payload).encoding == RAW)
+
+    def _collect(self, limit: int):
+        """
+        Function used to wait for the oldest frames decoded in the pool, until at most `limit` frames are being decoded.
+
+        Raises the decoding's exception if a frame failed to decode.
+
+        :param limit: Maximum number of frames left being decoded
+        """
+
+        while self._pending and (self._pending[0].done() or len(self._pending) > limit):
+            self._pending.popleft().result()
+
+    def _publish(self, sequence: int, received: float, frame, arrived: float, decode=None):
+        """
+        Function used to publish a decoded frame into the mailbox, unless a newer frame was published already, or the
+        frame was received before the connection was reset (the frame is then counted as dropped).
+
+        :param sequence: Sequence number of the frame (in the order of arrival)
+        :param received: Time the frame was received (seconds)
+        :param frame: Decoded frame, or the future of the frame decoded in the pool (ignored if it failed to decode)
+        :param arrived: Time the frame was received, measured with :func:`time.monotonic` (seconds)
+        :param decode: Time taken to decode the frame (seconds), the time since the frame was received if not given (for
+            the frames decoded in the pool, which includes the time spent queued)
+        """
+
+        if isinstance(frame, Future):
+            if frame.exception() is not None:
+                return
+            frame = frame.result()
+
+        latency = monotonic() - arrived
+
+        with self._frame_lock:
+            if sequence > self._stale_frames and self._mailbox.put(frame, sequence, received):
+                self._statistics.published(latency if decode is None else decode, latency)
+                for tap in self._taps:
+                    tap(sequence, received, frame)
+            else:
+                self._statistics.dropped()
+
+    def _take_frame(self):
+        """
+        Function used to remove the frame from the buffer once it was fully received, detecting the protocol first if
+        needed.
+
+        :return: Frame (see :func:`_take_framed` and :func:`_take_pickled`), or None if a full frame wasn't received yet
+        """
+
+        # Detect the protocol from the first bytes of the connection
+        if self._framed is None:
+            if self._received < len(MAGIC):
+                return None
+            self._framed = is_framed(self._view[:len(MAGIC)])
+
+        return self._take_framed() if self._framed else self._take_pickled()
+
+    def _take_framed(self):
+        """
+        Function used to remove the framed frame from the buffer once it was fully received.
+
+        Raises :class:`ProtocolError` if the header is malformed.
+
+        :return: Header followed by the payload, or None if a full frame wasn't received yet
+        """
+
+        # Check if a full frame was sent, using the length declared in the header
+        if self._received < HEADER.size:
+            return None
+        header = decode_header(self._view)
+        end = HEADER.size + header.length
+        if self._received < end:
+            return None
+
+        # Remember the sequence number to acknowledge
+        self._last_sequence = header.sequence
+
+        # Copy the frame out of the buffer (into a writable buffer, so that the decoded image is writable as well)
+        frame = bytearray(self._view[:end])
+        self._consume(end)
+
+        return frame
+
+    def _take_pickled(self):
+        """
+        Function used to remove the pickled frame from the buffer once it was fully received.
+
+        Only the newly received bytes (and the end of the previous ones, in case the terminator was split between the
+        `recv` calls) are searched for the terminator.
+
+        :return: Pickled frame (empty if the frame was empty), or None if a full frame wasn't received yet
+        """
+
+        # Check if a full frame was sent
+        end = self._buffer.find(self._end_payload, max(0, self._searched - len(self._end_payload) + 1), self._received)
+        if end == -1:
+            self._searched = self._received
+            return None
+
+        # Copy the frame out of the buffer, so that the buffer can be reused straight away
+        payload = bytearray(self._view[:end])
+        self._consume(end + len(self._end_payload))
+
+        return payload
+
+    def _consume(self, size: int):
+        """
+        Function used to discard the given number of bytes from the start of the buffer, moving any bytes received
+        after them to the start of the buffer.
+
+        :param size: Number of the bytes to discard
+        """
+
+        remaining = self._received - size
+        self._view[:remaining] = self._view[size:self._received]
+        self._received, self._searched = remaining, 0
+
+    def _reset(self):
+        """
+        Function used to discard the partially received frame (the buffer is kept), and the detected protocol.
+        """
+
+        self._received = 0
+        self._searched = 0
+        self._pending.clear()
+        with self._frame_lock:
+            self._stale_frames = self._received_frames
+        if self._protocol == "auto":
+            self._framed = None
+
+    def _close(self):
+        """
+        Function used to close the socket.
+        """
+
+        # Cleanup
+        self._socket.close()
+        self._socket = None
+
+        # Inform that the connection is closed
+        print("Video stream at {}:{} closed successfully".format(self._ip, self._port))
+
     def _connect(self):
         """
         Function used to run a continuous connection with Raspberry Pi.
 
         Runs an infinite loop that performs re-connection to the given address as well as exchanges data with it, via
-        blocking send and receive functions. The data exchanged is pickled using :mod:`dill`.
+        blocking send and receive functions. The frames are decoded according to the protocol.
         """
 
-        # Never stop the connection once it was started
-        while True:
+        # Keep the connection running until the stream is stopped
+        while not self._stopped.is_set():
 
             try:
                 # Check if the socket is None to avoid running into errors when reconnecting
@@ -162,12 +658,21 @@ class VideoStream:
                     # Set the socket for IPv4 addresses (hence AF_INET) and TCP (hence SOCK_STREAM)
                     self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
-                # Connect to the server
+                    # Send the acknowledgements immediately (instead of waiting for the previous ones to be received)
+                    self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+                # Connect to the server, and discard any frame left over from the previous connection
                 self._socket.connect((self._ip, self._port))
+                self._statistics.connected()
+                self._reset()
+
+                # Declare the window, if used
+                if self._window > 1:
+                    self._socket.sendall(encode_window_hello(self._window))
                 print("Connected to video stream at {}:{}, starting data exchange".format(self._ip, self._port))
 
                 # Keep exchanging data
-                while True:
+                while not self._stopped.is_set():
 
                     # Attempt to handle the data, break in case of errors
                     try:
@@ -175,21 +680,93 @@ class VideoStream:
                     except self.DataError:
                         break
 
+                self._close()
+
+            except (ConnectionRefusedError, OSError):
+                if not self._stopped.is_set():
+                    sleep(self._RECONNECT_DELAY)
+                continue
+
+        # Cleanup, if the stream was stopped while connected
+        if self._socket is not None:
+            self._close()
+
+    async def _connect_async(self):
+        """
+        Function used to run a continuous connection with Raspberry Pi as a coroutine.
+
+        Same as :func:`_connect`, but the socket operations and the delays never block the event loop. The connection
+        is handled by the asyncio streams, which keep the socket registered with the event loop.
+        """
+
+        # Keep the connection running until the stream is stopped
+        while not self._stopped.is_set():
+
+            try:
+                # Inform that client is attempting to connect to the server
+                print("Connecting to video stream at {}:{}...".format(self._ip, self._port))
+
+                # Connect to the server
+                reader, writer = await asyncio.open_connection(self._ip, self._port)
+                self._statistics.connected()
+                self._reset()
+
+                # Send the acknowledgements immediately, and declare the window, if used
+                writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                if self._window > 1:
+                    writer.write(encode_window_hello(self._window))
+                print("Connected to video stream at {}:{}, starting data exchange".format(self._ip, self._port))
+
+                # Keep exchanging data
+                while not self._stopped.is_set():
+
+                    # Attempt to handle the data, break in case of errors
+                    try:
+                        await self._handle_data_async(reader, writer)
+                    except self.DataError:
+                        break
+
+                    # Let the other coroutines run (reading doesn't yield while the data is buffered)
+                    await asyncio.sleep(0)
+
                 # Cleanup
-                self._socket.close()
-                self._socket = None
+                writer.close()
 
                 # Inform that the connection is closed
                 print("Video stream at {}:{} closed successfully".format(self._ip, self._port))
 
             except (ConnectionRefusedError, OSError):
-                sleep(self._RECONNECT_DELAY)
+                await asyncio.sleep(self._RECONNECT_DELAY)
                 continue
 
     def stream(self):
         """
-        Function used to start the streaming thread.
+        Function used to start the streaming thread, or the stream's coroutine if an engine was given.
         """
 
+        # Run the coroutine on the engine
+        if self._engine is not None:
+            self._engine.submit(self._connect_async())
+
         # Start receiving the video stream
-        self._thread.start()
+        else:
+            self._thread.start()
+
+    def stop(self):
+        """
+        Function used to stop the stream, and wait for its thread to finish (the coroutine finishes with the next
+        received data, or the next connection attempt).
+        """
+
+        self._stopped.set()
+
+        # Shut the socket down, to unblock the thread waiting on it
+        sock = self._socket
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
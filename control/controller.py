@@ -130,9 +130,9 @@ Pawel Czaplewski
 """
 
 import communication.data_manager as dm
-from threading import Thread
+from threading import Event, Thread
 from inputs import devices
-from time import time
+from time import sleep
 
 
 def normalise(value, current_min, current_max, intended_min, intended_max):
@@ -177,6 +177,9 @@ class Controller:
         self._data_thread = Thread(target=self._update_data)
         self._controller_thread = Thread(target=self._read)
 
+        # Initialise the event set whenever a controller event is dispatched
+        self._dispatched = Event()
+
         # Initialise the axis hardware values
         self._AXIS_MAX = 32767
         self._AXIS_MIN = -32768
@@ -441,11 +444,20 @@ class Controller:
             # Update the corresponding value
             self.__setattr__(self._dispatch_map[event.code], event.state)
 
+            # Inform the data updating thread
+            self._dispatched.set()
+
     def _tick_update_data(self):
         """
         Function used to update the data manager with the current controller values.
+
+        All changed values are committed in a single transaction, so that the connection never observes a partial
+        update.
         """
 
+        # Initialise the dictionary of changed values
+        changes = dict()
+
         # Iterate over all keys that should be updated (use copy of the set to avoid runtime concurrency errors)
         for key in self._data_manager_keys:
 
@@ -454,26 +466,33 @@ class Controller:
 
             # Check if the last saved value and the current reading mismatch
             if key not in self._data_manager_last_saved or self._data_manager_last_saved[key] != value:
+                changes[key] = value
 
-                # Update the corresponding values
-                dm.set_data(**{key: value})
-                self._data_manager_last_saved[key] = value
+        # Update the corresponding values
+        if changes:
+            dm.set_many(changes)
+            self._data_manager_last_saved.update(changes)
 
     def _update_data(self):
         """
         Function used to keep updating the manager with controller values.
+
+        Sleeps until a controller event is dispatched, and then updates the data at most once per `self._UPDATE_DELAY`.
         """
 
-        # Initialise the time counter
-        timer = time()
+        # Publish the initial (idle) values straight away, before any event is dispatched
+        self._tick_update_data()
 
         # Keep updating the data
         while True:
 
-            # Update the data if enough time passed
-            if time() - timer > self._UPDATE_DELAY:
-                self._tick_update_data()
-                timer = time()
+            # Wait for the controller input
+            self._dispatched.wait()
+            self._dispatched.clear()
+
+            # Update the data and delay the next update (events dispatched meanwhile are handled together)
+            self._tick_update_data()
+            sleep(self._UPDATE_DELAY)
 
     def _read(self):
         """
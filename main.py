@@ -19,6 +19,11 @@ To start the code, you should execute the following command::
 
 where `python` is the python's version.
 
+To run the station without the Raspberry Pi, start the simulator first (see the :mod:`simulator.pi` module), and keep
+the ip set to `localhost`::
+
+    python -m simulator.pi
+
 Modifications
 =============
 
@@ -36,6 +41,9 @@ Kacper Florianski
 
 import communication.data_manager as dm
 from communication.connection import Connection
+from communication.decoding import DecoderPool
+from communication.engine import Engine
+from communication.recorder import Recorder
 from communication.video_stream import VideoStream
 from control.controller import Controller
 from cv2 import imshow, waitKey
@@ -43,17 +51,40 @@ from cv2 import imshow, waitKey
 # Declare the number of cameras
 CAMERAS_COUNT = 3
 
+# Declare whether the connection and the video streams should run on a shared asyncio engine
+USE_ENGINE = False
+
+# Declare the number of the processes decoding the frames (0 to decode them within the video streams)
+DECODE_WORKERS = 0
+
+# Declare the directory to record the cameras into (None to not record them), and the recording's format
+RECORDING_PATH = None
+RECORDING_FORMAT = "raw"
+
+# Declare the longest time the test display waits for a new frame (seconds)
+DISPLAY_PERIOD = 1 / 30
+
 
 # TODO: Remove this test script when the GUI is implemented (all it does is show the video frames)
 def blocking_test_video_stream(streams):
+
+    # Remember the sequence number of the last frame shown from each stream
+    shown = [0] * len(streams)
+
     while True:
-        for stream in streams:
-            frame = stream.frame
+
+        # Sleep until the first camera has a new frame (or a frame period passed), then show each camera's new frame
+        streams[0].wait_for_frame(shown[0], DISPLAY_PERIOD)
+        for index, stream in enumerate(streams):
+            latest = stream.latest()
+            if latest is None or latest.sequence == shown[index]:
+                continue
+            shown[index] = latest.sequence
             try:
-                imshow(str(stream), frame)
-                waitKey(1)
+                imshow(str(stream), latest.frame)
             except:
                 pass
+        waitKey(1)
 
 
 if __name__ == "__main__":
@@ -72,14 +103,23 @@ if __name__ == "__main__":
     # Build the controller's instance
     controller = Controller()
 
+    # Initialise the networking engine (if used)
+    engine = Engine() if USE_ENGINE else None
+
     # Initialise the server connection
-    connection = Connection(ip=ip, port=50000)
+    connection = Connection(ip=ip, port=50000, engine=engine)
 
     # Initialise the port iterator
     port = 50010
 
+    # Initialise the frame decoding processes (if used)
+    decoder = DecoderPool(workers=DECODE_WORKERS) if DECODE_WORKERS else None
+
     # Initialise the video streams
-    streams = [VideoStream(ip=ip, port=p) for p in range(port, port + CAMERAS_COUNT)]
+    streams = [VideoStream(ip=ip, port=p, engine=engine, decoder=decoder) for p in range(port, port + CAMERAS_COUNT)]
+
+    # Initialise the recording of the cameras (if used)
+    recorder = Recorder(RECORDING_PATH, streams, form=RECORDING_FORMAT) if RECORDING_PATH else None
 
     # Inform that the execution phase has started
     print("Starting tasks...")
@@ -92,6 +132,10 @@ if __name__ == "__main__":
     for stream in streams:
         stream.stream()
 
+    # Start recording the cameras
+    if recorder is not None:
+        recorder.start()
+
     # Inform that the code has fully executed
     print("Tasks initialised and started successfully")
 
@@ -0,0 +1,581 @@
+"""
+Pi Simulator
+************
+
+Description
+===========
+
+This module is used to simulate the Raspberry Pi, so that the surface station (the :class:`Connection` and the
+:class:`VideoStream` objects) can be run, benchmarked and tested on a single machine.
+
+Functionality
+=============
+
+Control
+-------
+
+The control server listens on the control port (50000 by default), and serves any protocol of the :class:`Connection`:
+
+    1. The framed messages (JSON or binary, full or delta) are decoded with a :class:`DeltaDecoder`, and each one is
+       replied to with the telemetry of the same type. The heartbeats are echoed back unchanged
+    2. The legacy messages (unframed JSON, detected by the first received bytes) are replied to with the unframed JSON
+       telemetry
+    3. The datagrams received on the same UDP port are passed through a :class:`LossInjector` (if a loss is
+       configured), and the stale ones are discarded by a :class:`DatagramReceiver`
+
+With the framed protocols, the telemetry can also be sent periodically (regardless of the received messages), as the
+full-duplex exchange allows.
+
+The telemetry is either a fixed dictionary, or a function of the latest setpoints (called for each telemetry message).
+
+Cameras
+-------
+
+Each camera server listens on the next port from the first camera port (50010 by default), and keeps sending the frames,
+waiting for the "ACK" after each frame - or, if the surface declares a window of frames (framed encodings only), keeping
+up to that many frames unacknowledged, and reading the cumulative acknowledgements. The frames are sent in the
+configured encoding - either pickled and followed by the "Frame was successfully sent" terminator (`dill`, as the old
+Raspberry Pi builds do), or framed with a header (`raw` or `jpeg`, see the :mod:`communication.frames` module) stamped
+with the frame's sequence number and time. The frames are random images of the configured shape (a few distinct frames
+are prepared upfront, so that generating them doesn't limit the frame rate), sent at the configured frame rate (or as
+fast as possible).
+
+Latency
+-------
+
+The configured latency delays everything the simulator sends (the replies, the telemetry and the frames), so that the
+round trip grows by the latency, the way a slow link would.
+
+Execution
+---------
+
+To run the simulator, execute the following command from the project's root directory::
+
+    python -m simulator.pi --cameras 3 --frame-size 640x480 --frame-rate 30 --frame-encoding jpeg --latency 0.02
+
+and start the surface station (for example `main.py`) pointing at `localhost`. To run it within another script (for
+example a benchmark), start it in the background::
+
+    simulator = Simulator(frame_shape=(240, 320, 3), telemetry={"depth": 10.5})
+    simulator.start()
+    ...
+    simulator.stop()
+
+Functions & classes
+-------------------
+
+.. note::
+
+    Remember that the code is further described by in-line comments and docstrings.
+
+The following list shortly summarises the functionality of each code component within the :class:`Simulator` class:
+
+    1. :func:`__init__` prepares the frames and the state of the simulator
+    2. :func:`receiver` is a getter for the receiving side of the datagrams
+    3. :func:`start` binds the servers and starts their threads
+    4. :func:`stop` closes the servers and the connections
+    5. :func:`_listen` binds a listening socket
+    6. :func:`_accept` keeps accepting the connections of a server
+    7. :func:`_apply` stores the received setpoints
+    8. :func:`_telemetry` builds the telemetry
+    9. :func:`_send_delayed` keeps sending the queued data once the latency passes
+    10. :func:`_serve_control` exchanges the control messages with a client
+    11. :func:`_serve_legacy` exchanges the legacy messages with a client
+    12. :func:`_serve_telemetry` keeps sending the periodic telemetry to a client
+    13. :func:`_serve_datagrams` keeps receiving the datagrams
+    14. :func:`_serve_camera` keeps sending the frames to a client, as long as the window isn't full
+    15. :func:`_read_acknowledgements` keeps reading the acknowledgements of the frames
+    16. :func:`_receive_exactly` receives the given number of bytes
+    17. :func:`_stamp_frame` prepares a frame for sending
+
+Modifications
+=============
+
+You should add the handling of any new message types in :func:`_serve_control`, and any new camera protocols in
+:func:`_serve_camera`.
+"""
+
+import argparse
+import json
+import numpy as np
+import socket
+from communication.datagram import MAX_DATAGRAM_SIZE, DatagramReceiver, LossInjector
+from communication.frames import ACK, HEADER as FRAME_HEADER, HELLO, JPEG, MAGIC, RAW, WINDOW_ACK, WINDOW_HELLO, \
+    decode_header, encode_frame
+from communication.protocol import BINARY, DELTA, HEARTBEAT, HEADER, JSON, Decoder, DeltaDecoder, ProtocolError, \
+    encode, encode_data
+from dill import dumps
+from queue import Queue
+from threading import Condition, Event, Lock, Thread
+from time import monotonic, sleep, time
+
+# Declare the default ports
+CONTROL_PORT = 50000
+CAMERA_PORT = 50010
+
+# Declare the terminator of each pickled frame
+FRAME_END = bytes("Frame was successfully sent", encoding="ASCII")
+
+# Declare the number of distinct frames prepared for each camera
+FRAMES_COUNT = 8
+
+# Declare the frame encodings (None for the pickled frames)
+FRAME_ENCODINGS = {
+    "dill": None,
+    "raw": RAW,
+    "jpeg": JPEG
+}
+
+# Declare the default telemetry
+TELEMETRY = {"depth": 10.5, "temperature": 12.25, "humidity": 40.0}
+
+
+class Simulator:
+
+    def __init__(self, *, ip="localhost", port=CONTROL_PORT, camera_port=CAMERA_PORT, cameras=3,
+                 frame_shape=(480, 640, 3), frame_rate=30, frame_encoding="dill", telemetry=None, telemetry_rate=0,
+                 latency=0, loss=0, reorder=0, on_setpoints=None):
+        """
+        Constructor function used to prepare the frames and the state of the simulator.
+
+        :param ip: Address to bind the servers to
+        :param port: Port of the control server (both TCP and UDP)
+        :param camera_port: Port of the first camera server
+        :param cameras: Number of the camera servers
+        :param frame_shape: Shape of the frames (height, width and the number of channels)
+        :param frame_rate: Number of frames sent per second by each camera, as fast as possible if 0
+        :param frame_encoding: Encoding of the frames, one of `FRAME_ENCODINGS`
+        :param telemetry: Dictionary of the telemetry, or a function returning it given the latest setpoints
+        :param telemetry_rate: Number of the periodic telemetry messages per second (framed protocols only), 0 to only
+            reply to the received messages
+        :param latency: Delay of everything the simulator sends (seconds)
+        :param loss: Probability of dropping a received datagram
+        :param reorder: Probability of delivering a received datagram after the next one
+        :param on_setpoints: Function called with the dictionary of the setpoints, each time they're received
+        """
+
+        # Save the addresses
+        self._ip = ip
+        self._port = port
+        self._camera_port = camera_port
+        self._cameras = cameras
+
+        # Save the configuration of the data
+        self._frame_rate = frame_rate
+        self._telemetry_source = TELEMETRY if telemetry is None else telemetry
+        self._telemetry_rate = telemetry_rate
+        self._latency = latency
+        self._on_setpoints = on_setpoints
+
+        # Prepare the pickled frames, each followed by the terminator, or the framed frames (stamped when sent)
+        generator = np.random.default_rng(0)
+        images = [generator.integers(0, 256, frame_shape, dtype=np.uint8) for _ in range(FRAMES_COUNT)]
+        self._frame_encoding = FRAME_ENCODINGS[frame_encoding]
+        if self._frame_encoding is None:
+            self._frames = [dumps(image) + FRAME_END for image in images]
+        else:
+            self._frames = [encode_frame(image, 0, 0, self._frame_encoding) for image in images]
+
+        # Initialise the receiving side of the datagrams
+        self._receiver = DatagramReceiver()
+        self._injector = LossInjector(loss, reorder)
+
+        # Initialise the sockets, and the event set once stopped
+        self._sockets = set()
+        self._lock = Lock()
+        self._stopped = Event()
+
+        # Initialise the latest setpoints, and the counters of the control messages and of the frames sent by each
+        # camera
+        self.setpoints = dict()
+        self.messages = 0
+        self.frames = [0] * cameras
+
+    @property
+    def receiver(self) -> DatagramReceiver:
+        """
+        Getter for the receiving side of the datagrams.
+
+        :return: :class:`DatagramReceiver` with the counters of the received datagrams
+        """
+
+        return self._receiver
+
+    def start(self):
+        """
+        Function used to bind the servers and start their threads (in the background).
+        """
+
+        self._stopped.clear()
+
+        # Start the control servers
+        Thread(target=self._accept, args=(self._listen(self._port), self._serve_control), daemon=True).start()
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        udp.bind((self._ip, self._port))
+        self._sockets.add(udp)
+        Thread(target=self._serve_datagrams, args=(udp,), daemon=True).start()
+
+        # Start the camera servers
+        for camera in range(self._cameras):
+            server = self._listen(self._camera_port + camera)
+            Thread(target=self._accept, args=(server, self._serve_camera, camera), daemon=True).start()
+
+    def stop(self):
+        """
+        Function used to close the servers and the connections.
+        """
+
+        self._stopped.set()
+
+        # Shut the sockets down first, to unblock the threads waiting on them
+        with self._lock:
+            for sock in self._sockets:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+            self._sockets.clear()
+
+    def _listen(self, port) -> socket.socket:
+        """
+        Function used to bind a listening socket.
+
+        :param port: Port to listen on
+        :return: Listening socket
+        """
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((self._ip, port))
+        server.listen(1)
+        self._sockets.add(server)
+
+        return server
+
+    def _accept(self, server, handler, *args):
+        """
+        Function used to keep accepting the connections, serving each one in a separate thread.
+
+        :param server: Listening socket
+        :param handler: Function serving a connection, called with the client's socket and the args
+        :param args: Additional arguments of the handler
+        """
+
+        while not self._stopped.is_set():
+            try:
+                client, _ = server.accept()
+            except OSError:
+                break
+
+            with self._lock:
+                self._sockets.add(client)
+            Thread(target=handler, args=(client,) + args, daemon=True).start()
+
+    def _apply(self, setpoints):
+        """
+        Function used to store the received setpoints.
+
+        :param setpoints: Dictionary of the setpoints
+        """
+
+        self.setpoints = setpoints
+        self.messages += 1
+        if self._on_setpoints is not None:
+            self._on_setpoints(setpoints)
+
+    def _telemetry(self) -> dict:
+        """
+        Function used to build the telemetry.
+
+        :return: Dictionary of the telemetry
+        """
+
+        if callable(self._telemetry_source):
+            return self._telemetry_source(self.setpoints)
+
+        return self._telemetry_source
+
+    def _send_delayed(self, client, outbox):
+        """
+        Function used to keep sending the queued data once the latency passes, until the connection is closed.
+
+        :param client: Client's socket
+        :param outbox: Queue of the (time queued, bytes) tuples, None to stop
+        """
+
+        while True:
+            item = outbox.get()
+            if item is None:
+                break
+
+            # Wait until the latency passes, and send the data
+            queued, data = item
+            sleep(max(0, queued + self._latency - monotonic()))
+            try:
+                client.sendall(data)
+            except OSError:
+                break
+
+    def _serve_control(self, client):
+        """
+        Function used to exchange the control messages with a client.
+
+        :param client: Client's socket
+        """
+
+        # Send the small messages immediately (instead of waiting for the acknowledgement of the previous ones)
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        # Start sending the replies (delayed by the latency)
+        outbox = Queue()
+        Thread(target=self._send_delayed, args=(client, outbox), daemon=True).start()
+        decoder, setpoints, framed, stopped = Decoder(), DeltaDecoder(), None, Event()
+
+        try:
+            while not self._stopped.is_set():
+                data = client.recv(4096)
+                if not data:
+                    break
+
+                # Detect the legacy protocol, as the first bytes don't form a valid header
+                if framed is None:
+                    framed = len(data) < HEADER.size or data[HEADER.size - 1] & ~DELTA in (JSON, BINARY, HEARTBEAT)
+                    if framed and self._telemetry_rate:
+                        Thread(target=self._serve_telemetry, args=(outbox, stopped), daemon=True).start()
+
+                if not framed:
+                    self._serve_legacy(data, outbox)
+                    continue
+
+                for message_type, payload in decoder.feed(data):
+
+                    # Echo the heartbeats
+                    if message_type == HEARTBEAT:
+                        outbox.put((monotonic(), encode(HEARTBEAT, payload)))
+                        continue
+
+                    # Store the setpoints, and reply with the telemetry of the same type
+                    self._apply(setpoints.decode(message_type, payload))
+                    outbox.put((monotonic(), encode_data(self._telemetry(), message_type & ~DELTA)))
+
+        except (OSError, ProtocolError, UnicodeDecodeError, ValueError) as error:
+            print("Simulator closing the control connection: {}".format(error))
+
+        # Stop sending
+        stopped.set()
+        outbox.put(None)
+        client.close()
+
+    def _serve_legacy(self, data, outbox):
+        """
+        Function used to exchange the legacy messages (a single message is expected to be received at once).
+
+        :param data: Received bytes
+        :param outbox: Queue of the (time queued, bytes) tuples to send
+        """
+
+        try:
+            self._apply(json.loads(data.decode("utf-8").strip()))
+        except (UnicodeDecodeError, ValueError):
+            print("Simulator received invalid data: {}".format(data))
+
+        outbox.put((monotonic(), bytes(json.dumps(self._telemetry()), encoding="utf-8")))
+
+    def _serve_telemetry(self, outbox, stopped):
+        """
+        Function used to keep sending the periodic telemetry, until stopped.
+
+        :param outbox: Queue of the (time queued, bytes) tuples to send
+        :param stopped: Event set once the connection is closed
+        """
+
+        while not stopped.wait(1 / self._telemetry_rate):
+            outbox.put((monotonic(), encode_data(self._telemetry())))
+
+    def _serve_datagrams(self, udp):
+        """
+        Function used to keep receiving the datagrams, until stopped.
+
+        :param udp: Bound UDP socket
+        """
+
+        while not self._stopped.is_set():
+            try:
+                datagram = udp.recv(MAX_DATAGRAM_SIZE)
+            except OSError:
+                break
+
+            # Stop once the socket was shut down
+            if self._stopped.is_set():
+                break
+
+            # Pass the datagram through the simulated link, and store the setpoints unless stale
+            for delivered in self._injector(datagram):
+                try:
+                    setpoints = self._receiver.receive(delivered)
+                except ProtocolError as error:
+                    print("Simulator received an invalid datagram: {}".format(error))
+                    continue
+                if setpoints is not None:
+                    self._apply(setpoints)
+
+    def _serve_camera(self, client, camera):
+        """
+        Function used to keep sending the frames, as long as fewer frames than the window are unacknowledged.
+
+        The window is a single frame (stop-and-wait), unless the client declares a bigger one.
+
+        :param client: Client's socket
+        :param camera: Index of the camera
+        """
+
+        # Start sending the frames (delayed by the latency), and reading the acknowledgements
+        outbox = Queue()
+        Thread(target=self._send_delayed, args=(client, outbox), daemon=True).start()
+        flow, condition = {"window": 1, "acknowledged": 0, "closed": False}, Condition()
+        Thread(target=self._read_acknowledgements, args=(client, camera, flow, condition), daemon=True).start()
+        index = 0
+
+        while not self._stopped.is_set():
+            start = monotonic()
+
+            # Wait until the window has room for the next frame
+            with condition:
+                condition.wait_for(lambda: flow["closed"] or index - flow["acknowledged"] < flow["window"])
+                if flow["closed"]:
+                    break
+
+            # Queue the next frame
+            outbox.put((monotonic(), self._stamp_frame(index)))
+            index += 1
+
+            # Wait for the next frame if paced
+            if self._frame_rate:
+                sleep(max(0, 1 / self._frame_rate - (monotonic() - start)))
+
+        # Stop sending
+        outbox.put(None)
+        client.close()
+
+    def _read_acknowledgements(self, client, camera, flow, condition):
+        """
+        Function used to keep reading the acknowledgements, and release the acknowledged frames from the window, until
+        the connection is closed.
+
+        :param client: Client's socket
+        :param camera: Index of the camera
+        :param flow: Dictionary of the window, the number of the acknowledged frames and whether the connection is
+            closed
+        :param condition: Condition notified whenever the flow changes
+        """
+
+        try:
+            # Tell the modes apart by the first message, and set the declared window
+            message = self._receive_exactly(client, len(ACK))
+            windowed = message == HELLO and self._frame_encoding is not None
+            if windowed:
+                _, window = WINDOW_HELLO.unpack(message + self._receive_exactly(client, WINDOW_HELLO.size - len(HELLO)))
+                with condition:
+                    flow["window"] = max(1, window)
+                    condition.notify_all()
+                message = self._receive_exactly(client, WINDOW_ACK.size)
+
+            while True:
+
+                # Read the number of the acknowledged frames - each "ACK" acknowledges one frame, while the cumulative
+                # acknowledgement carries the sequence number of the last received frame
+                acknowledged = WINDOW_ACK.unpack(message)[1] + 1 if windowed else flow["acknowledged"] + 1
+
+                # Release the acknowledged frames
+                with condition:
+                    if acknowledged > flow["acknowledged"]:
+                        self.frames[camera] += acknowledged - flow["acknowledged"]
+                        flow["acknowledged"] = acknowledged
+                        condition.notify_all()
+
+                message = self._receive_exactly(client, WINDOW_ACK.size if windowed else len(ACK))
+
+        except OSError:
+            pass
+
+        with condition:
+            flow["closed"] = True
+            condition.notify_all()
+
+    @staticmethod
+    def _receive_exactly(client, size) -> bytes:
+        """
+        Function used to receive the given number of bytes.
+
+        Raises :class:`ConnectionError` if the connection is closed first.
+
+        :param client: Client's socket
+        :param size: Number of the bytes to receive
+        :return: Received bytes
+        """
+
+        data = b''
+        while len(data) < size:
+            chunk = client.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed")
+            data += chunk
+
+        return data
+
+    def _stamp_frame(self, index) -> bytes:
+        """
+        Function used to prepare a frame for sending, stamping the framed frames with the sequence number and the
+        current time.
+
+        :param index: Sequence number of the frame
+        :return: Bytes of the frame
+        """
+
+        frame = self._frames[index % len(self._frames)]
+        if self._frame_encoding is None:
+            return frame
+
+        # Replace the sequence number and the timestamp of the prepared header
+        header = decode_header(frame)._replace(sequence=index, timestamp=time())
+
+        return b''.join((FRAME_HEADER.pack(MAGIC, *header), memoryview(frame)[FRAME_HEADER.size:]))
+
+
+if __name__ == "__main__":
+
+    # Parse the configuration
+    parser = argparse.ArgumentParser(description="Simulate the Raspberry Pi's control and camera servers.")
+    parser.add_argument("--ip", default="localhost", help="address to bind the servers to")
+    parser.add_argument("--port", type=int, default=CONTROL_PORT, help="port of the control server")
+    parser.add_argument("--camera-port", type=int, default=CAMERA_PORT, help="port of the first camera server")
+    parser.add_argument("--cameras", type=int, default=3, help="number of the camera servers")
+    parser.add_argument("--frame-size", default="640x480", help="width and height of the frames")
+    parser.add_argument("--channels", type=int, default=3, help="number of the frames' channels")
+    parser.add_argument("--frame-rate", type=float, default=30, help="frames per second, 0 for as fast as possible")
+    parser.add_argument("--frame-encoding", choices=FRAME_ENCODINGS, default="dill", help="encoding of the frames")
+    parser.add_argument("--telemetry", type=json.loads, default=None, help="telemetry as a JSON object")
+    parser.add_argument("--telemetry-rate", type=float, default=0, help="periodic telemetry messages per second")
+    parser.add_argument("--latency", type=float, default=0, help="delay of everything sent (seconds)")
+    parser.add_argument("--loss", type=float, default=0, help="probability of dropping a received datagram")
+    arguments = parser.parse_args()
+    width, height = map(int, arguments.frame_size.split("x"))
+
+    # Run the simulator until interrupted, reporting the counters every second
+    simulator = Simulator(ip=arguments.ip, port=arguments.port, camera_port=arguments.camera_port,
+                          cameras=arguments.cameras, frame_shape=(height, width, arguments.channels),
+                          frame_rate=arguments.frame_rate, frame_encoding=arguments.frame_encoding,
+                          telemetry=arguments.telemetry, telemetry_rate=arguments.telemetry_rate,
+                          latency=arguments.latency, loss=arguments.loss)
+    simulator.start()
+    print("Simulating the Raspberry Pi on {}:{} (cameras from {})".format(arguments.ip, arguments.port,
+                                                                        arguments.camera_port))
+    try:
+        while True:
+            messages, frames = simulator.messages, list(simulator.frames)
+            sleep(1)
+            print("{} control messages/s, {} frames/s".format(
+                simulator.messages - messages, [now - before for now, before in zip(simulator.frames, frames)]))
+    except KeyboardInterrupt:
+        simulator.stop()
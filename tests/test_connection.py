@@ -0,0 +1,40 @@
+"""
+Tests of the connection's handling of the invalid data received from the Raspberry Pi.
+"""
+
+import communication.data_manager as dm
+import pytest
+from communication.connection import Connection
+from communication.protocol import BINARY, JSON, encode, pack_data
+
+# Declare the invalid payloads - out-of-range and mistyped values, values other than an object, and malformed JSON (sent
+# as the JSON part of the binary payloads)
+PAYLOADS = (b'{"hx": 2}', b'{"Mot_G": "fast"}', b'[1, 2]', b'"hx"', b'7', b'null', b'{"hx": 1')
+
+
+def _encode(protocol, payload) -> bytes:
+    """
+    Function used to encode a payload the way the Raspberry Pi sends it with the given protocol.
+
+    :param protocol: Name of the protocol
+    :param payload: JSON payload
+    :return: Received bytes
+    """
+
+    if protocol == "legacy":
+        return payload
+    if protocol == "json":
+        return encode(JSON, payload)
+    return encode(BINARY, pack_data(dict()) + payload)
+
+
+@pytest.mark.parametrize("protocol", ("legacy", "json", "binary"))
+def test_invalid_data_is_rejected(protocol, capsys):
+    connection = Connection(protocol=protocol, namespace="invalid")
+
+    for payload in PAYLOADS:
+        connection._handle_reply(_encode(protocol, payload))
+
+    # Every payload is reported, and nothing is stored
+    assert capsys.readouterr().out.count("Received invalid data") == len(PAYLOADS)
+    assert dm.get_data(namespace="invalid") == dict()
@@ -0,0 +1,53 @@
+"""
+Tests of the data manager's change notifications, with the waiting function running in a spawned process.
+"""
+
+from communication.data_manager import DataManager
+from pathos import helpers
+from time import sleep, time
+
+# Declare the maximum time to wait for the modification, and the maximum delay of the notification (seconds)
+TIMEOUT = 5
+DELAY = 1
+
+
+def _wait(shared, results):
+    """
+    Function used to wait for the modification of a value, using the objects shared by the parent process.
+
+    :param shared: Dictionary returned by :func:`DataManager.share`
+    :param results: Queue to put the result and the time of returning into
+    """
+
+    import communication.data_manager as dm
+
+    dm.adopt(shared)
+    result = dm.wait_for_change("Mot_G", last={"Mot_G": 1500}, timeout=TIMEOUT)
+    results.put((result, time()))
+
+
+def test_spawned_process_is_notified():
+
+    # Start the process the way it's started on Windows (the shared objects must be created within the same context)
+    method = helpers.mp.get_start_method()
+    helpers.mp.set_start_method("spawn", force=True)
+    manager, results = DataManager(), helpers.mp.Queue()
+
+    try:
+        manager.set_many({"Mot_G": 1500})
+        process = helpers.mp.Process(target=_wait, args=(manager.share(), results))
+        process.start()
+
+        # Modify the value once the process is likely waiting
+        sleep(DELAY)
+        modified = time()
+        manager.set_many({"Mot_G": 1600})
+
+        result, returned = results.get(timeout=TIMEOUT + DELAY)
+        process.join()
+
+    finally:
+        helpers.mp.set_start_method(method, force=True)
+
+    assert result is not None and result[1] == {"Mot_G": 1600}
+    assert returned - modified < DELAY
@@ -0,0 +1,129 @@
+"""
+Tests of the control datagrams sent over the loopback interface - the stale and the skipped datagrams, the sessions, and
+the simulated loss.
+"""
+
+import pytest
+import socket
+from communication.datagram import MAX_DATAGRAM_SIZE, DatagramReceiver, DatagramSender, LossInjector, decode_datagram
+from communication.protocol import BINARY, JSON
+from time import sleep
+
+# Declare the number of the datagrams sent through the simulated link, and its probabilities of loss and reordering
+DATAGRAMS = 1000
+LOSS = 0.2
+REORDER = 0.2
+
+
+@pytest.fixture
+def server():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(5)
+    yield server
+    server.close()
+
+
+def _send(sender, server, value) -> bytes:
+    """
+    Function used to send a datagram, and receive it on the other side.
+
+    :param sender: :class:`DatagramSender` connected to the server
+    :param server: Bound UDP socket
+    :param value: Value of the sent key
+    :return: Received bytes
+    """
+
+    sender.send({"Mot_G": value})
+
+    return server.recv(MAX_DATAGRAM_SIZE)
+
+
+@pytest.mark.parametrize("message_type", (JSON, BINARY))
+def test_datagrams_in_order_are_received(server, message_type):
+    sender, receiver = DatagramSender(server.getsockname(), message_type), DatagramReceiver()
+
+    try:
+        for value in range(1500, 1510):
+            assert receiver.receive(_send(sender, server, value)) == {"Mot_G": value}
+        assert (receiver.received, receiver.stale, receiver.skipped) == (10, 0, 0)
+
+    finally:
+        sender.close()
+
+
+def test_stale_and_skipped_datagrams_are_counted(server):
+    sender, receiver = DatagramSender(server.getsockname()), DatagramReceiver()
+
+    try:
+        datagrams = [_send(sender, server, value) for value in range(1501, 1506)]
+
+        # Deliver the 1st, the 3rd, the delayed 2nd, the duplicated 3rd and the 5th (the 4th is lost)
+        received = [receiver.receive(datagrams[index]) for index in (0, 2, 1, 2, 4)]
+        assert received == [{"Mot_G": 1501}, {"Mot_G": 1503}, None, None, {"Mot_G": 1505}]
+        assert (receiver.received, receiver.stale, receiver.skipped) == (3, 2, 2)
+
+    finally:
+        sender.close()
+
+
+def test_new_session_is_followed(server):
+    previous, receiver = DatagramSender(server.getsockname()), DatagramReceiver()
+    sleep(0.001)
+    sender = DatagramSender(server.getsockname())
+
+    try:
+        for value in range(1501, 1504):
+            receiver.receive(_send(previous, server, value))
+
+        # The new session starts over with the first sequence number, without counting the previous ones as skipped
+        assert sender.session > previous.session
+        assert receiver.receive(_send(sender, server, 1600)) == {"Mot_G": 1600}
+        assert (receiver.received, receiver.stale, receiver.skipped) == (4, 0, 0)
+
+        # The previous session's datagrams are stale from now on
+        assert receiver.receive(_send(previous, server, 1504)) is None
+        assert receiver.stale == 1
+
+    finally:
+        previous.close()
+        sender.close()
+
+
+def test_injector_passes_through_without_loss():
+    injector = LossInjector()
+    assert [injector(bytes([index])) for index in range(3)] == [[b'\x00'], [b'\x01'], [b'\x02']]
+    assert injector.dropped == 0
+
+
+def test_injector_drops_all_datagrams():
+    injector = LossInjector(loss=1)
+    assert all(injector(bytes([index])) == [] for index in range(10))
+    assert injector.dropped == 10
+
+
+def test_receiver_behind_lossy_link(server):
+    sender, receiver = DatagramSender(server.getsockname()), DatagramReceiver()
+    injector = LossInjector(loss=LOSS, reorder=REORDER, seed=0)
+
+    try:
+        # Pass each datagram through the simulated link, remembering the delivered sequence numbers
+        delivered = list()
+        for index in range(DATAGRAMS):
+            for datagram in injector(_send(sender, server, 1100 + index % 800)):
+                delivered.append(decode_datagram(datagram)[1])
+                receiver.receive(datagram)
+
+        # Each datagram is dropped, delivered, or still held back by the link
+        assert 0 < injector.dropped < DATAGRAMS / 2
+        assert DATAGRAMS - injector.dropped - len(delivered) in (0, 1)
+
+        # Each delivered datagram is either received or stale (if a newer one was delivered before), and each sequence
+        # number up to the newest one is either received or skipped
+        stale = sum(1 for index, sequence in enumerate(delivered) if sequence < max(delivered[:index], default=0))
+        assert 0 < stale == receiver.stale
+        assert receiver.received + receiver.stale == len(delivered)
+        assert receiver.received + receiver.skipped == max(delivered)
+
+    finally:
+        sender.close()
@@ -0,0 +1,111 @@
+"""
+Tests of the history of the data manager's values - the ring buffer of each key, the time range queries, and the
+downsampled records.
+"""
+
+import numpy as np
+import pytest
+from communication.history import History
+
+
+@pytest.fixture
+def history():
+    history = History(size=10, slots=4)
+    yield history
+    history.close()
+
+
+def _record(history, key, times, values=None):
+    """
+    Function used to record the values of a key, one record at a time.
+
+    :param history: :class:`History` to record into
+    :param key: Key of the values
+    :param times: Timestamps of the records
+    :param values: Values of the records, the timestamps by default
+    """
+
+    for timestamp, value in zip(times, times if values is None else values):
+        history.append({key: value}, timestamp)
+
+
+def test_ring_keeps_the_newest_records(history):
+
+    # Fill the ring partially, and then wrap around it twice
+    _record(history, "Mot_G", range(5), range(1500, 1505))
+    times, values = history.range("Mot_G")
+    assert times.tolist() == list(range(5)) and values.tolist() == list(range(1500, 1505))
+
+    _record(history, "Mot_G", range(5, 25), range(1505, 1525))
+    times, values = history.range("Mot_G")
+    assert times.tolist() == list(range(15, 25)) and values.tolist() == list(range(1515, 1525))
+
+
+def test_keys_are_recorded_separately(history):
+    history.append({"Mot_G": 1600, "Mot_R": 1400, "name": "ignored"}, 1)
+    history.append({"Mot_G": 1700, "hx": True}, 2)
+
+    # Only the numeric values are recorded, each key in its own slot
+    assert history.keys() == ["Mot_G", "Mot_R", "hx"]
+    assert history.range("Mot_G")[1].tolist() == [1600, 1700]
+    assert history.range("Mot_R")[0].tolist() == [1]
+
+    # The keys which don't fit are ignored
+    history.append({"Thr_FP": 1500, "Thr_FS": 1500}, 3)
+    assert history.keys() == ["Mot_G", "Mot_R", "hx", "Thr_FP"]
+
+
+@pytest.mark.parametrize("start, end, expected", (
+    (None, None, list(range(10, 20))),
+    (12, 15, [12, 13, 14]),
+    (12.5, 15.5, [13, 14, 15]),
+    (None, 13, [10, 11, 12]),
+    (17, None, [17, 18, 19]),
+    (0, 5, []),
+    (20, None, [])
+))
+def test_range(history, start, end, expected):
+
+    # Wrap around the ring, so that the range spans both of its parts
+    _record(history, "Mot_G", range(20))
+    times, values = history.range("Mot_G", start, end)
+    assert times.tolist() == values.tolist() == expected
+
+
+def test_range_of_unknown_key(history):
+    times, values = history.range("Mot_G")
+    assert len(times) == len(values) == 0
+
+
+def test_downsample():
+    history = History(size=100, slots=1)
+
+    try:
+        _record(history, "Mot_G", range(100))
+
+        # Each bucket reduces its ten records
+        times, minimum, maximum, mean = history.downsample("Mot_G", 10, 0, 100)
+        assert times.tolist() == list(range(0, 100, 10))
+        assert minimum.tolist() == list(range(0, 100, 10))
+        assert maximum.tolist() == list(range(9, 100, 10))
+        assert np.allclose(mean, np.arange(4.5, 100, 10))
+
+        # More buckets than the records leaves the values as they are, each in its own bucket
+        times, minimum, maximum, mean = history.downsample("Mot_G", 1000)
+        assert len(times) == 100
+        assert minimum.tolist() == maximum.tolist() == mean.tolist() == list(range(100))
+
+    finally:
+        history.close()
+
+
+def test_downsample_skips_empty_buckets(history):
+    _record(history, "Mot_G", (0, 1, 50, 51), (1500, 1600, 1700, 1900))
+
+    times, minimum, maximum, mean = history.downsample("Mot_G", 10, 0, 100)
+    assert times.tolist() == [0, 50]
+    assert minimum.tolist() == [1500, 1700] and maximum.tolist() == [1600, 1900] and mean.tolist() == [1550, 1800]
+
+    # Nothing recorded, or nothing within the range
+    assert all(len(array) == 0 for array in history.downsample("Mot_R", 10))
+    assert all(len(array) == 0 for array in history.downsample("Mot_G", 10, 60, 100))
@@ -0,0 +1,52 @@
+"""
+Tests of the journal's synchronisation of the written records with the disc, and of the records which can't be written.
+"""
+
+import communication.journal as journal
+import os
+from communication.journal import INDEX_ENTRY, Journal, JournalReader
+from time import sleep, time
+
+# Declare the delay between the synchronisations used by the tests (seconds)
+FSYNC_DELAY = 0.1
+
+
+def test_last_batch_is_synchronised_while_idle(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "FSYNC_DELAY", FSYNC_DELAY)
+    path = str(tmp_path / "dive.log")
+    log = Journal(path)
+
+    try:
+        # Write a single record right after the start (before the synchronisation is due) and stay idle
+        timestamp = time()
+        log.record({"Mot_G": 1600}, timestamp)
+        sleep(FSYNC_DELAY * 5)
+
+        # The record and its index entry reach the files without closing the journal
+        assert list(JournalReader(path).replay()) == [(timestamp, {"Mot_G": 1600})]
+        assert os.path.getsize(path + ".index") == INDEX_ENTRY.size
+
+    finally:
+        log.close()
+
+
+def test_records_which_cant_be_encoded_are_skipped(tmp_path, capsys):
+    path = str(tmp_path / "dive.log")
+    log = Journal(path)
+    circular = dict()
+    circular["self"] = circular
+
+    try:
+        # Queue the values which don't fit their fields or can't be serialised, between the valid records
+        log.record({"Mot_G": 1600}, 1)
+        log.record({"Mot_G": 70000}, 2)
+        log.record({"Mot_G": "fast"}, 3)
+        log.record({"Mot_G": 1700, "telemetry": circular}, 4)
+        log.record({"Mot_G": 1800}, 5)
+
+    finally:
+        log.close()
+
+    # The thread keeps writing the other records, and reports the skipped ones
+    assert list(JournalReader(path).replay()) == [(1, {"Mot_G": 1600}), (5, {"Mot_G": 1800})]
+    assert capsys.readouterr().out.count("Failed to journal the record") == 3
@@ -0,0 +1,182 @@
+"""
+Tests of the messages' framing - the messages reassembled from any chunks of the stream, and the delta encoding of the
+values, decoded by the reference receiver.
+"""
+
+import pytest
+from communication.protocol import BINARY, DELTA, HEADER, JSON, MAX_LENGTH, Decoder, DeltaDecoder, DeltaEncoder, \
+    ProtocolError, decode_data, encode, encode_data
+from communication.schema import SCHEMA
+
+# Declare the values sent by an idle pilot (the declared keys, and a key which isn't declared)
+IDLE = {**SCHEMA.defaults(), "depth": 2.5}
+
+# Declare the messages of a stream (of each type)
+MESSAGES = [encode_data({"Mot_G": 1500 + index, "depth": index / 10}, message_type)
+            for index, message_type in enumerate((JSON, BINARY, JSON | DELTA, BINARY | DELTA))]
+
+
+def _decode(message) -> tuple:
+    """
+    Function used to decode a single framed message.
+
+    :param message: Framed message
+    :return: Tuple of the message type and the payload
+    """
+
+    messages = Decoder().feed(message)
+    assert len(messages) == 1
+
+    return messages[0]
+
+
+def _expected() -> list:
+    """
+    Function used to build the messages the stream should be decoded into.
+
+    :return: List of (message type, payload) tuples
+    """
+
+    return [(HEADER.unpack_from(message)[1], message[HEADER.size:]) for message in MESSAGES]
+
+
+@pytest.mark.parametrize("size", (1, 2, 5, HEADER.size, 64))
+def test_split_messages_are_reassembled(size):
+    decoder, stream = Decoder(), b''.join(MESSAGES)
+
+    # Feed the stream in chunks of the given size, the messages are returned once their last byte arrives
+    messages = list()
+    for offset in range(0, len(stream), size):
+        messages.extend(decoder.feed(stream[offset:offset + size]))
+
+    assert messages == _expected()
+    assert decoder.feed(b'') == []
+
+
+def test_coalesced_messages_are_returned_together():
+    decoder, stream = Decoder(), b''.join(MESSAGES)
+
+    # Feed all messages but the last one's final byte at once, followed by the final byte
+    assert decoder.feed(stream[:-1]) == _expected()[:-1]
+    assert decoder.feed(stream[-1:]) == _expected()[-1:]
+
+    # An empty payload is a complete message too
+    assert decoder.feed(encode(JSON, b'') + MESSAGES[0]) == [(JSON, b'')] + _expected()[:1]
+
+
+def test_too_long_message_is_rejected():
+    # A message of the maximum length is accepted, and waits for its payload
+    decoder = Decoder()
+    assert decoder.feed(HEADER.pack(MAX_LENGTH, JSON)) == []
+
+    # The length is checked as soon as the header arrives, without waiting for the payload
+    with pytest.raises(ProtocolError):
+        Decoder().feed(HEADER.pack(MAX_LENGTH + 1, JSON))
+
+    # The decoder can be reused once reset
+    decoder.reset()
+    assert decoder.feed(MESSAGES[0]) == _expected()[:1]
+
+
+@pytest.mark.parametrize("message_type", (JSON, BINARY))
+def test_first_message_is_a_keyframe(message_type):
+    encoder, decoder = DeltaEncoder(message_type), DeltaDecoder()
+
+    # Keep sending the keyframes until one is acknowledged
+    for _ in range(2):
+        received_type, payload = _decode(encoder.encode(IDLE))
+        assert received_type == message_type
+        assert decoder.decode(received_type, payload) == IDLE
+
+
+@pytest.mark.parametrize("message_type", (JSON, BINARY))
+def test_deltas_carry_the_changes(message_type):
+    encoder, decoder = DeltaEncoder(message_type), DeltaDecoder()
+    decoder.decode(*_decode(encoder.encode(IDLE)))
+    encoder.acknowledge()
+
+    # Nothing changed, so the delta is empty
+    received_type, payload = _decode(encoder.encode(IDLE))
+    assert received_type == message_type | DELTA and decode_data(received_type, payload) == dict()
+    assert decoder.decode(received_type, payload) == IDLE
+    encoder.acknowledge()
+
+    # Only the changed values are sent, and applied on top of the previous ones
+    data = {**IDLE, "Mot_G": 1600, "depth": 3.0}
+    received_type, payload = _decode(encoder.encode(data))
+    assert received_type == message_type | DELTA
+    assert decode_data(received_type, payload) == {"Mot_G": 1600, "depth": 3.0}
+    assert decoder.decode(received_type, payload) == data
+
+
+@pytest.mark.parametrize("message_type", (JSON, BINARY))
+def test_keyframe_interval(message_type):
+    encoder = DeltaEncoder(message_type, keyframe_interval=3)
+
+    # Each keyframe is followed by (interval - 1) deltas, even if all messages are acknowledged
+    types = list()
+    for _ in range(7):
+        types.append(_decode(encoder.encode(IDLE))[0])
+        encoder.acknowledge()
+
+    delta = message_type | DELTA
+    assert types == [message_type, delta, delta, message_type, delta, delta, message_type]
+
+
+@pytest.mark.parametrize("message_type", (JSON, BINARY))
+def test_lost_messages_are_covered(message_type):
+    encoder, decoder = DeltaEncoder(message_type), DeltaDecoder()
+    decoder.decode(*_decode(encoder.encode(IDLE)))
+    encoder.acknowledge()
+
+    # Lose the unacknowledged deltas, the next one still carries all changes since the acknowledged values
+    encoder.encode({**IDLE, "Mot_G": 1600})
+    encoder.encode({**IDLE, "Mot_G": 1600, "Thr_FP": 1200})
+    data = {**IDLE, "Mot_G": 1600, "Thr_FP": 1200, "hx": 1}
+    assert decoder.decode(*_decode(encoder.encode(data))) == data
+
+
+@pytest.mark.parametrize("message_type", (JSON, BINARY))
+def test_reverted_value_is_sent(message_type):
+    encoder, decoder = DeltaEncoder(message_type), DeltaDecoder()
+    decoder.decode(*_decode(encoder.encode(IDLE)))
+    encoder.acknowledge()
+
+    # The receiver may have applied the unacknowledged change, so the value reverted to the acknowledged one is sent
+    decoder.decode(*_decode(encoder.encode({**IDLE, "Mot_G": 1600})))
+    received_type, payload = _decode(encoder.encode(IDLE))
+    assert received_type == message_type | DELTA
+    assert decoder.decode(received_type, payload) == IDLE
+
+
+@pytest.mark.parametrize("message_type", (JSON, BINARY))
+def test_unacknowledged_keyframe_is_repeated(message_type):
+    encoder, decoder = DeltaEncoder(message_type), DeltaDecoder()
+
+    # Lose the first keyframe, the receiver gets the full state from the next one
+    encoder.encode(IDLE)
+    data = {**IDLE, "Mot_G": 1600}
+    received_type, payload = _decode(encoder.encode(data))
+    assert received_type == message_type
+    assert decoder.decode(received_type, payload) == data
+
+
+@pytest.mark.parametrize("message_type", (JSON, BINARY))
+def test_reset(message_type):
+    encoder, decoder = DeltaEncoder(message_type), DeltaDecoder()
+    decoder.decode(*_decode(encoder.encode(IDLE)))
+    encoder.acknowledge()
+
+    # Reconnect - the receiver discards its values, and the sender starts over with a keyframe
+    encoder.reset()
+    decoder.reset()
+    data = {**IDLE, "Mot_G": 1600}
+    received_type, payload = _decode(encoder.encode(data))
+    assert received_type == message_type
+    assert decoder.decode(received_type, payload) == data
+
+    # A delta can't be applied before the first keyframe
+    decoder.reset()
+    encoder.acknowledge()
+    with pytest.raises(ProtocolError):
+        decoder.decode(*_decode(encoder.encode(data)))
@@ -0,0 +1,84 @@
+"""
+Tests of the frame mailbox - waiting for the new frames, and rejecting the frames older than the latest one.
+"""
+
+from communication.queues import FrameMailbox
+from threading import Thread
+from time import monotonic, sleep
+
+# Declare the number of the frames put by the producer, and the time waited by the consumers (seconds)
+FRAMES = 200
+TIMEOUT = 0.1
+
+
+def test_wait_for_frame_times_out():
+    mailbox = FrameMailbox()
+
+    # Nothing was put yet
+    start = monotonic()
+    assert mailbox.wait_for_frame(0, TIMEOUT) is None and mailbox.latest() is None
+    assert monotonic() - start >= TIMEOUT
+
+    # The latest frame was seen already, so only a newer one ends the wait
+    mailbox.put("first", 1, 10.0)
+    assert mailbox.wait_for_frame(1, TIMEOUT) is None
+
+    # A frame newer than the seen one is returned straight away
+    assert mailbox.wait_for_frame(0, 0) == (1, 10.0, "first")
+
+
+def test_wait_for_frame_wakes_up_on_a_new_frame():
+    mailbox, received = FrameMailbox(), list()
+
+    consumer = Thread(target=lambda: received.append(mailbox.wait_for_frame(0)))
+    consumer.start()
+    sleep(TIMEOUT)
+    assert consumer.is_alive()
+
+    mailbox.put("first", 1, 10.0)
+    consumer.join(TIMEOUT)
+    assert not consumer.is_alive() and received == [(1, 10.0, "first")]
+
+
+def test_consumer_sees_the_frames_in_order():
+    mailbox, seen = FrameMailbox(), list()
+
+    def _consume():
+        """
+        Function used to keep waiting for the frames newer than the last one seen, until the last frame is seen.
+        """
+
+        received = mailbox.wait_for_frame(0)
+        seen.append(received.sequence)
+        while received.sequence < FRAMES:
+            received = mailbox.wait_for_frame(received.sequence)
+            seen.append(received.sequence)
+
+    consumer = Thread(target=_consume)
+    consumer.start()
+    for sequence in range(1, FRAMES + 1):
+        mailbox.put(sequence, sequence, float(sequence))
+        if sequence % 10 == 0:
+            sleep(0.001)
+    consumer.join(5)
+
+    # The frames skipped while the consumer was busy are superseded, but the seen ones only ever get newer
+    assert not consumer.is_alive()
+    assert seen == sorted(set(seen)) and seen[-1] == FRAMES
+    assert mailbox.latest() == (FRAMES, float(FRAMES), FRAMES)
+
+
+def test_older_frames_are_rejected():
+    mailbox = FrameMailbox()
+    assert mailbox.sequence == 0
+
+    # The frames decoded out of order never replace a newer frame
+    assert mailbox.put("second", 2, 20.0)
+    assert not mailbox.put("first", 1, 10.0)
+    assert not mailbox.put("duplicate", 2, 30.0)
+    assert mailbox.sequence == 2 and mailbox.latest() == (2, 20.0, "second")
+
+    # So the consumers which saw the latest frame keep waiting, until a newer frame is put
+    assert mailbox.wait_for_frame(2, TIMEOUT) is None
+    assert mailbox.put("third", 3, 30.0)
+    assert mailbox.wait_for_frame(2, TIMEOUT) == (3, 30.0, "third")
@@ -0,0 +1,106 @@
+"""
+Tests of the recorder's video segments, recorded into the same directory more than once, and of the frames which can't
+be recorded.
+"""
+
+import numpy as np
+import os
+import pytest
+from communication.recorder import Recorder, RecordingReader
+
+# Declare the number of the frames of each recording, and the frame's shape
+FRAMES = 3
+FRAME_SHAPE = (48, 64, 3)
+
+
+class _Stream:
+
+    def __init__(self):
+        """
+        Constructor function used to initialise the taps of a stream which is never connected.
+        """
+
+        self.taps = list()
+
+    def tap(self, function):
+        """
+        Function used to register a function called with each frame.
+
+        :param function: Function called with the sequence number, the timestamp and the frame
+        """
+
+        self.taps.append(function)
+
+    def untap(self, function):
+        """
+        Function used to remove a registered function.
+
+        :param function: Function passed to :func:`tap`
+        """
+
+        self.taps.remove(function)
+
+
+def _record(path, first):
+    """
+    Function used to record a number of frames of a single camera.
+
+    :param path: Path to the recording's directory
+    :param first: Sequence number of the first frame
+    """
+
+    stream = _Stream()
+    recorder = Recorder(path, [stream], form="video")
+    recorder.start()
+
+    for sequence in range(first, first + FRAMES):
+        stream.taps[0](sequence, float(sequence), np.full(FRAME_SHAPE, sequence * 20, dtype=np.uint8))
+
+    recorder.stop()
+
+
+def test_reopened_directory_keeps_the_segments(tmp_path):
+    _record(str(tmp_path), 0)
+    _record(str(tmp_path), FRAMES)
+
+    # The second recording starts a new segment, and the index still finds the frames of both
+    assert sorted(name for name in os.listdir(tmp_path) if name.endswith(".avi")) == \
+        ["camera0_0000.avi", "camera0_0001.avi"]
+    frames = list(RecordingReader(str(tmp_path)).replay())
+    assert [sequence for sequence, _, _ in frames] == list(range(2 * FRAMES))
+    assert all(frame.shape == FRAME_SHAPE for _, _, frame in frames)
+
+
+def test_frames_which_cant_be_encoded_are_skipped(tmp_path, capsys):
+    stream = _Stream()
+    recorder = Recorder(str(tmp_path), [stream], form="raw")
+    recorder.start()
+
+    # Publish a frame of an unsupported pixel type between the valid frames
+    for sequence, dtype in enumerate((np.uint8, np.int64, np.uint8)):
+        stream.taps[0](sequence, float(sequence), np.zeros(FRAME_SHAPE, dtype=dtype))
+    recorder.stop()
+
+    # The thread keeps writing the other frames, and reports the skipped one
+    assert recorder.recorded == 2
+    assert [sequence for sequence, _, _ in RecordingReader(str(tmp_path)).replay()] == [0, 2]
+    assert capsys.readouterr().out.count("Failed to record the frame") == 1
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_files_are_closed_after_the_thread_failed(tmp_path, monkeypatch):
+    stream = _Stream()
+    recorder = Recorder(str(tmp_path), [stream], form="raw")
+    recorder.start()
+
+    # Fail the writing thread, as the disc would
+    def _fail(*_):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(recorder, "_write_raw", _fail)
+    stream.taps[0](0, 0.0, np.zeros(FRAME_SHAPE, dtype=np.uint8))
+    recorder._thread.join(5)
+    assert not recorder._thread.is_alive()
+
+    recorder.stop()
+    assert stream.taps == [] and all(file.closed for file in recorder._indices + recorder._containers)
@@ -0,0 +1,88 @@
+"""
+Tests of the safeguard engine, compared against the original, formula-based safeguarding of the transmission data.
+"""
+
+import pytest
+from benchmarks.safeguard import reference
+from communication.data_manager import DataManager
+from itertools import product
+
+# Declare the PWM limits and the idle value of the thrusters and the motors
+PWM_MIN = 1100
+PWM_IDLE = 1500
+PWM_MAX = 1900
+
+# Declare the controller's axis limits and the PWM step of a hat press (see the :class:`Controller`)
+AXIS_MIN = -32768
+AXIS_MAX = 32767
+HAT_STEP = 400
+
+
+def _axis(value) -> int:
+    """
+    Function used to convert a raw axis value to the PWM value, the way the controller normalises it.
+
+    :param value: Raw axis value
+    :return: PWM value
+    """
+
+    return int(PWM_MIN + (value - AXIS_MIN) * (PWM_MAX - PWM_MIN) / (AXIS_MAX - AXIS_MIN))
+
+
+def _cases(keys) -> list:
+    """
+    Function used to build the deterministic inputs to check.
+
+    :param keys: Keys of the safeguarded values, sorted
+    :return: List of the transmission data dictionaries
+    """
+
+    cases = list()
+
+    # All values at the limits and the idle value, and each value alone at the limits
+    for value in (PWM_MIN, PWM_IDLE, PWM_MAX):
+        cases.append({key: value for key in keys})
+        for key in keys:
+            cases.append({**{other: PWM_IDLE for other in keys}, key: value})
+
+    # Every combination of the limits and the idle value on the thrusters, with the motors at full power
+    thrusters = [key for key in keys if key.startswith("Thr_")][:5]
+    for values in product((PWM_MIN, PWM_IDLE, PWM_MAX), repeat=len(thrusters)):
+        cases.append({**{key: PWM_MAX for key in keys}, **dict(zip(thrusters, values))})
+
+    # Hat values (-1, 0 and 1) driving the vertical thrusters, with all other values at full power
+    for hat in (-1, 0, 1):
+        cases.append({key: PWM_IDLE + hat * HAT_STEP if key.startswith("Thr_T") else PWM_MAX for key in keys})
+
+    # Out-of-range axes, producing values at and beyond the PWM limits (and the precomputed table)
+    for axis in (AXIS_MIN - 10000, AXIS_MIN - 1, AXIS_MAX + 1, AXIS_MAX + 10000):
+        cases.append({key: _axis(axis) for key in keys})
+        cases.append({**{key: PWM_MAX for key in keys}, keys[0]: _axis(axis)})
+
+    # Non-integer values, and some of the values missing
+    cases.append({key: PWM_MAX - 0.5 for key in keys})
+    cases.append({key: PWM_MIN + 0.25 for key in keys[::2]})
+    cases.append(dict())
+
+    return cases
+
+
+@pytest.fixture(scope="module")
+def manager():
+    return DataManager()
+
+
+def test_axis_limits_map_to_the_pwm_limits():
+    assert (_axis(AXIS_MIN), _axis(0), _axis(AXIS_MAX)) == (PWM_MIN, PWM_IDLE, PWM_MAX)
+    assert _axis(AXIS_MIN - 1) < PWM_MIN and _axis(AXIS_MAX + 1) >= PWM_MAX
+
+
+def test_engine_matches_the_reference(manager):
+    for data in _cases(sorted(manager._SAFEGUARD_KEYS)):
+        assert manager._safeguard_transmission_data(data) == reference(manager, data), data
+
+
+def test_engine_limits_full_thrust(manager):
+    data = {key: PWM_MAX for key in manager._SAFEGUARD_KEYS}
+    result = manager._safeguard_transmission_data(data)
+    assert result != data and all(PWM_IDLE < value < PWM_MAX for value in result.values())
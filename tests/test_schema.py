@@ -0,0 +1,65 @@
+"""
+Tests of the schema of the data manager's keys - the packed values, and the validation of their types and ranges.
+"""
+
+import pytest
+from communication.schema import SCHEMA, Field, Schema
+
+# Declare the values of all declared keys, different from the defaults
+VALUES = {field.key: (field.maximum if field.default != field.maximum else field.minimum) for field in SCHEMA}
+
+
+def test_round_trip():
+
+    # All values, and the defaults of the declared keys
+    assert SCHEMA.unpack(SCHEMA.pack(VALUES)) == VALUES
+    assert SCHEMA.unpack(SCHEMA.pack(SCHEMA.defaults())) == SCHEMA.defaults()
+
+    # Only the present keys are decoded, the other keys are ignored, and the integer values are rounded
+    data = {"Mot_G": 1600.4, "hx": -1, "depth": 2.5}
+    assert SCHEMA.unpack(SCHEMA.pack(data)) == {"Mot_G": 1600, "hx": -1}
+    assert len(SCHEMA.pack(data)) == len(SCHEMA.pack(VALUES)) == SCHEMA.size
+
+
+def test_sparse_packing():
+
+    # The sparsely packed values only contain the present keys, in any order
+    data = {"Mot_G": 1600, "lax": 1200}
+    payload = SCHEMA.pack(data, sparse=True)
+    assert SCHEMA.unpack(payload, sparse=True) == data
+    assert len(payload) == SCHEMA.sparse_size(payload) < SCHEMA.size
+
+    # No values at all is just the mask, and all values are the same as the full packing
+    assert SCHEMA.unpack(SCHEMA.pack(dict(), sparse=True), sparse=True) == dict()
+    assert SCHEMA.unpack(SCHEMA.pack(VALUES, sparse=True), sparse=True) == VALUES
+
+    # Any bytes following the sparse values are ignored
+    assert SCHEMA.unpack(payload + b'{}', sparse=True) == data
+
+
+@pytest.mark.parametrize("data", (
+    {"Mot_G": 1099},
+    {"Mot_G": 1900.5},
+    {"lt": 1501},
+    {"hx": 2},
+    {"hy": -2},
+    {"Thr_FP": "1500"},
+    {"Thr_FP": None},
+    {"Mot_G": 1500, "Mot_R": 2000}
+))
+def test_validate_rejects_invalid_values(data):
+    with pytest.raises(ValueError):
+        SCHEMA.validate(data)
+
+
+def test_validate_accepts_valid_values():
+
+    # The limits are inclusive, the integer fields accept floats, and the other keys aren't checked
+    data = {"Mot_G": 1100, "Mot_R": 1900, "Thr_FP": 1500.5, "hx": 1, "depth": -1}
+    assert SCHEMA.validate(data) is data
+    assert SCHEMA.validate(VALUES) is VALUES
+
+
+def test_ids_must_be_consecutive():
+    with pytest.raises(ValueError):
+        Schema([Field(0, "first", "uint16"), Field(2, "second", "uint16")])
@@ -0,0 +1,128 @@
+"""
+Tests of the shared memory backend of the data manager - the writers running in spawned processes, and the keys of
+several vehicles' namespaces.
+"""
+
+import os
+from communication.data_manager import DataManager
+from communication.schema import SCHEMA
+from communication.shared_memory import ENVIRONMENT_KEY, NAMESPACES, SharedMemoryCache
+from pathos import helpers
+
+# Declare the number of the writing processes, and the number of writes of each
+WRITERS = 3
+WRITES = 2000
+
+# Declare the number of the vehicles, and the number of the telemetry keys of each
+VEHICLES = 12
+TELEMETRY_KEYS = 10
+
+
+def _write(cache, started, writer):
+    """
+    Function used to keep overwriting a writer's key (each write modifies the pickled overflow).
+
+    :param cache: Pickled :class:`SharedMemoryCache`
+    :param started: Event set once all writers should start
+    :param writer: Index of the writer
+    """
+
+    started.wait()
+    for i in range(WRITES):
+        cache.update({"writer{}".format(writer): i})
+
+
+def test_spawned_writers_share_the_lock():
+
+    # Start the processes the way they're started on Windows (the lock must be created within the same context)
+    method = helpers.mp.get_start_method()
+    helpers.mp.set_start_method("spawn", force=True)
+    cache, started = SharedMemoryCache(), helpers.mp.Event()
+
+    try:
+        processes = [helpers.mp.Process(target=_write, args=(cache, started, writer)) for writer in range(WRITERS)]
+        for process in processes:
+            process.start()
+        started.set()
+        for process in processes:
+            process.join()
+            assert process.exitcode == 0
+
+        # No write may be lost, and each write must increase the version
+        version, data = cache.snapshot()
+        assert data == {"writer{}".format(writer): WRITES - 1 for writer in range(WRITERS)}
+        assert version == WRITERS * WRITES
+
+    finally:
+        cache.close()
+        helpers.mp.set_start_method(method, force=True)
+
+
+def test_vehicles_fit_in_the_block():
+    manager = DataManager()
+
+    # Write each vehicle's control keys and telemetry in its namespace
+    expected = dict()
+    for vehicle in range(VEHICLES):
+        name = "vehicle{}".format(vehicle)
+        data = {field.key: field.default for field in SCHEMA}
+        data.update({"telemetry{}".format(i): vehicle + i / 10 for i in range(TELEMETRY_KEYS)})
+        manager.set_many(data, namespace=name)
+        expected[name] = data
+
+    # Each vehicle's keys are stored in its own region
+    for name, data in expected.items():
+        assert manager.get(namespace=name) == data
+    region, key = manager._data._locate("vehicle0/Mot_G")
+    assert region and key == "Mot_G"
+
+
+def test_instances_get_their_own_blocks():
+    first, second = SharedMemoryCache(), SharedMemoryCache()
+
+    try:
+        # Only the processes started afterwards attach to the exported block
+        assert first.name != second.name
+        first["Mot_G"] = 1600
+        assert "Mot_G" not in second and second.version == 0
+
+    finally:
+        first.close()
+        second.close()
+
+
+def _attach(results):
+    """
+    Function used to report the name of the block a forked process attaches to.
+
+    :param results: Queue to put the block's name into
+    """
+
+    cache = SharedMemoryCache()
+    results.put(cache.name)
+    cache.close()
+
+
+def test_forked_process_attaches_to_the_exported_block():
+    exported = os.environ[ENVIRONMENT_KEY].rpartition(":")[0]
+    context = helpers.mp.get_context("fork")
+    results = context.Queue()
+
+    process = context.Process(target=_attach, args=(results,))
+    process.start()
+    assert results.get(timeout=5) == exported
+    process.join()
+    assert process.exitcode == 0
+
+
+def test_namespaces_beyond_the_block_use_the_global_region():
+    cache = SharedMemoryCache()
+
+    # Write more namespaces than there are regions, the remaining ones fall back to the global region
+    data = {"extra{}/Mot_G".format(namespace): 1100 + namespace for namespace in range(NAMESPACES + 2)}
+    cache.update(data)
+
+    _, stored = cache.snapshot()
+    assert {key: stored[key] for key in data} == data
+    assert all(cache[key] == value for key, value in data.items())
+    assert any(cache._locate(key) is None for key in data)
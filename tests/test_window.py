@@ -0,0 +1,64 @@
+"""
+Tests of the windowed acknowledgements of the video stream, over a link with the latency injected by the simulator.
+"""
+
+from communication.video_stream import VideoStream
+from simulator.pi import Simulator
+from time import monotonic, sleep
+
+# Declare the first port (each run uses its own ports), and the frame's shape (a window of frames fits the buffer)
+PORT = 51700
+FRAME_SHAPE = (120, 160, 3)
+
+# Declare the injected latency (seconds), and the windows compared
+LATENCY = 0.02
+WINDOWS = (1, 4)
+
+# Declare the time given to connect, and the duration of each run (seconds)
+WARMUP = 0.5
+DURATION = 1
+
+
+def _measure(window, port) -> tuple:
+    """
+    Function used to receive the frames with the given window.
+
+    :param window: Maximum number of the unacknowledged frames
+    :param port: Control port of the run's simulator (the camera uses the next port)
+    :return: Tuple of the frames received per second, the largest size of the receive buffer (bytes), and the buffer's
+        initial size
+    """
+
+    simulator = Simulator(port=port, camera_port=port + 1, cameras=1, frame_shape=FRAME_SHAPE, frame_rate=0,
+                          frame_encoding="raw", latency=LATENCY)
+    simulator.start()
+    stream = VideoStream(port=port + 1, protocol="framed", window=window)
+
+    try:
+        stream.stream()
+        sleep(WARMUP)
+
+        # Count the frames sent, and keep checking the size of the buffer meanwhile
+        frames, start, size = simulator.frames[0], monotonic(), 0
+        while monotonic() - start < DURATION:
+            size = max(size, len(stream._buffer))
+            sleep(0.05)
+        frames = (simulator.frames[0] - frames) / (monotonic() - start)
+
+    finally:
+        stream.stop()
+        simulator.stop()
+
+    return frames, size, stream._INITIAL_BUFFER_SIZE
+
+
+def test_window_raises_the_frame_rate():
+    (stop_and_wait, _, _), (windowed, size, initial) = (_measure(window, PORT + 2 * index)
+                                                        for index, window in enumerate(WINDOWS))
+
+    # Stop-and-wait is limited to a frame per round trip, while the window keeps several frames in flight
+    assert 0 < stop_and_wait < 1 / LATENCY
+    assert windowed > 2 * stop_and_wait
+
+    # The received data is bounded by the window's frames, so the buffer never grows
+    assert size == initial